@@ -1,8 +1,15 @@
 import streamlit as st 
 import pandas as pd  
 
+from bikedata import finish_profiling, load_credential_store, load_prewarmer, start_profiling
+
 # 페이지 설정
 st.set_page_config(layout="wide", page_title="따릉이 데이터 분석 수업")
+# 성능 측정 (DATABIKE_PROFILE 환경 변수나 ?profile=1 로 켤 때만)
+start_profiling('app')
+
+# 수업 자료를 뒤에서 미리 불러온다 (서버마다 한 번) - 로그인하는 동안 캐시가 채워진다
+warmup = load_prewarmer()
 
 # CSS 스타일 추가
 st.markdown("""
@@ -62,9 +69,8 @@ col1, col2, col3 = st.columns([1,2,1])
 with col2:
     st.image('image.png', use_container_width=True)  
 
-# 데이터 로드
-data = pd.read_csv('id.csv')
-data["PW"] = data["PW"].astype(str)
+# 계정 정보 (서버에서 한 번만 읽고, id.csv가 바뀌면 자동으로 다시 읽음)
+credentials = load_credential_store()
 
 # 로그인 폼
 st.markdown('<div class="login-box">', unsafe_allow_html=True)
@@ -79,9 +85,9 @@ if submit_button:
     if not ID or not PW:
         st.warning("🔔 아이디와 비밀번호를 모두 입력해주세요.")
     else:
-        user = data[(data["ID"]==ID)&(data["PW"]==PW)]
-        
-        if not user.empty:
+        if credentials.verify(ID, PW):
+            st.session_state['user_id'] = ID
+            st.session_state['role'] = credentials.role(ID)
             st.success(f"🎉 환영합니다, {ID}님!")
             st.balloons()
             st.switch_page("pages/week1.py")
@@ -90,9 +96,22 @@ if submit_button:
 
 st.markdown('</div>', unsafe_allow_html=True)
 
+# 수업 자료 준비 상태
+done, total = warmup.progress()
+if not warmup.ready:
+    st.progress(done / total, text=f"수업 자료를 준비하고 있어요 ({done}/{total})")
+with st.expander("수업 자료 준비 상태"):
+    st.dataframe(
+        pd.DataFrame.from_dict(warmup.status(), orient='index').rename(
+            columns={'state': '상태', 'seconds': '걸린 시간(초)', 'error': '오류'}),
+        use_container_width=True
+    )
+
 # 추가 정보 (선택사항)
 st.markdown("""
     <div style='text-align: center; color: #666; margin-top: 30px; font-size: 0.9em;'>
         중학교 정보 교과 데이터 분석 수업에 오신 것을 환영합니다! 🎈
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_profiling()
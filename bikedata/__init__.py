@@ -0,0 +1,15 @@
+# 따릉이 수업 페이지들이 함께 쓰는 데이터 계층
+from bikedata.live import LiveSource, TailReader
+from bikedata.dimension import SEOUL_DISTRICTS, StationDistricts, load_station_districts
+from bikedata.trips import TRIP_PATH, TRIP_PATTERN, attach_trips, derive_columns, ingest_trips, iter_trip_chunks, load_live_trips, load_trip_preview, load_trips, read_trip_csv, read_trip_preview, row_chunks, trip_snapshot, trip_stamp
+from bikedata.cube import DurationHistogram, DurationIndex, TripCube, load_duration_histogram, load_duration_index, load_trip_cube
+from bikedata.stations import STATION_PATH, attach_stations, grid_summary, load_station_map_html, load_station_volume, load_stations
+from bikedata.geo import StationIndex, haversine_m, load_station_index
+from bikedata.od import ODMatrix, load_flow_map_html, load_od_matrix
+from bikedata.flow import NetFlow, load_net_flow, load_net_flow_map_html
+from bikedata.auth import CredentialStore, hash_password, load_credential_store
+from bikedata.storage import SubmissionStore, load_submission_store
+from bikedata.figures import FigureCache, cached_figure, load_figure_cache
+from bikedata.districts import DistrictSummary, attach_districts, load_district_summary, load_live_districts
+from bikedata.prewarm import Prewarmer, load_prewarmer
+from bikedata.profiling import ProfileLog, ProfileRun, finish_profiling, load_profile_log, start_profiling
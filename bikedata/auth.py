@@ -0,0 +1,146 @@
+import argparse
+import csv
+import hashlib
+import hmac
+import os
+import secrets
+import sys
+import threading
+
+import streamlit as st
+
+ID_PATH = 'id.csv'
+HASH_SCHEME = 'pbkdf2_sha256'
+HASH_ITERATIONS = 200_000
+
+
+def hash_password(password, salt=None, iterations=HASH_ITERATIONS):
+    # "pbkdf2_sha256$반복횟수$소금$해시" 형태로 저장한다
+    salt = salt or secrets.token_hex(16)
+    digest = hashlib.pbkdf2_hmac('sha256', password.encode('utf-8'), salt.encode('utf-8'), iterations)
+    return f'{HASH_SCHEME}${iterations}${salt}${digest.hex()}'
+
+
+def is_hashed(stored):
+    return stored.startswith(HASH_SCHEME + '$')
+
+
+def check_password(password, stored):
+    if not is_hashed(stored):
+        # 아직 해시로 바꾸지 않은 평문 비밀번호도 비교 시간은 일정하게
+        return hmac.compare_digest(password.encode('utf-8'), stored.encode('utf-8'))
+    try:
+        _, iterations, salt, _ = stored.split('$')
+        iterations = int(iterations)
+    except ValueError:
+        # 잘리거나 망가진 칸은 로그인 페이지를 멈추지 않고 틀린 비밀번호로 친다
+        return False
+    return hmac.compare_digest(hash_password(password, salt, iterations), stored)
+
+
+def _read_rows(path):
+    # 열 이름과 행 목록 (ID, PW, 그리고 선택 열 ROLE 등)
+    with open(path, encoding='utf-8-sig', newline='') as f:
+        reader = csv.DictReader(f)
+        return reader.fieldnames, list(reader)
+
+
+def _write_rows(path, fieldnames, rows):
+    with open(path, 'w', encoding='utf-8-sig', newline='') as f:
+        writer = csv.DictWriter(f, fieldnames=fieldnames, lineterminator='\r\n')
+        writer.writeheader()
+        writer.writerows(rows)
+
+
+def _read_accounts(path):
+    # 아이디 -> 행 전체
+    fieldnames, rows = _read_rows(path)
+    return fieldnames, {row['ID']: row for row in rows}
+
+
+class CredentialStore:
+    # id.csv를 한 번만 읽어 아이디 -> 비밀번호(해시) 사전으로 들고 있다.
+    # 파일의 수정 시각/크기가 바뀌었을 때만 다시 읽는다.
+
+    def __init__(self, path=ID_PATH):
+        self.path = path
+        self._stamp = None
+        self._accounts = {}
+        self._lock = threading.Lock()
+        # 없는 아이디도 같은 시간만큼 해시를 계산해서 아이디 존재 여부가 드러나지 않게
+        self._dummy = hash_password(secrets.token_hex(8))
+
+    def _refresh(self):
+        info = os.stat(self.path)
+        stamp = (info.st_mtime_ns, info.st_size)
+        if stamp == self._stamp:
+            return
+        with self._lock:
+            if stamp != self._stamp:
+                _, self._accounts = _read_accounts(self.path)
+                self._stamp = stamp
+
+    def verify(self, user_id, password):
+        self._refresh()
+        account = self._accounts.get(user_id)
+        if account is None:
+            check_password(password, self._dummy)
+            return False
+        return check_password(password, str(account['PW']))
+
+    def role(self, user_id):
+        # id.csv에 ROLE 열이 있으면 그 값 (teacher 등), 없으면 학생
+        self._refresh()
+        account = self._accounts.get(user_id) or {}
+        return (account.get('ROLE') or 'student').strip()
+
+    def __len__(self):
+        self._refresh()
+        return len(self._accounts)
+
+
+@st.cache_resource(show_spinner=False)
+def load_credential_store(path=ID_PATH):
+    return CredentialStore(path)
+
+
+def hash_id_file(path=ID_PATH):
+    # 평문 비밀번호를 해시로 바꿔서 다시 저장한다 (이미 해시인 행은 그대로).
+    # 행 목록 그대로 다시 쓰므로 아이디가 겹치는 행도 지우지 않는다
+    fieldnames, rows = _read_rows(path)
+    for row in rows:
+        stored = str(row['PW'])
+        row['PW'] = stored if is_hashed(stored) else hash_password(stored)
+    _write_rows(path, fieldnames, rows)
+    return len(rows)
+
+
+def set_role(user_ids, role='teacher', path=ID_PATH):
+    # 계정의 ROLE 열을 바꿔 저장한다 (열이 없으면 새로 만들고, 다른 계정은 비워 둔다 = 학생).
+    # 찾지 못한 아이디 목록을 돌려준다
+    fieldnames, rows = _read_rows(path)
+    if 'ROLE' not in fieldnames:
+        fieldnames = fieldnames + ['ROLE']
+    found = set()
+    for row in rows:
+        if row['ID'] in user_ids:
+            row['ROLE'] = role
+            found.add(row['ID'])
+    _write_rows(path, fieldnames, rows)
+    return [user_id for user_id in user_ids if user_id not in found]
+
+
+if __name__ == '__main__':
+    # 사용법: python -m bikedata.auth [id.csv] [--teacher 아이디 ...]
+    #   --teacher로 준 계정은 ROLE 열을 teacher로 저장한다 (교사용 페이지를 볼 수 있다)
+    parser = argparse.ArgumentParser(description='id.csv 비밀번호를 해시로 바꾸고 교사 계정을 지정한다')
+    parser.add_argument('path', nargs='?', default=ID_PATH)
+    parser.add_argument('--teacher', action='append', default=[], help='교사로 지정할 아이디 (여러 번 가능)')
+    args = parser.parse_args()
+    if args.teacher:
+        missing = set_role(args.teacher, 'teacher', args.path)
+        if missing:
+            sys.exit(f'id.csv에 없는 아이디: {", ".join(missing)}')
+        print(f'{len(args.teacher)}개 계정을 교사로 지정했습니다.')
+    count = hash_id_file(args.path)
+    print(f'{count}개 계정의 비밀번호를 해시로 저장했습니다.')
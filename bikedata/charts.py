@@ -0,0 +1,152 @@
+import numpy as np
+import plotly.graph_objects as go
+import streamlit as st
+
+from bikedata.trips import CHUNK_ROWS, row_chunks, trip_snapshot
+
+# 산점도에 이보다 많은 행이 있으면 브라우저로 전부 보내지 않고 서버에서 줄인다
+SCATTER_MAX_POINTS = 20000
+SCATTER_GRID_BINS = 64
+
+
+def _xy(chunk, x, y):
+    return chunk[x].to_numpy(dtype=float), chunk[y].to_numpy(dtype=float)
+
+
+def _bounds(df, x, y, chunk_rows):
+    # 두 열의 최솟값/최댓값과 결측이 아닌 행 수 (조각씩 훑는다)
+    low = np.array([np.inf, np.inf])
+    high = np.array([-np.inf, -np.inf])
+    valid_rows = 0
+    for chunk in row_chunks(df, chunk_rows):
+        xs, ys = _xy(chunk, x, y)
+        valid = ~(np.isnan(xs) | np.isnan(ys))
+        if valid.any():
+            low = np.minimum(low, [xs[valid].min(), ys[valid].min()])
+            high = np.maximum(high, [xs[valid].max(), ys[valid].max()])
+        valid_rows += int(valid.sum())
+    return low, high, valid_rows
+
+
+def _grid_cells(xs, ys, low, high, bins):
+    # 각 점이 속한 2차원 격자 칸 번호
+    def cell(values, lo, hi):
+        if hi == lo:
+            return np.zeros(len(values), dtype=np.int64)
+        return np.minimum(((values - lo) / (hi - lo) * bins).astype(np.int64), bins - 1)
+    return cell(xs, low[0], high[0]) * bins + cell(ys, low[1], high[1])
+
+
+def stratified_sample(df, x, y, budget, bins=SCATTER_GRID_BINS, seed=0, chunk_rows=CHUNK_ROWS):
+    # 격자 칸마다 같은 할당량(q)까지만 뽑는다. 점이 적은 칸(이상치)은 전부 남고
+    # 빽빽한 칸만 줄어든다. 시드가 고정이라 다시 실행해도 같은 점이 뽑힌다.
+    # 조각씩 처리하므로 메모리에는 조각 하나와 표본 후보(budget 개 정도)만 남는다.
+    low, high, valid_rows = _bounds(df, x, y, chunk_rows)
+
+    def valid_chunks():
+        for start, chunk in zip(range(0, len(df), chunk_rows), row_chunks(df, chunk_rows)):
+            xs, ys = _xy(chunk, x, y)
+            valid = np.flatnonzero(~(np.isnan(xs) | np.isnan(ys)))
+            yield start + valid, _grid_cells(xs[valid], ys[valid], low, high, bins)
+
+    if valid_rows <= budget:
+        return np.concatenate([rows for rows, _ in valid_chunks()] + [np.array([], dtype=np.int64)])
+
+    cell_sizes = np.zeros(bins * bins, dtype=np.int64)
+    for _, cells in valid_chunks():
+        cell_sizes += np.bincount(cells, minlength=bins * bins)
+    cell_sizes = cell_sizes[cell_sizes > 0]
+
+    # sum(min(칸 크기, q)) <= budget 를 만족하는 가장 큰 q (최소 1)
+    lo, hi = 1, int(cell_sizes.max())
+    while lo < hi:
+        mid = (lo + hi + 1) // 2
+        if np.minimum(cell_sizes, mid).sum() <= budget:
+            lo = mid
+        else:
+            hi = mid - 1
+    quota = lo
+
+    # 칸마다 우선순위(난수)가 가장 작은 q개만 후보로 남기며 조각을 넘긴다
+    rng = np.random.default_rng(seed)
+    kept_rows = np.array([], dtype=np.int64)
+    kept_cells = np.array([], dtype=np.int64)
+    kept_priority = np.array([], dtype=float)
+    for rows, cells in valid_chunks():
+        rows = np.concatenate([kept_rows, rows])
+        cells = np.concatenate([kept_cells, cells])
+        priority = np.concatenate([kept_priority, rng.random(len(rows) - len(kept_rows))])
+        order = np.lexsort((priority, cells))
+        sorted_cells = cells[order]
+        rank = np.arange(len(order)) - np.searchsorted(sorted_cells, sorted_cells, side='left')
+        keep = order[rank < quota]
+        kept_rows, kept_cells, kept_priority = rows[keep], cells[keep], priority[keep]
+    return np.sort(kept_rows)
+
+
+def density_grid(df, x, y, bins=80, chunk_rows=CHUNK_ROWS):
+    # 점 대신 칸별 건수만 남긴 2차원 히스토그램
+    low, high, _ = _bounds(df, x, y, chunk_rows)
+    if not np.isfinite(low).all():
+        low, high = np.zeros(2), np.ones(2)
+    value_range = [[low[0], high[0]], [low[1], high[1]]]
+    counts = np.zeros((bins, bins))
+    for chunk in row_chunks(df, chunk_rows):
+        xs, ys = _xy(chunk, x, y)
+        valid = ~(np.isnan(xs) | np.isnan(ys))
+        counts += np.histogram2d(xs[valid], ys[valid], bins=bins, range=value_range)[0]
+    _, x_edges, y_edges = np.histogram2d([], [], bins=bins, range=value_range)
+    return counts, x_edges, y_edges
+
+
+def density_figure(grid, title=None, labels=None):
+    # 칸 수만큼만 전송되므로 행 수와 상관없이 크기가 일정하다
+    counts, x_edges, y_edges = grid
+    labels = labels or {}
+    fig = go.Figure(go.Heatmap(
+        x=(x_edges[:-1] + x_edges[1:]) / 2,
+        y=(y_edges[:-1] + y_edges[1:]) / 2,
+        z=np.where(counts > 0, np.log10(np.maximum(counts, 1)), np.nan).T,
+        customdata=counts.T,
+        hovertemplate='%{x:.0f}, %{y:.0f}<br>건수: %{customdata:,.0f}<extra></extra>',
+        colorscale='Reds',
+        colorbar=dict(title='건수(log10)'),
+    ))
+    fig.update_layout(title=title, xaxis_title=labels.get('x'), yaxis_title=labels.get('y'))
+    return fig
+
+
+def histogram_figure(edges, counts, title=None, labels=None):
+    # 서버에서 센 막대 높이로 px.histogram과 같은 모양을 그린다 (막대 사이 간격 없음)
+    labels = labels or {}
+    fig = go.Figure(go.Bar(
+        x=(edges[:-1] + edges[1:]) / 2,
+        y=counts,
+        width=np.diff(edges),
+        customdata=np.column_stack([edges[:-1], edges[1:]]),
+        hovertemplate=f"{labels.get('x', 'x')}=%{{customdata[0]:g}}-%{{customdata[1]:g}}"
+                      f"<br>{labels.get('y', 'count')}=%{{y:,}}<extra></extra>",
+    ))
+    fig.update_layout(title=title, xaxis_title=labels.get('x'), yaxis_title=labels.get('y'), bargap=0)
+    return fig
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _scatter_sample(version, budget, _df):
+    rows = stratified_sample(_df, '전체_이용_분', '전체_이용_거리', budget)
+    return _df.iloc[rows][['전체_이용_분', '전체_이용_거리']]
+
+
+def load_scatter_sample(budget=SCATTER_MAX_POINTS):
+    snapshot = trip_snapshot()
+    return _scatter_sample(snapshot.version, budget, snapshot.value)
+
+
+@st.cache_resource(show_spinner=False, max_entries=4)
+def _scatter_density(version, bins, _df):
+    return density_grid(_df, '전체_이용_분', '전체_이용_거리', bins)
+
+
+def load_scatter_density(bins=80):
+    snapshot = trip_snapshot()
+    return _scatter_density(snapshot.version, bins, snapshot.value)
@@ -0,0 +1,259 @@
+import contextlib
+import json
+import os
+import shutil
+
+import numpy as np
+import pandas as pd
+
+# 열 단위 디스크 캐시 (열마다 원시 배열 파일 하나, 다음 실행부터는 메모리 매핑으로 읽기).
+# 같은 기계의 서버 프로세스들이 모두 같은 파일을 매핑하므로 운영체제가 페이지를 한 벌만 둔다.
+# DATABIKE_CACHE_DIR=/dev/shm/databike 처럼 두면 디스크 대신 공유 메모리에 올린다.
+CACHE_DIR = os.environ.get('DATABIKE_CACHE_DIR', '.databike_cache')
+
+
+def source_stamp(paths):
+    # 원본 파일의 크기와 수정 시각 - 하나라도 바뀌면 캐시를 다시 만든다
+    stamp = []
+    for path in paths:
+        if not os.path.exists(path):
+            return None
+        info = os.stat(path)
+        stamp.append([os.path.abspath(path), info.st_size, info.st_mtime_ns])
+    return stamp
+
+
+def _code_dtype(count):
+    # pandas가 범주 수에 맞춰 고르는 코드 자료형. 캐시에도 이 자료형으로 써 두어야
+    # from_codes가 코드를 바꿔 복사하지 않고 매핑한 배열을 그대로 감싼다
+    for dtype in (np.int8, np.int16, np.int32):
+        if count < np.iinfo(dtype).max:
+            return np.dtype(dtype)
+    return np.dtype(np.int64)
+
+
+def _frame_dir(name):
+    return os.path.join(CACHE_DIR, name)
+
+
+@contextlib.contextmanager
+def frame_lock(name):
+    # 프로세스 사이 잠금 - 같은 캐시를 여러 워커가 동시에 만들지 않도록
+    os.makedirs(CACHE_DIR, exist_ok=True)
+    with open(_frame_dir(name) + '.lock', 'a+b') as f:
+        if os.name == 'nt':
+            import msvcrt
+
+            while True:
+                try:
+                    # LK_LOCK은 10초 기다리다 포기하므로 될 때까지 다시 건다
+                    msvcrt.locking(f.fileno(), msvcrt.LK_LOCK, 1)
+                    break
+                except OSError:
+                    continue
+            try:
+                yield
+            finally:
+                f.seek(0)
+                msvcrt.locking(f.fileno(), msvcrt.LK_UNLCK, 1)
+        else:
+            import fcntl
+
+            fcntl.flock(f, fcntl.LOCK_EX)
+            try:
+                yield
+            finally:
+                fcntl.flock(f, fcntl.LOCK_UN)
+
+
+class FrameWriter:
+    # 데이터프레임을 조각(chunk)째로 받아 열 파일 끝에 이어 쓴다.
+    # 문자열 열은 전체 조각에 걸친 공통 정수 코드로 바꿔 쓰므로 메모리에는 고유값 목록만 남는다.
+
+    def __init__(self, name):
+        self.target = _frame_dir(name)
+        # 임시 폴더는 프로세스마다 따로 (다른 워커가 쓰던 것을 지우지 않도록)
+        self.tmp = f'{self.target}.tmp-{os.getpid()}'
+        shutil.rmtree(self.tmp, ignore_errors=True)
+        os.makedirs(self.tmp)
+        self.rows = 0
+        self.columns = []
+        self._files = []
+        self._lookups = []
+
+    def append(self, df):
+        if not self.columns:
+            self._open(df)
+        for i, col in enumerate(self.columns):
+            series = df[col['name']]
+            if col['kind'] == 'category':
+                cat = series.astype('category').cat
+                lookup = self._lookups[i]
+                # 이번 조각의 코드 -> 공통 코드 (맨 끝 칸은 결측값 -1 자리)
+                remap = np.array([lookup.setdefault(v, len(lookup)) for v in cat.categories.astype(str)] + [-1],
+                                 dtype=np.int32)
+                values = remap[cat.codes.to_numpy()]
+            else:
+                values = series.to_numpy(dtype=col['dtype'])
+            self._files[i].write(np.ascontiguousarray(values).tobytes())
+        self.rows += len(df)
+
+    def _open(self, df):
+        for i, name in enumerate(df.columns):
+            series = df[name]
+            if isinstance(series.dtype, pd.CategoricalDtype) or not pd.api.types.is_numeric_dtype(series):
+                col = {'name': name, 'kind': 'category', 'dtype': 'int32'}
+            else:
+                col = {'name': name, 'kind': 'numeric', 'dtype': series.dtype.str}
+            self.columns.append(col)
+            self._files.append(open(os.path.join(self.tmp, f'{i}.bin'), 'wb'))
+            self._lookups.append({})
+
+    def commit(self, stamp, version=1, chunk_rows=1_000_000):
+        for f in self._files:
+            f.close()
+        for i, col in enumerate(self.columns):
+            if col['kind'] != 'category':
+                continue
+            # 고유값을 정렬된 순서로 다시 매겨 두면 범주 순서가 한 번에 읽은 것과 같아진다.
+            # 쓰는 동안은 범주 수를 모르므로 int32로 받아 두고, 여기서 범주 수에 맞는 자료형으로 줄여 쓴다
+            names = np.array(list(self._lookups[i]), dtype=str)
+            order = np.argsort(names, kind='stable')
+            dtype = _code_dtype(len(order))
+            rank = np.empty(len(order) + 1, dtype=dtype)
+            rank[order] = np.arange(len(order), dtype=dtype)
+            rank[-1] = -1
+            np.save(os.path.join(self.tmp, f'{i}.cats.npy'), names[order])
+            col['dtype'] = dtype.str
+            if self.rows:
+                path = os.path.join(self.tmp, f'{i}.bin')
+                codes = np.memmap(path, dtype=np.int32, mode='r')
+                with open(path + '.tmp', 'wb') as f:
+                    for start in range(0, self.rows, chunk_rows):
+                        f.write(rank[codes[start:start + chunk_rows]].tobytes())
+                del codes
+                os.replace(path + '.tmp', path)
+
+        with open(os.path.join(self.tmp, 'meta.json'), 'w', encoding='utf-8') as f:
+            json.dump({'version': version, 'stamp': stamp, 'rows': self.rows, 'columns': self.columns},
+                      f, ensure_ascii=False)
+
+        # 다른 프로세스가 반쯤 쓰인 캐시를 읽지 않도록 다 쓴 뒤에 교체
+        shutil.rmtree(self.target, ignore_errors=True)
+        os.replace(self.tmp, self.target)
+
+    def abort(self):
+        for f in self._files:
+            f.close()
+        shutil.rmtree(self.tmp, ignore_errors=True)
+
+
+def save_frame(df, name, stamp, version=1):
+    writer = FrameWriter(name)
+    writer.append(df)
+    writer.commit(stamp, version)
+
+
+def _open_column(path, dtype, rows):
+    if rows == 0:
+        return np.empty(0, dtype=dtype)
+    return np.memmap(path, dtype=dtype, mode='r', shape=(rows,))
+
+
+def load_frame(name, stamp, version=1):
+    target = _frame_dir(name)
+    meta_path = os.path.join(target, 'meta.json')
+    if not os.path.exists(meta_path):
+        return None
+    with open(meta_path, encoding='utf-8') as f:
+        meta = json.load(f)
+    # 만드는 방식이 바뀐 캐시는 버린다
+    if meta.get('version') != version:
+        return None
+    # 원본이 없으면 캐시만으로 서비스, 원본이 있으면 도장이 같아야 사용
+    if stamp is not None and meta['stamp'] != stamp:
+        return None
+
+    data = {}
+    for i, col in enumerate(meta['columns']):
+        values = _open_column(os.path.join(target, f'{i}.bin'), np.dtype(col['dtype']), meta['rows'])
+        if col['kind'] == 'category':
+            cats = np.load(os.path.join(target, f'{i}.cats.npy'))
+            # 문자열 열은 모두 범주형으로 돌려준다 (행마다 파이썬 문자열을 만들지 않도록).
+            # 코드는 직접 쓴 것이라 다시 훑어 검사하지 않는다
+            values = pd.Categorical.from_codes(values, categories=cats.astype(object), validate=False)
+        data[col['name']] = values
+    return pd.DataFrame(data, copy=False)
+
+
+def _write_json(path, value):
+    # 다른 프로세스가 반쯤 쓰인 파일을 읽지 않도록 다 쓴 뒤에 교체
+    with open(path + '.tmp', 'w', encoding='utf-8') as f:
+        json.dump(value, f, ensure_ascii=False)
+    os.replace(path + '.tmp', path)
+
+
+def append_frame(df, name, base_rows, stamp, version=1):
+    # 캐시 끝에 행을 덧붙이고 도장을 바꾼다 (파일을 통째로 다시 쓰지 않는다).
+    # 캐시가 base_rows행일 때만 붙이고, 다른 워커가 같은 행을 이미 붙였으면(도장이 같으면) 그대로 둔다.
+    # 붙인 뒤 매핑한 프레임, 캐시가 다른 것으로 바뀌었으면 None (처음부터 다시 읽어야 한다)
+    target = _frame_dir(name)
+    meta_path = os.path.join(target, 'meta.json')
+    with frame_lock(name):
+        if not os.path.exists(meta_path):
+            return None
+        with open(meta_path, encoding='utf-8') as f:
+            meta = json.load(f)
+        if meta.get('version') != version:
+            return None
+        if meta['stamp'] != stamp:
+            if meta['rows'] != base_rows or list(df.columns) != [col['name'] for col in meta['columns']]:
+                return None
+            columns = []
+            for i, col in enumerate(meta['columns']):
+                series = df[col['name']]
+                cats = None
+                if col['kind'] == 'category':
+                    # 기존 범주 순서는 그대로 두고 새 값만 뒤에 덧붙인다 (이미 매핑한 코드가 그대로 맞다)
+                    cats = np.load(os.path.join(target, f'{i}.cats.npy'))
+                    lookup = {v: code for code, v in enumerate(cats.tolist())}
+                    values = series.astype('category').cat
+                    remap = np.array([lookup.setdefault(v, len(lookup)) for v in values.categories.astype(str)] + [-1])
+                    # 범주가 늘어 코드 자료형이 넓어져야 하면 덧붙일 수 없다 (처음부터 다시 만든다)
+                    if _code_dtype(len(lookup)) != np.dtype(col['dtype']):
+                        return None
+                    values = remap.astype(col['dtype'])[values.codes.to_numpy()]
+                    cats = None if len(lookup) == len(cats) else np.array(list(lookup), dtype=str)
+                else:
+                    values = series.to_numpy(dtype=col['dtype'])
+                columns.append((i, col, values, cats))
+            for i, col, values, cats in columns:
+                if cats is not None:
+                    # 예전 도장을 보는 프로세스에게도 맞도록 범주 목록을 먼저 늘린 뒤 도장을 바꾼다
+                    cats_path = os.path.join(target, f'{i}.cats.npy')
+                    with open(cats_path + '.tmp', 'wb') as f:
+                        np.save(f, cats)
+                    os.replace(cats_path + '.tmp', cats_path)
+                # 앞서 붙이다 멈춘 찌꺼기가 있어도 meta의 행 수 자리부터 덮어쓴다
+                with open(os.path.join(target, f'{i}.bin'), 'r+b') as f:
+                    f.seek(meta['rows'] * np.dtype(col['dtype']).itemsize)
+                    f.write(np.ascontiguousarray(values).tobytes())
+                    f.truncate()
+            meta['rows'] += len(df)
+            meta['stamp'] = stamp
+            _write_json(meta_path, meta)
+    return load_frame(name, stamp, version)
+
+
+def publish_frame(name, stamp, version, build):
+    # 캐시가 있으면 바로 붙고, 없으면 잠금을 잡은 한 프로세스만 build(stamp)로 만들어 올린다.
+    # 기다린 프로세스는 다시 파싱하지 않고 먼저 만든 것을 매핑한다. (원본이 없으면 캐시만 본다)
+    df = load_frame(name, stamp, version)
+    if df is not None or stamp is None:
+        return df
+    with frame_lock(name):
+        df = load_frame(name, stamp, version)
+        if df is None:
+            build(stamp)
+            df = load_frame(name, stamp, version)
+    return df
@@ -0,0 +1,322 @@
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from bikedata import live
+from bikedata.trips import CHUNK_ROWS, load_live_trips, row_chunks, trip_snapshot
+
+HOURS = 24
+# 이용 시간 구간 경계 (분) - 마지막 구간은 끝이 열려 있다
+DURATION_EDGES = np.array([0, 5, 10, 15, 20, 30, 45, 60, 90, 120, 180], dtype=float)
+# 이용 시간 분포 막대 수와 칸 너비로 쓰는 '보기 좋은' 값 (1, 2, 2.5, 5 × 10^k)
+HISTOGRAM_BINS = 30
+NICE_STEPS = np.array([1, 2, 2.5, 5, 10])
+
+
+def _codes_in(series, names):
+    # 조각의 범주 코드를 names 기준 위치로 바꾼다 (조각마다 범주 목록이 달라도 된다)
+    cat = series.astype('category').cat
+    lookup = np.append(names.get_indexer(cat.categories), -1)
+    return lookup[cat.codes.to_numpy()]
+
+
+def _mean(total, rows):
+    # 값이 있는 행이 하나도 없으면 NaN (.mean()과 같다)
+    rows = np.asarray(rows, dtype=float)
+    return np.divide(total, rows, out=np.full(rows.shape, np.nan), where=rows > 0)[()]
+
+
+class TripCube:
+    # (출발_구, 시간대, 이용 시간 구간) 칸마다 행 수, 이용 건수, 이용 분 합, 이동 거리 합을 미리 더해 둔다.
+    # 평균은 .mean()처럼 빈 값을 빼고 내도록 이용 분/거리가 있는 행 수도 따로 센다
+
+    def __init__(self, regions):
+        self.regions = list(regions)
+        self._region_names = pd.Index(self.regions)
+        self._region_index = {name: i for i, name in enumerate(self.regions)}
+        self.shape = (len(self.regions), HOURS, len(DURATION_EDGES))
+        self.rows = np.zeros(self.shape, dtype=np.int64)
+        self.counts = np.zeros(self.shape, dtype=np.int64)
+        self.minutes = np.zeros(self.shape)
+        self.minute_rows = np.zeros(self.shape, dtype=np.int64)
+        self.distance = np.zeros(self.shape)
+        self.distance_rows = np.zeros(self.shape, dtype=np.int64)
+        self.max_minutes = np.full(self.shape, np.nan)
+
+    @classmethod
+    def from_frame(cls, df, chunk_rows=CHUNK_ROWS):
+        cube = cls(df['출발_구'].astype('category').cat.categories)
+        for chunk in row_chunks(df, chunk_rows):
+            cube.add(chunk)
+        return cube
+
+    def add(self, chunk):
+        # 조각 하나를 집계표에 더한다
+        regions = _codes_in(chunk['출발_구'], self._region_names)
+        minutes = chunk['전체_이용_분'].to_numpy(dtype=float)
+        buckets = np.searchsorted(DURATION_EDGES, minutes, side='right') - 1
+        buckets = np.clip(buckets, 0, len(DURATION_EDGES) - 1)
+
+        known = regions >= 0
+        flat = np.ravel_multi_index(
+            (regions[known], chunk['시간대'].to_numpy()[known], buckets[known]), self.shape)
+        minutes = minutes[known]
+        size = int(np.prod(self.shape))
+
+        def total(weights=None):
+            return np.bincount(flat, weights=weights, minlength=size).reshape(self.shape)
+
+        self.rows += total()
+        self.counts += total(chunk['전체_건수'].to_numpy(dtype=float)[known]).round().astype(np.int64)
+        distance = chunk['전체_이용_거리'].to_numpy(dtype=float)[known]
+        self.minutes += total(np.nan_to_num(minutes))
+        self.minute_rows += total(~np.isnan(minutes)).astype(np.int64)
+        self.distance += total(np.nan_to_num(distance))
+        self.distance_rows += total(~np.isnan(distance)).astype(np.int64)
+        chunk_max = pd.Series(minutes).groupby(flat).max()
+        cells = np.unravel_index(chunk_max.index.to_numpy(), self.shape)
+        self.max_minutes[cells] = np.fmax(self.max_minutes[cells], chunk_max.to_numpy())
+
+    def _cells(self, values, region):
+        # 한 구(region)의 (시간대, 구간) 단면 - region이 None이면 모든 구를 더한 값
+        if region is None:
+            return values.sum(axis=0)
+        index = self._region_index.get(region)
+        if index is None:
+            return np.zeros(values.shape[1:], dtype=values.dtype)
+        return values[index]
+
+    def observed_regions(self):
+        rows = self.rows.sum(axis=(1, 2))
+        return [name for name, n in zip(self.regions, rows) if n > 0]
+
+    def hourly(self, region=None):
+        # 시간대별 이용 건수 합 - 데이터가 있는 시간대만
+        rows = self._cells(self.rows, region).sum(axis=1)
+        counts = self._cells(self.counts, region).sum(axis=1)
+        hours = np.flatnonzero(rows)
+        return pd.DataFrame({'시간대': hours, '전체_건수': counts[hours]})
+
+    def hourly_mean_minutes(self, region=None):
+        rows = self._cells(self.rows, region).sum(axis=1)
+        minutes = self._cells(self.minutes, region).sum(axis=1)
+        minute_rows = self._cells(self.minute_rows, region).sum(axis=1)
+        hours = np.flatnonzero(rows)
+        return pd.DataFrame({'시간대': hours, '전체_이용_분': _mean(minutes[hours], minute_rows[hours])})
+
+    def summary(self, region=None):
+        # st.metric 카드에 쓰는 값들
+        rows = int(self._cells(self.rows, region).sum())
+        if rows == 0:
+            return {'rows': 0, 'count': 0, 'mean_minutes': np.nan,
+                    'mean_distance': np.nan, 'max_minutes': np.nan}
+        return {
+            'rows': rows,
+            'count': int(self._cells(self.counts, region).sum()),
+            'mean_minutes': _mean(self._cells(self.minutes, region).sum(), self._cells(self.minute_rows, region).sum()),
+            'mean_distance': _mean(self._cells(self.distance, region).sum(),
+                                   self._cells(self.distance_rows, region).sum()),
+            'max_minutes': np.nanmax(self._cells_max(region)),
+        }
+
+    def _cells_max(self, region):
+        if region is None:
+            return self.max_minutes
+        return self.max_minutes[self._region_index[region]]
+
+
+class DurationIndex:
+    # 서로 다른 이용 시간 값마다 "이 값 이상"인 행들의 시간대별/구별 합을
+    # 뒤에서부터 누적해 둔다. 어떤 기준값이든 searchsorted 한 번과 배열 한 줄 읽기로 끝난다.
+    # 이용 시간은 분 단위라 서로 다른 값이 많지 않으므로 행 수와 상관없이 표가 작다.
+
+    TOP_ROWS = 100
+
+    def __init__(self, df, chunk_rows=CHUNK_ROWS):
+        self.total_rows = len(df)
+        self.regions = pd.Index(df['출발_구'].astype('category').cat.categories, name='출발_구')
+
+        # 1차: 서로 다른 이용 시간 값 모으기
+        self.values = np.array([], dtype=float)
+        for chunk in row_chunks(df, chunk_rows):
+            minutes = chunk['전체_이용_분'].to_numpy(dtype=float)
+            self.values = np.union1d(self.values, np.unique(minutes[~np.isnan(minutes)]))
+
+        # 2차: (이용 시간 값, 시간대) / (이용 시간 값, 구) 표에 조각씩 더하기
+        width = len(self.values)
+        hour_rows = np.zeros(width * HOURS)
+        hour_counts = np.zeros(width * HOURS)
+        region_rows = np.zeros(width * len(self.regions))
+        region_counts = np.zeros(width * len(self.regions))
+        top_rows = np.array([], dtype=np.int64)
+        top_minutes = np.array([], dtype=float)
+
+        for start, chunk in zip(range(0, len(df), chunk_rows), row_chunks(df, chunk_rows)):
+            minutes = chunk['전체_이용_분'].to_numpy(dtype=float)
+
+            # 가장 긴 이용 후보: 내림차순, 같은 값은 원래 순서 (df.nlargest(keep='first')와 같은 순서)
+            rows = np.concatenate([top_rows, start + np.arange(len(chunk))])
+            values = np.concatenate([top_minutes, minutes])
+            best = np.lexsort((rows, -values))[:self.TOP_ROWS]
+            top_rows, top_minutes = rows[best], values[best]
+
+            valid = ~np.isnan(minutes)
+            position = np.searchsorted(self.values, minutes[valid])
+            counts = chunk['전체_건수'].to_numpy(dtype=float)[valid]
+            hours = chunk['시간대'].to_numpy()[valid].astype(np.int64)
+            regions = _codes_in(chunk['출발_구'], self.regions)[valid].astype(np.int64)
+            hour_keys = position * HOURS + hours
+            region_keys = (position * len(self.regions) + regions)[regions >= 0]
+            hour_rows += np.bincount(hour_keys, minlength=len(hour_rows))
+            hour_counts += np.bincount(hour_keys, weights=counts, minlength=len(hour_counts))
+            region_rows += np.bincount(region_keys, minlength=len(region_rows))
+            region_counts += np.bincount(region_keys, weights=counts[regions >= 0], minlength=len(region_counts))
+
+        self.top_rows = top_rows
+
+        def suffix(table, columns):
+            table = table.reshape(width, columns).round().astype(np.int64)
+            # 마지막 줄(0)은 모든 값보다 큰 기준값을 위한 자리
+            table = np.vstack([table, np.zeros((1, columns), dtype=np.int64)])
+            return np.cumsum(table[::-1], axis=0)[::-1]
+
+        self.hour_rows = suffix(hour_rows, HOURS)
+        self.hour_counts = suffix(hour_counts, HOURS)
+        self.region_rows = suffix(region_rows, len(self.regions))
+        self.region_counts = suffix(region_counts, len(self.regions))
+
+    def _position(self, threshold):
+        return np.searchsorted(self.values, threshold, side='left')
+
+    def longest(self, df, n=10):
+        return df.iloc[self.top_rows[:n]]
+
+    def share_at_least(self, threshold):
+        # threshold 분 이상인 행의 비율 (0~1)
+        return self.hour_rows[self._position(threshold)].sum() / self.total_rows
+
+    def hourly_at_least(self, threshold):
+        k = self._position(threshold)
+        hours = np.flatnonzero(self.hour_rows[k])
+        return pd.DataFrame({'시간대': hours, '전체_건수': self.hour_counts[k][hours]})
+
+    def regions_at_least(self, threshold):
+        k = self._position(threshold)
+        present = self.region_rows[k] > 0
+        return pd.Series(self.region_counts[k][present], index=self.regions[present], name='전체_건수')
+
+
+def nice_edges(low, high, bins=HISTOGRAM_BINS):
+    # [low, high]를 정확히 bins칸으로 덮는 경계 - 너비는 보기 좋은 값, 시작은 그 배수
+    if not np.isfinite(low) or not np.isfinite(high):
+        return np.full(bins + 1, np.nan)
+    raw = max(high - low, 1) / bins
+    magnitude = 10 ** np.floor(np.log10(raw))
+    widths = np.concatenate([NICE_STEPS, NICE_STEPS * 10]) * magnitude
+    for width in widths[widths >= raw]:
+        start = np.floor(low / width) * width
+        if start + bins * width > high:
+            return start + width * np.arange(bins + 1)
+    return start + width * np.arange(bins + 1)
+
+
+class DurationHistogram:
+    # 출발 구마다 이용 시간(분)을 HISTOGRAM_BINS칸으로 센 도수분포.
+    # 칸 경계는 처음 만들 때 그 구의 최솟값/최댓값으로 정해 두므로 다시 그려도 막대가 흔들리지 않고,
+    # 브라우저에는 원본 행 대신 막대 높이만 간다.
+
+    def __init__(self, df, bins=HISTOGRAM_BINS, chunk_rows=CHUNK_ROWS):
+        self.bins = bins
+        self.regions = pd.Index(df['출발_구'].astype('category').cat.categories, name='출발_구')
+        self._region_index = {name: i for i, name in enumerate(self.regions)}
+
+        # 1차: 구별 최솟값/최댓값
+        low = np.full(len(self.regions), np.inf)
+        high = np.full(len(self.regions), -np.inf)
+        for chunk in row_chunks(df, chunk_rows):
+            codes, minutes = self._valid(chunk)
+            np.minimum.at(low, codes, minutes)
+            np.maximum.at(high, codes, minutes)
+        self.edges = np.array([nice_edges(lo, hi, bins) for lo, hi in zip(low, high)]).reshape(-1, bins + 1)
+
+        # 2차: 칸마다 행 수
+        self.counts = np.zeros((len(self.regions), bins), dtype=np.int64)
+        for chunk in row_chunks(df, chunk_rows):
+            self.add(chunk)
+
+    def _valid(self, chunk):
+        codes = _codes_in(chunk['출발_구'], self.regions).astype(np.int64)
+        minutes = chunk['전체_이용_분'].to_numpy(dtype=float)
+        valid = (codes >= 0) & ~np.isnan(minutes)
+        return codes[valid], minutes[valid]
+
+    def covers(self, rows):
+        # 새 행이 모두 이미 정한 칸 안에 들어가는지 (아니면 경계부터 다시 정해야 한다)
+        if not set(rows['출발_구'].dropna().unique()) <= set(self.regions):
+            return False
+        codes, minutes = self._valid(rows)
+        edges = self.edges[codes]
+        return bool(np.all((minutes >= edges[:, 0]) & (minutes <= edges[:, -1])))
+
+    def add(self, chunk):
+        codes, minutes = self._valid(chunk)
+        start = self.edges[codes, 0]
+        width = self.edges[codes, 1] - start
+        # 마지막 칸은 오른쪽 끝을 포함한다 (np.histogram과 같음)
+        position = np.clip(np.floor((minutes - start) / width), 0, self.bins - 1).astype(np.int64)
+        self.counts += np.bincount(codes * self.bins + position,
+                                   minlength=self.counts.size).reshape(self.counts.shape)
+
+    def region(self, region):
+        # (경계 bins+1개, 행 수 bins개)
+        i = self._region_index[region]
+        return self.edges[i], self.counts[i]
+
+
+def _add_rows(cube, rows):
+    # 처음 보는 출발 구가 있으면 칸을 새로 잡아야 하므로 None (처음부터 다시 만든다)
+    if not set(rows['출발_구'].dropna().unique()) <= set(cube.regions):
+        return None
+    for chunk in row_chunks(rows):
+        cube.add(chunk)
+    return cube
+
+
+@st.cache_resource(show_spinner='집계표를 만드는 중...')
+def _trip_cube():
+    return live.Derived(load_live_trips(), TripCube.from_frame, _add_rows)
+
+
+def load_trip_cube():
+    # 새로 붙은 행만 더해서 따라잡는다
+    return _trip_cube().get()
+
+
+@st.cache_resource(show_spinner='이용 시간 색인을 만드는 중...', max_entries=1)
+def _duration_index(version, _trips):
+    return DurationIndex(_trips)
+
+
+def load_duration_index(snapshot=None):
+    # 정렬 색인은 덧붙이기가 안 되므로 자료가 바뀌면 새로 만든다.
+    # longest()에 넘길 프레임과 같은 스냅샷으로 부르면 색인의 행 위치가 그 프레임과 맞는다
+    snapshot = snapshot or trip_snapshot()
+    return _duration_index(snapshot.version, snapshot.value)
+
+
+def _add_histogram_rows(histogram, rows):
+    # 정해 둔 칸 밖의 값이나 처음 보는 구가 오면 None (경계부터 다시 정한다)
+    if not histogram.covers(rows):
+        return None
+    for chunk in row_chunks(rows):
+        histogram.add(chunk)
+    return histogram
+
+
+@st.cache_resource(show_spinner='이용 시간 분포를 세는 중...')
+def _duration_histogram():
+    return live.Derived(load_live_trips(), DurationHistogram, _add_histogram_rows)
+
+
+def load_duration_histogram():
+    return _duration_histogram().get()
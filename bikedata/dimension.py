@@ -0,0 +1,94 @@
+import os
+
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+STATION_PATH = 'bikelocation.csv'
+# 서울 자치구 - 순서대로 seoul.csv의 자치구_ID (11010 종로구 ... 11250 강동구)
+SEOUL_DISTRICTS = ['종로구', '중구', '용산구', '성동구', '광진구', '동대문구', '중랑구', '성북구', '강북구',
+                   '도봉구', '노원구', '은평구', '서대문구', '마포구', '양천구', '강서구', '구로구', '금천구',
+                   '영등포구', '동작구', '관악구', '서초구', '강남구', '송파구', '강동구']
+UNKNOWN_DISTRICT = '알수없음'
+# 자치구 위치(0~24) -> 자치구_ID, 맨 끝 칸(25)은 알 수 없는 대여소 몫 0
+DISTRICT_IDS = np.append(11010 + 10 * np.arange(len(SEOUL_DISTRICTS)), 0).astype(np.int32)
+DISTRICT_NAMES = pd.Index(SEOUL_DISTRICTS + [UNKNOWN_DISTRICT])
+UNKNOWN = len(SEOUL_DISTRICTS)
+
+# 주소1의 띄어 쓴 낱말 중 자치구 이름 ('서울특별시 양천구 ...', '서울 강동구 ...')
+ADDRESS_PATTERN = r'(?:^|\s)(' + '|'.join(SEOUL_DISTRICTS) + r')(?=\s|$)'
+
+
+def district_from_name(name):
+    # 대여소 이름 '구_장소'의 앞부분이 자치구 이름이면 그 구 (차원표에 없는 대여소만 이것으로 짐작한다)
+    guess = name.split('_')[0].strip() if isinstance(name, str) else ''
+    return guess if guess in SEOUL_DISTRICTS else UNKNOWN_DISTRICT
+
+
+class StationDistricts:
+    # 대여소 -> 자치구 차원표. 대여소 수천 개의 주소를 한 번만 읽어 두고,
+    # 이용 데이터에는 대여소 ID 범주 코드 -> 자치구 위치 정수 배열 한 번으로 붙인다.
+
+    def __init__(self, stations):
+        ids = stations['대여소_ID'].astype(str).to_numpy()
+        address = stations['주소1'].astype(str)
+        found = address.str.extract(ADDRESS_PATTERN, expand=False)
+        position = DISTRICT_NAMES.get_indexer(found.fillna(UNKNOWN_DISTRICT))
+
+        # 주소에 구가 빠진 대여소('서울특별시 진관동 ...')는 좌표가 가장 가까운 대여소의 구를 따른다
+        # (서울 밖 경기/인천 대여소는 알 수 없음으로 둔다)
+        lat = stations['위도'].to_numpy(dtype=float)
+        lon = stations['경도'].to_numpy(dtype=float)
+        placed = ((lat != 0) & (lon != 0) & ~np.isnan(lat) & ~np.isnan(lon)
+                  & ~address.str.match(r'(경기|인천)').to_numpy())
+        known = np.flatnonzero(placed & (position != UNKNOWN))
+        guess = np.flatnonzero(placed & (position == UNKNOWN))
+        if len(known) and len(guess):
+            scale = np.cos(np.radians(lat[known].mean()))
+            distance = ((lat[guess, None] - lat[known]) ** 2
+                        + ((lon[guess, None] - lon[known]) * scale) ** 2)
+            position[guess] = position[known[distance.argmin(axis=1)]]
+
+        self.ids = pd.Index(ids, name='대여소_ID')
+        self.positions = position.astype(np.int64)
+
+    @property
+    def frame(self):
+        # 대여소_ID 색인, 자치구_ID(정수)와 자치구_명칭
+        return pd.DataFrame({'자치구_ID': DISTRICT_IDS[self.positions],
+                             '자치구_명칭': DISTRICT_NAMES[self.positions]}, index=self.ids)
+
+    def lookup(self, station_ids, station_names=None):
+        # 행마다 자치구 위치 (0~24, 모르면 UNKNOWN) - 문자열은 고유값(범주)에만 만진다
+        cat = station_ids.astype('category').cat
+        # 차원표에 없는 대여소와 결측값은 -1 -> 맨 끝에 덧붙인 UNKNOWN 칸 (대여소 표가 비어 있어도 된다)
+        table = np.append(self.ids.get_indexer(cat.categories.astype(str)), -1)
+        table = np.append(self.positions, UNKNOWN)[table]
+        position = table[cat.codes.to_numpy()]
+
+        # 차원표에 없는 대여소는 이름 앞부분이 자치구 이름일 때만 그것을 쓴다
+        missing = position == UNKNOWN
+        if station_names is not None and missing.any():
+            names = station_names.astype('category').cat
+            guessed = np.append(DISTRICT_NAMES.get_indexer([district_from_name(name) for name in names.categories]),
+                                UNKNOWN)
+            position[missing] = guessed[names.codes.to_numpy()[missing]]
+        return position
+
+
+def read_station_districts(path=STATION_PATH):
+    if not os.path.exists(path):
+        # 대여소 표가 없으면 이름으로만 짐작한다
+        return StationDistricts(pd.DataFrame({'대여소_ID': [], '주소1': [], '위도': [], '경도': []}))
+    return StationDistricts(pd.read_csv(path, encoding='cp949'))
+
+
+@st.cache_resource(show_spinner=False)
+def _station_districts(path, mtime):
+    return read_station_districts(path)
+
+
+def load_station_districts(path=STATION_PATH):
+    # 대여소 표가 바뀌면 (수정 시각) 다시 만든다
+    mtime = os.path.getmtime(path) if os.path.exists(path) else None
+    return _station_districts(path, mtime)
@@ -0,0 +1,97 @@
+import glob
+import io
+
+import pandas as pd
+import streamlit as st
+
+from bikedata import columnar, live
+
+# 매일 새로 받은 자치구 현황(seoul_20240101.csv 등)을 같은 폴더에 두면 모두 이어서 읽는다
+DISTRICT_PATTERN = 'seoul*.csv'
+METRICS = ['대여_건수', '반납_건수']
+DISTRICT_CACHE_VERSION = 2
+
+
+class DistrictSummary:
+    # 자치구마다 가장 최근 값 한 줄씩 (자치구_명칭이 색인), 비율과 합계는 미리 계산해 둔다
+
+    def __init__(self, df, stamp=None):
+        latest = df.drop_duplicates(subset='자치구_명칭', keep='last')
+        self.frame = latest.set_index('자치구_명칭')
+        self.totals = {metric: int(self.frame[metric].sum()) for metric in METRICS}
+        for metric in METRICS:
+            self.frame[metric.replace('건수', '비율')] = self.frame[metric] / self.totals[metric] * 100
+        # 자치구마다 지금까지 받은 행 수 (며칠 치가 쌓였는지)
+        self.counts = df.groupby('자치구_명칭').size()
+        self.snapshots = int(self.counts.max()) if len(self.counts) else 0
+        # 처음 읽은 원본 도장 + 지금까지 받은 행 수 - 그림 캐시 키 등에 쓴다
+        self.stamp = stamp
+        self.rows = int(self.counts.sum())
+
+    @property
+    def version(self):
+        return (self.stamp, self.rows)
+
+    def merge(self, rows):
+        # 새로 받은 행을 합친 새 요약 (자치구마다 최신 값 한 줄만 있으면 되므로 원본 전체는 다시 읽지 않는다)
+        latest = self.frame[['자치구_ID'] + METRICS].reset_index()
+        merged = DistrictSummary(pd.concat([latest, rows], ignore_index=True), self.stamp)
+        merged.counts = self.counts.add(rows.groupby('자치구_명칭').size(), fill_value=0).astype(int)
+        merged.snapshots = int(merged.counts.max())
+        merged.rows = int(merged.counts.sum())
+        return merged
+
+    @property
+    def names(self):
+        return list(self.frame.index)
+
+    def compare(self, names):
+        # 선택한 자치구만 (원래 표 순서대로) - 자치구_명칭을 열로 돌려준다
+        wanted = set(names)
+        rows = [name for name in self.frame.index if name in wanted]
+        return self.frame.loc[rows].reset_index()
+
+    def total(self, metric, names=None):
+        if names is None:
+            return self.totals[metric]
+        return int(self.frame.loc[list(names), metric].sum())
+
+
+def district_files(pattern=DISTRICT_PATTERN):
+    return sorted(glob.glob(pattern))
+
+
+def read_district_csv(paths):
+    return pd.concat([pd.read_csv(path, encoding='cp949') for path in paths], ignore_index=True)
+
+
+def attach_districts(paths):
+    # 공유 캐시의 자치구 원본 행 (없으면 한 프로세스만 읽어 올린다)
+    stamp = columnar.source_stamp(paths) if paths else None
+    df = columnar.publish_frame(
+        'districts', stamp, DISTRICT_CACHE_VERSION,
+        lambda stamp: columnar.save_frame(read_district_csv(paths), 'districts', stamp, DISTRICT_CACHE_VERSION))
+    if df is None:
+        raise FileNotFoundError(DISTRICT_PATTERN)
+    return df
+
+
+def _load_summary(paths):
+    stamp = tuple(tuple(item) for item in columnar.source_stamp(paths) or [])
+    return DistrictSummary(attach_districts(paths), stamp)
+
+
+# 원본 끝에 하루치가 덧붙으면 그 줄만 읽어 합친 새 요약으로 바꿔 끼운다
+@st.cache_resource(show_spinner=False)
+def _live_districts(pattern):
+    return live.LiveSource(pattern, _load_summary,
+                           lambda raw: pd.read_csv(io.BytesIO(raw), encoding='cp949'),
+                           lambda summary, rows, stamp: summary.merge(rows))
+
+
+def load_live_districts(pattern=DISTRICT_PATTERN):
+    return _live_districts(pattern)
+
+
+def load_district_summary(pattern=DISTRICT_PATTERN):
+    return load_live_districts(pattern).snapshot.value
@@ -0,0 +1,48 @@
+import threading
+from collections import OrderedDict
+
+import streamlit as st
+
+FIGURE_CACHE_SIZE = 256
+
+
+class FigureCache:
+    # (페이지, 차트 이름, 입력값) -> 완성된 그림. 가장 오래 안 쓴 것부터 버린다(LRU).
+    # 그림은 여러 세션이 같이 쓰므로 꺼낸 뒤에 고치면 안 된다.
+
+    def __init__(self, max_entries=FIGURE_CACHE_SIZE):
+        self.max_entries = max_entries
+        self._entries = OrderedDict()
+        self._lock = threading.Lock()
+        self.hits = 0
+        self.misses = 0
+
+    def get(self, key, build):
+        with self._lock:
+            figure = self._entries.get(key)
+            if figure is not None:
+                self._entries.move_to_end(key)
+                self.hits += 1
+                return figure
+        # 만드는 동안에는 잠그지 않는다 (같은 그림을 두 번 만들 수는 있지만 결과는 같다)
+        figure = build()
+        with self._lock:
+            self.misses += 1
+            self._entries[key] = figure
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+        return figure
+
+    def __len__(self):
+        return len(self._entries)
+
+
+@st.cache_resource(show_spinner=False)
+def load_figure_cache():
+    return FigureCache()
+
+
+def cached_figure(page, chart_id, params, build):
+    # 예: cached_figure('week1', 'district_pie', (metric_choice,), lambda: px.pie(...))
+    return load_figure_cache().get((page, chart_id, params), build)
@@ -0,0 +1,140 @@
+import folium
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from bikedata import live
+from bikedata.od import top_k
+from bikedata.stations import SEOUL_CENTER, load_stations
+from bikedata.trips import CHUNK_ROWS, load_live_trips, row_chunks, trip_snapshot
+
+HOURS = 24
+# 지도에는 쏠림이 큰 대여소 몇 곳만 올린다 (전부 올리면 HTML이 커진다)
+MAP_STATIONS = 200
+DRAIN_COLOR = '#FF6B6B'
+FILL_COLOR = '#4A90E2'
+
+
+class NetFlow:
+    # 대여소 x 시간대(0~23시) 대여/반납 건수 표 (빽빽한 배열).
+    # 대여는 출발 시간대에, 반납은 출발 시각 + 평균 이용 시간이 지난 시간대에 더한다.
+    # 순유입 = 반납 - 대여 (음수면 자전거가 빠져나가는 대여소)
+
+    def __init__(self, df, chunk_rows=CHUNK_ROWS):
+        self.stations = pd.Index(df['시작_대여소_ID'].cat.categories).union(
+            pd.Index(df['종료_대여소_ID'].cat.categories))
+        self.rentals = np.zeros((len(self.stations), HOURS))
+        self.returns = np.zeros((len(self.stations), HOURS))
+        self.dates = np.array([], dtype=np.int64)
+        self.add(df, chunk_rows)
+
+    def _station_rows(self, series):
+        # 범주 코드 -> 대여소 줄 번호 (맨 끝 칸은 결측값 -1 자리)
+        return np.append(self.stations.get_indexer(series.cat.categories), -1)
+
+    def covers(self, rows):
+        # 처음 보는 대여소가 있으면 줄을 새로 잡아야 한다
+        for column in ('시작_대여소_ID', '종료_대여소_ID'):
+            codes = rows[column].cat.codes.to_numpy()
+            if (self._station_rows(rows[column])[codes[codes >= 0]] < 0).any():
+                return False
+        return True
+
+    def add(self, df, chunk_rows=CHUNK_ROWS):
+        # 범주 -> 대여소 줄 번호 표는 프레임에 한 번만 만들고 조각마다 정수 배열만 읽는다
+        start_lookup = self._station_rows(df['시작_대여소_ID'])
+        end_lookup = self._station_rows(df['종료_대여소_ID'])
+        size = self.rentals.size
+        for chunk in row_chunks(df, chunk_rows):
+            counts = chunk['전체_건수'].to_numpy(dtype=float)
+            base = chunk['기준_시간대'].to_numpy().astype(np.int64)
+            start_minute = base // 100 * 60 + base % 100
+            # 전체_이용_분은 묶인 건수만큼의 합이므로 한 건 평균으로 반납 시각을 잡는다
+            ride = np.nan_to_num(chunk['전체_이용_분'].to_numpy(dtype=float) / np.maximum(counts, 1))
+            end_hour = ((start_minute + ride) // 60).astype(np.int64) % HOURS
+
+            start = start_lookup[chunk['시작_대여소_ID'].cat.codes.to_numpy()]
+            end = end_lookup[chunk['종료_대여소_ID'].cat.codes.to_numpy()]
+            known = start >= 0
+            self.rentals += np.bincount(start[known] * HOURS + start_minute[known] // 60 % HOURS,
+                                        weights=counts[known], minlength=size).reshape(self.rentals.shape)
+            known = end >= 0
+            self.returns += np.bincount(end[known] * HOURS + end_hour[known],
+                                        weights=counts[known], minlength=size).reshape(self.returns.shape)
+            self.dates = np.union1d(self.dates, np.unique(chunk['기준_날짜'].to_numpy()))
+
+    @property
+    def days(self):
+        return max(len(self.dates), 1)
+
+    @property
+    def net(self):
+        # 하루 평균 순유입 (대여소 x 시간대)
+        return (self.returns - self.rentals) / self.days
+
+    def imbalance(self, hours=None):
+        # 시간대 구간(range 등) 동안의 하루 평균 대여/반납/순유입 - 대여소_ID 색인
+        hours = np.arange(HOURS) if hours is None else np.asarray(hours)
+        rentals = self.rentals[:, hours].sum(axis=1) / self.days
+        returns = self.returns[:, hours].sum(axis=1) / self.days
+        return pd.DataFrame({'대여_건수': rentals, '반납_건수': returns, '순유입': returns - rentals},
+                            index=self.stations.rename('대여소_ID'))
+
+    def top_imbalance(self, k=10, hours=None, direction=None):
+        # direction: 'drain'(빠져나감), 'fill'(쌓임), None(둘 다, 크기순)
+        table = self.imbalance(hours)
+        score = {'drain': -table['순유입'], 'fill': table['순유입']}.get(direction, table['순유입'].abs())
+        picked = top_k(score.to_numpy(), k)
+        picked = picked[score.to_numpy()[picked] > 0]
+        return table.iloc[picked].reset_index()
+
+    def inventory(self, station_ids):
+        # 0시 재고를 0으로 둔 하루 평균 누적 재고 변화 (시간대 x 대여소) - 낮에 얼마나 비고 차는지
+        rows = self.stations.get_indexer(station_ids)
+        rows = rows[rows >= 0]
+        curves = np.cumsum(self.net[rows], axis=1).T
+        return pd.DataFrame(curves, index=pd.RangeIndex(HOURS, name='시간대'), columns=self.stations[rows])
+
+
+def _add_rows(flow, rows):
+    if not flow.covers(rows):
+        return None
+    flow.add(rows)
+    return flow
+
+
+@st.cache_resource(show_spinner='대여소별 순유입을 계산하는 중...')
+def _net_flow():
+    return live.Derived(load_live_trips(), NetFlow, _add_rows)
+
+
+def load_net_flow():
+    # 새로 붙은 행만 더해서 따라잡는다
+    return _net_flow().get()
+
+
+def load_net_flow_map_html(hours=None):
+    hours = tuple(range(HOURS)) if hours is None else tuple(hours)
+    return _net_flow_map_html(trip_snapshot().version, hours)
+
+
+@st.cache_resource(show_spinner='순유입 지도를 그리는 중...', max_entries=16)
+def _net_flow_map_html(version, hours):
+    # 빠져나가는 대여소는 빨강, 쌓이는 대여소는 파랑, 크기는 하루 평균 순유입
+    table = load_net_flow().top_imbalance(MAP_STATIONS, hours)
+    coords = load_stations().set_index('대여소_ID')[['위도', '경도']]
+    table = table.join(coords, on='대여소_ID').dropna(subset=['위도', '경도'])
+
+    m = folium.Map(location=SEOUL_CENTER, zoom_start=11, tiles='cartodbpositron')
+    if not table.empty:
+        largest = table['순유입'].abs().max()
+        for station in table.itertuples(index=False):
+            color = DRAIN_COLOR if station.순유입 < 0 else FILL_COLOR
+            folium.CircleMarker(
+                location=[station.위도, station.경도],
+                radius=3 + 12 * np.sqrt(abs(station.순유입) / largest),
+                color=color, fill=True, fill_opacity=0.6, weight=1,
+                tooltip=f'{station.대여소_ID} · 대여 {station.대여_건수:.1f} / 반납 {station.반납_건수:.1f} '
+                        f'(하루 평균 {station.순유입:+.1f}대)',
+            ).add_to(m)
+    return m.get_root().render()
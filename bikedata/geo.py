@@ -0,0 +1,108 @@
+import numpy as np
+import streamlit as st
+
+from bikedata.stations import load_stations
+
+EARTH_RADIUS_M = 6_371_008.8
+METERS_PER_DEGREE = 111_320.0
+# 격자 한 칸의 크기 (m) - 반경 질의가 보통 수백 m이므로 그 정도로 잡는다
+CELL_METERS = 500.0
+
+
+def haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = (np.sin((lat2 - lat1) / 2) ** 2
+         + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2)
+    return 2 * EARTH_RADIUS_M * np.arcsin(np.sqrt(a))
+
+
+class StationIndex:
+    # 대여소를 평면 근사 좌표의 격자 칸에 나눠 담는다 (칸 번호로 정렬 + 칸마다 시작 위치).
+    # 질의는 원이 걸치는 칸들만 후보로 꺼낸 뒤 하버사인 거리로 정확히 거른다.
+
+    def __init__(self, stations, cell_meters=CELL_METERS):
+        self.stations = stations.reset_index(drop=True)
+        self.cell = cell_meters
+        self.lat = self.stations['위도'].to_numpy(dtype=float)
+        self.lon = self.stations['경도'].to_numpy(dtype=float)
+        self.origin = (self.lat.min(), self.lon.min())
+        self.lon_scale = np.cos(np.radians(self.lat.mean()))
+
+        ix, iy = self._cells(self.lat, self.lon)
+        self.width = int(iy.max()) + 3
+        keys = ix * self.width + iy
+        self.order = np.argsort(keys, kind='stable')
+        sorted_keys = keys[self.order]
+        self.keys, self.starts = np.unique(sorted_keys, return_index=True)
+        self.ends = np.append(self.starts[1:], len(sorted_keys))
+        self.max_ix = int(ix.max())
+
+    def _xy(self, lat, lon):
+        # 원점 기준 동서(x)/남북(y) 거리 (m, 서울 정도 넓이에서는 충분히 정확)
+        y = (np.asarray(lat) - self.origin[0]) * METERS_PER_DEGREE
+        x = (np.asarray(lon) - self.origin[1]) * METERS_PER_DEGREE * self.lon_scale
+        return x, y
+
+    def _cells(self, lat, lon):
+        x, y = self._xy(lat, lon)
+        return np.floor(x / self.cell).astype(np.int64) + 1, np.floor(y / self.cell).astype(np.int64) + 1
+
+    def _candidates(self, lat, lon, radius_m):
+        x, y = self._xy(lat, lon)
+        # 평면 근사 오차를 감안해 한 칸씩 여유를 둔다
+        low_x = max(int(np.floor((x - radius_m) / self.cell)), -1)
+        high_x = min(int(np.floor((x + radius_m) / self.cell)) + 2, self.max_ix)
+        low_y = max(int(np.floor((y - radius_m) / self.cell)), -1)
+        high_y = min(int(np.floor((y + radius_m) / self.cell)) + 2, self.width - 1)
+        if low_x > high_x or low_y > high_y:
+            return np.array([], dtype=np.int64)
+        ix = np.arange(low_x, high_x + 1)
+        iy = np.arange(low_y, high_y + 1)
+        wanted = (ix[:, None] * self.width + iy[None, :]).ravel()
+        found = np.searchsorted(self.keys, wanted)
+        found = found[(found < len(self.keys)) & (self.keys[np.minimum(found, len(self.keys) - 1)] == wanted)]
+        if len(found) == 0:
+            return np.array([], dtype=np.int64)
+        starts, ends = self.starts[found], self.ends[found]
+        # 칸마다 [start, end) 구간을 한 번에 펼친다
+        lengths = ends - starts
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        return self.order[np.arange(lengths.sum()) + offsets]
+
+    def query_radius(self, lat, lon, radius_m):
+        # (lat, lon)에서 radius_m 안에 있는 대여소 순번과 거리(m) - 가까운 순
+        rows = self._candidates(lat, lon, radius_m)
+        distance = haversine_m(lat, lon, self.lat[rows], self.lon[rows])
+        inside = distance <= radius_m
+        rows, distance = rows[inside], distance[inside]
+        order = np.argsort(distance, kind='stable')
+        return rows[order], distance[order]
+
+    def query_nearest(self, lat, lon, k=5):
+        # 가장 가까운 k개 - 반경을 두 배씩 넓혀 가며 후보가 k개 이상이 될 때까지 찾는다
+        k = min(k, len(self.stations))
+        radius = self.cell
+        while True:
+            rows = self._candidates(lat, lon, radius)
+            distance = haversine_m(lat, lon, self.lat[rows], self.lon[rows])
+            # 반경 안에 k개가 있어야 반경 밖의 더 가까운 대여소가 없다고 확신할 수 있다
+            if (distance <= radius).sum() >= k or len(rows) == len(self.stations):
+                order = np.argsort(distance, kind='stable')[:k]
+                return rows[order], distance[order]
+            radius *= 2
+
+    def _frame(self, rows, distance):
+        result = self.stations.iloc[rows].copy()
+        result['거리_m'] = distance
+        return result.reset_index(drop=True)
+
+    def within(self, lat, lon, radius_m):
+        return self._frame(*self.query_radius(lat, lon, radius_m))
+
+    def nearest(self, lat, lon, k=5):
+        return self._frame(*self.query_nearest(lat, lon, k))
+
+
+@st.cache_resource(show_spinner=False)
+def load_station_index():
+    return StationIndex(load_stations())
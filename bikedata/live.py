@@ -0,0 +1,178 @@
+import collections
+import copy
+import glob
+import logging
+import os
+import threading
+import time
+
+import pandas as pd
+
+# 원본 폴더를 살펴보는 간격 (초) - 0이면 지켜보지 않는다
+REFRESH_SECONDS = 60
+# 이미 읽은 부분의 끝 몇 바이트를 기억해 두고 파일이 통째로 바뀌었는지 확인한다
+ANCHOR_BYTES = 64
+
+# 한 번 만들어진 스냅샷은 고치지 않는다 (새 자료가 오면 새 스냅샷으로 바꿔 끼운다)
+Snapshot = collections.namedtuple('Snapshot', ['value', 'version', 'generation'])
+
+logger = logging.getLogger(__name__)
+
+
+class TailReader:
+    # CSV 파일 끝에 덧붙은 완성된 줄만 읽는다.
+    # 크기/수정 시각이 그대로면 파일을 열지 않고, 이미 읽은 부분이 바뀌었으면(교체/잘림) None을 돌려준다.
+
+    def __init__(self, path):
+        self.path = path
+        info = os.stat(path)
+        with open(path, 'rb') as f:
+            self.header = f.readline()
+            start = max(info.st_size - 65536, 0)
+            f.seek(start)
+            block = f.read(info.st_size - start)
+        end = block.rfind(b'\n') + 1
+        self.offset = max(start + end, len(self.header))
+        self.size, self.mtime = info.st_size, info.st_mtime_ns
+        self.anchor = self._read_anchor()
+
+    def _read_anchor(self):
+        with open(self.path, 'rb') as f:
+            f.seek(max(self.offset - ANCHOR_BYTES, 0))
+            return f.read(self.offset - max(self.offset - ANCHOR_BYTES, 0))
+
+    def poll(self):
+        # 새로 붙은 줄(bytes, 없으면 b''), 처음부터 다시 읽어야 하면 None
+        try:
+            info = os.stat(self.path)
+        except FileNotFoundError:
+            return None
+        if (info.st_size, info.st_mtime_ns) == (self.size, self.mtime):
+            return b''
+        if info.st_size < self.offset or self._read_anchor() != self.anchor:
+            return None
+
+        with open(self.path, 'rb') as f:
+            f.seek(self.offset)
+            data = f.read(info.st_size - self.offset)
+        # 아직 쓰는 중인 마지막 줄은 다음 차례에 읽는다
+        data = data[:data.rfind(b'\n') + 1]
+        self.offset += len(data)
+        self.anchor = (self.anchor + data)[-ANCHOR_BYTES:]
+        self.size, self.mtime = info.st_size, info.st_mtime_ns
+        return data
+
+    def stamp(self):
+        # 읽은 데까지의 [경로, 크기, 수정 시각] - 끝까지 읽었으면 columnar.source_stamp와 같다
+        return [os.path.abspath(self.path), self.offset, self.mtime]
+
+
+class LiveSource:
+    # pattern에 맞는 원본 파일들을 지켜보다가 끝에 덧붙은 줄만 parse로 읽어 merge(이전 값, 새 행, 읽은 데까지의 도장)로
+    # 합친다. merge가 None을 돌려주면 처음부터 다시 만든다.
+    # 다 만든 뒤에 snapshot 참조 하나만 바꾸므로 읽는 쪽은 잠금 없이 옛것이나 새것 중 하나를 온전히 본다.
+    # 파일이 새로 생기거나 없어지거나 바뀌었으면 load로 처음부터 다시 만든다.
+
+    def __init__(self, pattern, load, parse, merge, interval=REFRESH_SECONDS):
+        self.pattern = pattern
+        self._load = load
+        self._parse = parse
+        self._merge = merge
+        self._lock = threading.Lock()
+        self._listeners = []
+        self._version = 0
+        self._generation = 0
+        self._reload()
+        if interval:
+            threading.Thread(target=self._watch, args=(interval,), name=f'live-{pattern}', daemon=True).start()
+
+    def _files(self):
+        return sorted(glob.glob(self.pattern))
+
+    def _publish(self, value):
+        self._version += 1
+        self.snapshot = Snapshot(value, self._version, self._generation)
+
+    def _reload(self):
+        paths = self._files()
+        # 읽기 전에 위치를 잡아 두어야 읽는 사이에 붙은 줄을 놓치지 않는다
+        readers = [TailReader(path) for path in paths]
+        value = self._load(paths)
+        self._readers = readers
+        self._generation += 1
+        self._publish(value)
+
+    def subscribe(self, callback):
+        # 새 스냅샷이 나올 때마다 (지켜보는 스레드에서) 불린다 - 파생 집계를 미리 따라잡는 데 쓴다
+        self._listeners.append(callback)
+
+    def refresh(self):
+        # 바뀐 것이 있어 새 스냅샷을 냈으면 True
+        with self._lock:
+            if self._files() != [reader.path for reader in self._readers]:
+                self._reload()
+            else:
+                saved = [copy.copy(reader) for reader in self._readers]
+                try:
+                    tails = [reader.poll() for reader in self._readers]
+                    if any(tail is None for tail in tails):
+                        self._reload()
+                    else:
+                        frames = [self._parse(reader.header + tail)
+                                  for reader, tail in zip(self._readers, tails) if tail]
+                        if not frames:
+                            return False
+                        stamp = [reader.stamp() for reader in self._readers]
+                        value = self._merge(self.snapshot.value, pd.concat(frames, ignore_index=True), stamp)
+                        if value is None:
+                            self._reload()
+                        else:
+                            self._publish(value)
+                except BaseException:
+                    # 합치다 실패하면 읽은 위치도 되돌려 다음 차례에 같은 줄을 다시 읽는다
+                    self._readers = saved
+                    raise
+        for callback in self._listeners:
+            callback()
+        return True
+
+    def _watch(self, interval):
+        while True:
+            time.sleep(interval)
+            try:
+                self.refresh()
+            except Exception:
+                # 지금 스냅샷을 그대로 두고 다음 차례에 다시 본다
+                logger.exception('%s 새로 고침 실패', self.pattern)
+
+
+class Derived:
+    # 행을 덧붙여 가는 스냅샷에서 만드는 집계 객체.
+    # 같은 세대 안에서 행만 늘었으면 update(이전 객체의 복사본, 새 행)로 따라잡고,
+    # update가 None을 돌려주거나 세대가 바뀌었으면 build로 처음부터 만든다.
+
+    def __init__(self, source, build, update=None):
+        self.source = source
+        self._build = build
+        self._update = update
+        self._lock = threading.Lock()
+        self._state = None
+        self.get()
+        source.subscribe(self.get)
+
+    def get(self):
+        snapshot = self.source.snapshot
+        state = self._state
+        if state is not None and state[1] == snapshot.version:
+            return state[0]
+        with self._lock:
+            state = self._state
+            if state is None or state[1] != snapshot.version:
+                frame = snapshot.value
+                value = None
+                if self._update is not None and state is not None and state[2] == snapshot.generation:
+                    value = self._update(copy.deepcopy(state[0]), frame.iloc[state[3]:])
+                if value is None:
+                    value = self._build(frame)
+                state = self._state = (value, snapshot.version, snapshot.generation, len(frame))
+        return state[0]
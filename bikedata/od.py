@@ -0,0 +1,173 @@
+import folium
+import numpy as np
+import pandas as pd
+import streamlit as st
+
+from bikedata.stations import SEOUL_CENTER, load_stations
+from bikedata.trips import CHUNK_ROWS, row_chunks, trip_snapshot
+
+
+def _lookup(series, names):
+    # 범주 코드 -> names 기준 위치 (맨 끝 칸은 결측값 -1 자리)
+    return np.append(names.get_indexer(series.cat.categories), -1)
+
+
+def _merge(keys, sums, new_keys, new_weights):
+    # (키, 합) 목록에 새 조각을 더한다 - 서로 다른 키 수만큼만 메모리를 쓴다
+    merged, inverse = np.unique(np.concatenate([keys, new_keys]), return_inverse=True)
+    return merged, np.bincount(inverse, weights=np.concatenate([sums, new_weights]), minlength=len(merged))
+
+
+class SparseRows:
+    # 행 압축(CSR) 희소 행렬: 행 i의 값은 data[indptr[i]:indptr[i+1]], 열 번호는 indices에
+
+    def __init__(self, keys, sums, n_rows, n_cols):
+        rows = keys // n_cols
+        self.shape = (n_rows, n_cols)
+        self.indptr = np.searchsorted(rows, np.arange(n_rows + 1))
+        self.indices = keys % n_cols
+        self.data = sums.round().astype(np.int64)
+
+    def rows(self, row_numbers):
+        # 여러 행을 한 번에 꺼내기 -> (행 번호, 열 번호, 값)
+        starts = self.indptr[row_numbers]
+        lengths = self.indptr[np.asarray(row_numbers) + 1] - starts
+        offsets = np.repeat(starts - np.concatenate([[0], np.cumsum(lengths)[:-1]]), lengths)
+        positions = np.arange(lengths.sum()) + offsets
+        return np.repeat(row_numbers, lengths), self.indices[positions], self.data[positions]
+
+
+def top_k(values, k):
+    # 전체 정렬 없이 큰 값 k개만 골라 그 k개만 정렬한다
+    if len(values) > k:
+        picked = np.argpartition(-values, k - 1)[:k]
+    else:
+        picked = np.arange(len(values))
+    return picked[np.lexsort((picked, -values[picked]))]
+
+
+class ODMatrix:
+    # 출발 대여소 x 도착 대여소 이용 건수 (그리고 출발 구 x 도착 대여소) 희소 행렬
+
+    def __init__(self, df, chunk_rows=CHUNK_ROWS):
+        self.stations = pd.Index(df['시작_대여소명'].cat.categories).union(
+            pd.Index(df['종료_대여소명'].cat.categories))
+        self.regions = pd.Index(df['출발_구'].cat.categories)
+        n = len(self.stations)
+        start_lookup = _lookup(df['시작_대여소명'], self.stations)
+        end_lookup = _lookup(df['종료_대여소명'], self.stations)
+        region_lookup = _lookup(df['출발_구'], self.regions)
+
+        # 대여소 이름 -> 대여소 ID (지도에 그릴 때 좌표를 찾는 데 쓴다)
+        has_ids = '시작_대여소_ID' in df and '종료_대여소_ID' in df
+        if has_ids:
+            self.ids = pd.Index(df['시작_대여소_ID'].cat.categories).union(
+                pd.Index(df['종료_대여소_ID'].cat.categories))
+            id_lookups = (_lookup(df['시작_대여소_ID'], self.ids), _lookup(df['종료_대여소_ID'], self.ids))
+        else:
+            self.ids = pd.Index([])
+        self.station_id = np.full(n, -1, dtype=np.int64)
+        # 대여소가 어느 출발 구에 속하는지 (구는 대여소 이름에서 뽑으므로 하나로 정해진다)
+        self.station_region = np.full(n, -1, dtype=np.int64)
+
+        station_keys, station_sums = np.array([], dtype=np.int64), np.array([])
+        region_keys, region_sums = np.array([], dtype=np.int64), np.array([])
+        for chunk in row_chunks(df, chunk_rows):
+            origin = start_lookup[chunk['시작_대여소명'].cat.codes.to_numpy()]
+            destination = end_lookup[chunk['종료_대여소명'].cat.codes.to_numpy()]
+            region = region_lookup[chunk['출발_구'].cat.codes.to_numpy()]
+            counts = chunk['전체_건수'].to_numpy(dtype=float)
+
+            known = (origin >= 0) & (destination >= 0)
+            station_keys, station_sums = _merge(
+                station_keys, station_sums, origin[known] * n + destination[known], counts[known])
+            known = (region >= 0) & (destination >= 0)
+            region_keys, region_sums = _merge(
+                region_keys, region_sums, region[known] * n + destination[known], counts[known])
+
+            self.station_region[origin[origin >= 0]] = region[origin >= 0]
+            if has_ids:
+                for codes, id_lookup, id_column in ((origin, id_lookups[0], '시작_대여소_ID'),
+                                                    (destination, id_lookups[1], '종료_대여소_ID')):
+                    ids = id_lookup[chunk[id_column].cat.codes.to_numpy()]
+                    valid = (codes >= 0) & (ids >= 0)
+                    self.station_id[codes[valid]] = ids[valid]
+
+        self.by_station = SparseRows(station_keys, station_sums, n, n)
+        self.by_region = SparseRows(region_keys, region_sums, len(self.regions), n)
+
+    def _ids(self, stations):
+        ids = np.full(len(stations), None, dtype=object)
+        known = self.station_id[stations] >= 0
+        ids[known] = self.ids[self.station_id[stations][known]]
+        return ids
+
+    def top_destinations(self, region=None, k=10, station=None):
+        # 출발 구(region) 또는 출발 대여소(station)에서 가장 많이 간 도착 대여소 k곳
+        if station is not None:
+            matrix, row = self.by_station, self.stations.get_indexer([station])[0]
+        else:
+            matrix, row = self.by_region, self.regions.get_indexer([region])[0]
+        if row < 0:
+            return pd.Series([], name='전체_건수', index=pd.Index([], name='종료_대여소명'), dtype=np.int64)
+        start, end = matrix.indptr[row], matrix.indptr[row + 1]
+        values = matrix.data[start:end]
+        picked = top_k(values, k)
+        return pd.Series(values[picked], name='전체_건수',
+                         index=pd.Index(self.stations[matrix.indices[start:end][picked]], name='종료_대여소명'))
+
+    def heaviest_pairs(self, region=None, k=30, include_loops=False):
+        # 이용이 가장 많은 (출발, 도착) 대여소 쌍 k개 - region을 주면 그 구에서 출발한 것만
+        if region is None:
+            rows = np.arange(self.by_station.shape[0])
+        else:
+            rows = np.flatnonzero(self.station_region == self.regions.get_indexer([region])[0])
+        origin, destination, values = self.by_station.rows(rows)
+        if not include_loops:
+            moving = origin != destination
+            origin, destination, values = origin[moving], destination[moving], values[moving]
+        picked = top_k(values, k)
+        return pd.DataFrame({
+            '시작_대여소명': self.stations[origin[picked]],
+            '종료_대여소명': self.stations[destination[picked]],
+            '시작_대여소_ID': self._ids(origin[picked]),
+            '종료_대여소_ID': self._ids(destination[picked]),
+            '전체_건수': values[picked],
+        })
+
+
+@st.cache_resource(show_spinner='출발-도착 이동표를 만드는 중...', max_entries=1)
+def _od_matrix(version, _trips):
+    return ODMatrix(_trips)
+
+
+def load_od_matrix():
+    # 이용 데이터가 바뀌면 (버전이 달라지면) 새로 만든다
+    snapshot = trip_snapshot()
+    return _od_matrix(snapshot.version, snapshot.value)
+
+
+def load_flow_map_html(region=None, k=30):
+    return _flow_map_html(trip_snapshot().version, region, k)
+
+
+@st.cache_resource(show_spinner='이동 경로 지도를 그리는 중...', max_entries=64)
+def _flow_map_html(version, region, k):
+    pairs = load_od_matrix().heaviest_pairs(region, k)
+    coords = load_stations().set_index('대여소_ID')[['위도', '경도']]
+    pairs = pairs.join(coords, on='시작_대여소_ID').join(coords, on='종료_대여소_ID', rsuffix='_도착')
+    pairs = pairs.dropna(subset=['위도', '위도_도착'])
+
+    m = folium.Map(location=SEOUL_CENTER, zoom_start=11, tiles='cartodbpositron')
+    if not pairs.empty:
+        largest = pairs['전체_건수'].max()
+        for pair in pairs.itertuples(index=False):
+            folium.PolyLine(
+                [[pair.위도, pair.경도], [pair.위도_도착, pair.경도_도착]],
+                weight=1 + 7 * pair.전체_건수 / largest,
+                color='#FF6B6B', opacity=0.7,
+                tooltip=f'{pair.시작_대여소명} → {pair.종료_대여소명}: {pair.전체_건수:,}건',
+            ).add_to(m)
+        m.fit_bounds([[pairs[['위도', '위도_도착']].min().min(), pairs[['경도', '경도_도착']].min().min()],
+                      [pairs[['위도', '위도_도착']].max().max(), pairs[['경도', '경도_도착']].max().max()]])
+    return m.get_root().render()
@@ -0,0 +1,114 @@
+import threading
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+import streamlit as st
+from streamlit.runtime.scriptrunner import add_script_run_ctx, get_script_run_ctx
+
+from bikedata.charts import load_scatter_density, load_scatter_sample
+from bikedata.cube import load_duration_histogram, load_duration_index, load_trip_cube
+from bikedata.districts import load_district_summary
+from bikedata.flow import load_net_flow, load_net_flow_map_html
+from bikedata.geo import load_station_index
+from bikedata.od import load_flow_map_html, load_od_matrix
+from bikedata.stations import load_station_map_html, load_station_volume, load_stations
+from bikedata.trips import load_trips
+
+PREWARM_WORKERS = 4
+
+# (이름, 불러오기 함수, 먼저 끝나야 하는 것들) - 앞에 둔 것부터 스레드에 들어간다
+PREWARM_TASKS = [
+    ('자치구 현황', load_district_summary, []),
+    ('대여소', load_stations, []),
+    ('이용 데이터', load_trips, []),
+    ('대여소 색인', load_station_index, ['대여소']),
+    ('집계표', load_trip_cube, ['이용 데이터']),
+    ('이용 시간 색인', load_duration_index, ['이용 데이터']),
+    ('이용 시간 분포', load_duration_histogram, ['이용 데이터']),
+    ('출발-도착 이동표', load_od_matrix, ['이용 데이터']),
+    ('대여소 순유입', load_net_flow, ['이용 데이터']),
+    ('산점도 표본', load_scatter_sample, ['이용 데이터']),
+    ('산점도 밀도', load_scatter_density, ['이용 데이터']),
+    # 이용 데이터가 없어도 (건수 0으로) 만들 수 있으므로 대여소만 기다린다
+    ('대여소 이용량', load_station_volume, ['대여소']),
+    ('대여소 지도', lambda: [load_station_map_html(view) for view in ('grid', 'cluster')], ['대여소 이용량']),
+    ('이동 경로 지도', load_flow_map_html, ['출발-도착 이동표', '대여소']),
+    # 4차시 기본 시간대(7~9시) 지도
+    ('순유입 지도', lambda: load_net_flow_map_html(range(7, 10)), ['대여소 순유입', '대여소']),
+]
+
+
+def _attach(ctx):
+    # 캐시 함수는 스크립트 실행 맥락이 없는 스레드에서 불리면 부를 때마다 경고를 남긴다.
+    # 프리워머를 만든 세션의 맥락을 작업 스레드에 붙여 준다 (스크립트 밖에서 만들었으면 그대로)
+    if ctx is not None:
+        add_script_run_ctx(threading.current_thread(), ctx)
+
+
+class Prewarmer:
+    # 서버가 뜨면 모든 페이지가 쓰는 캐시를 뒤에서 미리 채운다.
+    # 각 함수는 원래 캐시 함수 그대로라 페이지에서 부르면 (다 됐으면) 바로, (도는 중이면) 끝날 때까지 기다렸다 받는다.
+
+    def __init__(self, tasks=PREWARM_TASKS, workers=PREWARM_WORKERS):
+        self._lock = threading.Lock()
+        self._states = {name: {'state': '대기', 'seconds': None, 'error': None} for name, _, _ in tasks}
+        self._futures = {}
+        self._pool = ThreadPoolExecutor(max_workers=workers, thread_name_prefix='prewarm', initializer=_attach,
+                                        initargs=(get_script_run_ctx(suppress_warning=True),))
+        # 먼저 끝나야 하는 것을 앞에 넣으므로 기다리는 작업이 스레드를 모두 잡고 멈추는 일은 없다
+        for name, load, after in tasks:
+            self._futures[name] = self._pool.submit(self._run, name, load, [self._futures[dep] for dep in after])
+        self._pool.shutdown(wait=False)
+
+    def _set(self, name, **values):
+        with self._lock:
+            self._states[name].update(values)
+
+    def _run(self, name, load, after):
+        for future in after:
+            future.result()
+        self._set(name, state='준비 중')
+        start = time.perf_counter()
+        try:
+            load()
+        except FileNotFoundError as error:
+            self._set(name, state='자료 없음', error=str(error))
+            raise
+        except Exception as error:
+            self._set(name, state='실패', error=repr(error))
+            raise
+        self._set(name, state='완료', seconds=time.perf_counter() - start)
+
+    def status(self):
+        # 이름 -> {'state', 'seconds', 'error'}
+        with self._lock:
+            states = {name: dict(state) for name, state in self._states.items()}
+        # 앞 단계가 실패해서 시작도 못 한 것
+        for name, future in self._futures.items():
+            if future.done() and states[name]['state'] == '대기':
+                states[name]['state'] = '건너뜀'
+        return states
+
+    def progress(self):
+        done = sum(future.done() for future in self._futures.values())
+        return done, len(self._futures)
+
+    @property
+    def ready(self):
+        return all(future.done() for future in self._futures.values())
+
+    def wait(self, timeout=None):
+        deadline = None if timeout is None else time.monotonic() + timeout
+        for future in self._futures.values():
+            remaining = None if deadline is None else max(deadline - time.monotonic(), 0)
+            try:
+                future.exception(timeout=remaining)
+            except TimeoutError:
+                return False
+        return True
+
+
+# 프로세스마다 한 번만 시작한다 (로그인 화면이 처음 열릴 때)
+@st.cache_resource(show_spinner=False)
+def load_prewarmer():
+    return Prewarmer()
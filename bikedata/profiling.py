@@ -0,0 +1,264 @@
+import contextlib
+import cProfile
+import functools
+import importlib
+import os
+import threading
+import time
+
+import pandas as pd
+import plotly.express as px
+import plotly.graph_objects as go
+import plotly.io as pio
+import streamlit as st
+import streamlit.components.v1 as components
+from streamlit.delta_generator import DeltaGenerator
+from streamlit.runtime.scriptrunner import get_script_run_ctx
+
+# DATABIKE_PROFILE=1 (시간만) 또는 cprofile (cProfile까지), 주소 뒤에 ?profile=1 / ?profile=cprofile 도 된다
+PROFILE_ENV = 'DATABIKE_PROFILE'
+PROFILE_DIR = '.databike_profiles'
+# 가장 느렸던 실행 몇 개의 cProfile 결과만 남긴다
+SLOWEST_KEPT = 5
+RUN_KEY = '_profile_run'
+MODE_KEY = '_profile_mode'
+HISTORY_KEY = '_profile_history'
+
+# 감쌀 함수들 - 페이지는 다시 실행될 때마다 from bikedata import ...를 새로 하므로 감싼 것이 쓰인다
+LOADERS = {
+    'bikedata': ['load_trips', 'load_trip_cube', 'load_duration_index', 'load_duration_histogram', 'load_od_matrix',
+                 'load_flow_map_html', 'load_station_map_html', 'load_station_index', 'load_district_summary',
+                 'load_credential_store', 'load_submission_store', 'load_prewarmer', 'cached_figure',
+                 'load_station_districts', 'load_net_flow', 'load_net_flow_map_html'],
+    'bikedata.charts': ['load_scatter_sample', 'load_scatter_density'],
+}
+AGGREGATIONS = {
+    'TripCube': ['hourly', 'hourly_mean_minutes', 'summary', 'observed_regions'],
+    'DurationIndex': ['longest', 'hourly_at_least', 'regions_at_least', 'share_at_least'],
+    'DurationHistogram': ['region'],
+    'ODMatrix': ['top_destinations', 'heaviest_pairs'],
+    'NetFlow': ['top_imbalance', 'inventory'],
+    'StationIndex': ['within', 'nearest'],
+    'DistrictSummary': ['compare', 'total'],
+}
+FIGURES = ['line', 'bar', 'pie', 'scatter', 'histogram']
+# 페이지를 끝까지 돌지 않고 빠져나가는 함수들 - 빠져나가기 전에 측정을 마친다
+EXITS = ['stop', 'switch_page', 'rerun']
+
+
+class ProfileRun:
+    # 페이지 한 번 실행 동안의 구간 기록 (구간 안의 구간은 depth로 들여 쓴다)
+
+    def __init__(self, page, cprofile=False):
+        self.page = page
+        self.blocks = []
+        self.depth = 0
+        self.seconds = None
+        self.profile = cProfile.Profile() if cprofile else None
+        self._start = time.perf_counter()
+        if self.profile is not None:
+            self.profile.enable()
+
+    @contextlib.contextmanager
+    def block(self, name, kind):
+        record = {'name': name, 'kind': kind, 'depth': self.depth, 'ms': None, 'rows': None, 'bytes': None}
+        self.blocks.append(record)
+        self.depth += 1
+        start = time.perf_counter()
+        try:
+            yield record
+        finally:
+            self.depth -= 1
+            record['ms'] = (time.perf_counter() - start) * 1000
+
+    def stop(self):
+        if self.profile is not None:
+            self.profile.disable()
+        self.seconds = time.perf_counter() - self._start
+        return self.seconds
+
+
+class ProfileLog:
+    # 프로세스 전체에서 가장 느렸던 실행들 (cProfile 결과 파일과 함께)
+
+    def __init__(self, directory=PROFILE_DIR, kept=SLOWEST_KEPT):
+        self.directory = directory
+        self.kept = kept
+        self.slowest = []
+        self._lock = threading.Lock()
+
+    def record(self, run):
+        with self._lock:
+            if len(self.slowest) >= self.kept and run.seconds <= self.slowest[-1]['seconds']:
+                return None
+            entry = {'page': run.page, 'seconds': run.seconds, 'at': time.strftime('%H:%M:%S'), 'path': None}
+            if run.profile is not None:
+                os.makedirs(self.directory, exist_ok=True)
+                entry['path'] = os.path.join(
+                    self.directory, f"{run.page}-{time.strftime('%Y%m%d-%H%M%S')}-{run.seconds * 1000:.0f}ms.prof")
+                run.profile.dump_stats(entry['path'])
+            self.slowest.append(entry)
+            self.slowest.sort(key=lambda item: -item['seconds'])
+            for dropped in self.slowest[self.kept:]:
+                if dropped['path'] and os.path.exists(dropped['path']):
+                    os.remove(dropped['path'])
+            del self.slowest[self.kept:]
+            return entry
+
+
+@st.cache_resource(show_spinner=False)
+def load_profile_log():
+    return ProfileLog()
+
+
+def current_run():
+    # 지금 스레드가 측정 중인 세션의 페이지 실행이면 그 기록, 아니면 None (미리 불러오기 스레드 등)
+    if get_script_run_ctx(suppress_warning=True) is None:
+        return None
+    return st.session_state.get(RUN_KEY)
+
+
+def _rows(result, args):
+    for value in (result, *args):
+        if isinstance(value, (pd.DataFrame, pd.Series)):
+            return len(value)
+    return None
+
+
+def _figure_bytes(args, kwargs):
+    figure = kwargs.get('figure_or_data')
+    if figure is None:
+        figure = next((value for value in args if isinstance(value, (go.Figure, dict))), None)
+    return len(pio.to_json(figure, validate=False)) if figure is not None else None
+
+
+def _html_bytes(args, kwargs):
+    html = kwargs.get('html', args[0] if args else '')
+    return len(html.encode('utf-8'))
+
+
+def _wrap(owner, attribute, kind, label=None, payload=None):
+    original = getattr(owner, attribute, None)
+    if original is None or getattr(original, '_profiled', False):
+        return
+    label = label or attribute
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        run = current_run()
+        if run is None:
+            return original(*args, **kwargs)
+        with run.block(label, kind) as record:
+            result = original(*args, **kwargs)
+            record['rows'] = _rows(result, args)
+            if payload is not None:
+                record['bytes'] = payload(args, kwargs)
+        return result
+
+    wrapper._profiled = True
+    setattr(owner, attribute, wrapper)
+
+
+def _finish_before(attribute):
+    original = getattr(st, attribute, None)
+    if original is None or getattr(original, '_profiled', False):
+        return
+
+    @functools.wraps(original)
+    def wrapper(*args, **kwargs):
+        # 예외로 빠져나가면 페이지 끝의 finish_profiling()까지 가지 못한다
+        if current_run() is not None:
+            finish_profiling()
+        return original(*args, **kwargs)
+
+    wrapper._profiled = True
+    setattr(st, attribute, wrapper)
+
+
+_install_lock = threading.Lock()
+_installed = False
+
+
+def install():
+    # 처음 측정을 켤 때 한 번만 감싼다 (측정하지 않는 세션은 그대로 지나간다)
+    global _installed
+    with _install_lock:
+        if _installed:
+            return
+        import bikedata
+
+        for module, names in LOADERS.items():
+            for name in names:
+                _wrap(importlib.import_module(module), name, '불러오기')
+        for class_name, methods in AGGREGATIONS.items():
+            owner = getattr(bikedata, class_name)
+            for method in methods:
+                _wrap(owner, method, '집계', f'{class_name}.{method}')
+        for name in FIGURES:
+            _wrap(px, name, '그림', f'px.{name}')
+        # st.plotly_chart는 불러올 때 이미 묶인 메서드라 따로 감싼다 (열 안에서는 클래스 쪽이 불린다)
+        _wrap(st, 'plotly_chart', '전송', 'st.plotly_chart', _figure_bytes)
+        _wrap(DeltaGenerator, 'plotly_chart', '전송', 'st.plotly_chart', _figure_bytes)
+        _wrap(components, 'html', '전송', 'components.html', _html_bytes)
+        for name in EXITS:
+            _finish_before(name)
+        _installed = True
+
+
+def _requested_mode():
+    mode = st.query_params.get('profile') or os.environ.get(PROFILE_ENV)
+    if mode is not None:
+        # 주소로 켠 것은 페이지를 옮겨 다녀도 (주소가 바뀌어도) 유지한다
+        st.session_state[MODE_KEY] = '' if mode.lower() in ('0', 'false', 'off') else mode.lower()
+    return st.session_state.get(MODE_KEY)
+
+
+def start_profiling(page):
+    mode = _requested_mode()
+    if not mode:
+        return None
+    install()
+    dangling = st.session_state.get(RUN_KEY)
+    if dangling is not None:
+        # 지난 실행이 예외로 끝나 마무리되지 못했다 - 끝난 시각을 모르므로 기록하지 않고 cProfile만 끈다
+        dangling.stop()
+    run = st.session_state[RUN_KEY] = ProfileRun(page, cprofile=mode == 'cprofile')
+    return run
+
+
+def finish_profiling():
+    run = st.session_state.get(RUN_KEY)
+    if run is None:
+        return
+    st.session_state[RUN_KEY] = None
+    run.stop()
+    log = load_profile_log()
+    log.record(run)
+    history = st.session_state.setdefault(HISTORY_KEY, [])
+    history.append({'page': run.page, 'ms': run.seconds * 1000})
+    del history[:-20]
+
+    with st.sidebar.expander('⏱️ 성능 측정', expanded=False):
+        st.metric(f'이번 실행 ({run.page})', f'{run.seconds * 1000:,.0f}ms')
+        if run.blocks:
+            table = pd.DataFrame(run.blocks)
+            table['name'] = ['  ' * depth + name for depth, name in zip(table['depth'], table['name'])]
+            table['bytes'] = table['bytes'] / 1024
+            st.dataframe(
+                table.drop(columns='depth').rename(columns={
+                    'name': '구간', 'kind': '종류', 'ms': '시간(ms)', 'rows': '행 수', 'bytes': '전송(KB)'}),
+                hide_index=True,
+                column_config={'시간(ms)': st.column_config.NumberColumn(format='%.1f'),
+                               '전송(KB)': st.column_config.NumberColumn(format='%.1f')}
+            )
+        st.caption('최근 실행: ' + ', '.join(f"{item['page']} {item['ms']:.0f}ms" for item in history[-5:]))
+        if log.slowest:
+            st.markdown('**가장 느린 실행**')
+            for item in log.slowest:
+                st.caption(f"{item['at']} {item['page']} {item['seconds'] * 1000:,.0f}ms"
+                           + (f" → {item['path']}" if item['path'] else ''))
+
+
+# 환경 변수로 켠 서버는 첫 실행부터 잴 수 있도록 불러올 때 바로 감싼다 (?profile=1 은 다음 실행부터)
+if os.environ.get(PROFILE_ENV, '').lower() not in ('', '0', 'false', 'off'):
+    install()
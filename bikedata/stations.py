@@ -0,0 +1,137 @@
+import folium
+import numpy as np
+import pandas as pd
+import streamlit as st
+from folium.plugins import FastMarkerCluster
+
+from bikedata import columnar
+from bikedata.dimension import STATION_PATH
+from bikedata.trips import CHUNK_ROWS, row_chunks, trip_snapshot
+
+SEOUL_CENTER = [37.5502, 126.982]
+# 낮은 확대 수준에서 대여소를 묶는 격자 크기 (도 단위, 약 1km)
+GRID_DEGREES = 0.01
+STATION_CACHE_VERSION = 2
+
+
+def read_station_csv(path=STATION_PATH):
+    stations = pd.read_csv(path, encoding='cp949')
+    # 좌표가 0,0인 자리표시 행(ST-999 등)은 지도에 올릴 수 없으므로 뺀다
+    stations = stations[(stations['위도'] != 0) & (stations['경도'] != 0)]
+    return stations.reset_index(drop=True)
+
+
+def attach_stations(path=STATION_PATH):
+    # 공유 캐시의 대여소 표 (문자열 열은 범주형) - 워커마다 CSV를 다시 읽지 않는다
+    stations = columnar.publish_frame(
+        'stations', columnar.source_stamp([path]), STATION_CACHE_VERSION,
+        lambda stamp: columnar.save_frame(read_station_csv(path), 'stations', stamp, STATION_CACHE_VERSION))
+    if stations is None:
+        raise FileNotFoundError(path)
+    return stations
+
+
+@st.cache_resource(show_spinner=False)
+def load_stations(path=STATION_PATH):
+    return attach_stations(path)
+
+
+def _station_totals(ids, codes_column, count_column, df, chunk_rows):
+    # 대여소 ID 열의 범주 코드 -> 대여소 순번으로 바꿔 bincount로 더한다
+    totals = np.zeros(len(ids))
+    cat = df[codes_column].cat
+    lookup = np.append(ids.get_indexer(cat.categories), -1)
+    for chunk in row_chunks(df, chunk_rows):
+        position = lookup[chunk[codes_column].cat.codes.to_numpy()]
+        known = position >= 0
+        totals += np.bincount(position[known], weights=chunk[count_column].to_numpy(dtype=float)[known],
+                              minlength=len(ids))
+    return totals.round().astype(np.int64)
+
+
+def _trip_version():
+    # 이용 데이터가 없으면 None (대여소 좌표만으로 그린다)
+    try:
+        snapshot = trip_snapshot()
+    except FileNotFoundError:
+        return None, None
+    return snapshot.version, snapshot.value
+
+
+def load_station_volume(chunk_rows=CHUNK_ROWS):
+    version, trips = _trip_version()
+    return _station_volume(version, chunk_rows, trips)
+
+
+@st.cache_resource(show_spinner='대여소별 이용량을 계산하는 중...', max_entries=2)
+def _station_volume(version, chunk_rows, _trips):
+    # 대여소 좌표에 대여/반납 건수를 붙인다 (이용 데이터가 없으면 0)
+    stations = load_stations().copy()
+    ids = pd.Index(stations['대여소_ID'])
+    trips = _trips
+
+    if trips is not None and '시작_대여소_ID' in trips and '종료_대여소_ID' in trips:
+        stations['대여_건수'] = _station_totals(ids, '시작_대여소_ID', '전체_건수', trips, chunk_rows)
+        stations['반납_건수'] = _station_totals(ids, '종료_대여소_ID', '전체_건수', trips, chunk_rows)
+    else:
+        stations['대여_건수'] = 0
+        stations['반납_건수'] = 0
+    stations['이용_건수'] = stations['대여_건수'] + stations['반납_건수']
+    return stations
+
+
+def grid_summary(stations, grid=GRID_DEGREES):
+    # 격자 칸마다 대여소 수, 이용 건수, 중심 좌표를 모은다
+    cell_lat = np.floor(stations['위도'].to_numpy() / grid).astype(np.int64)
+    cell_lon = np.floor(stations['경도'].to_numpy() / grid).astype(np.int64)
+    grouped = stations.groupby([cell_lat, cell_lon])
+    return pd.DataFrame({
+        '위도': grouped['위도'].mean().to_numpy(),
+        '경도': grouped['경도'].mean().to_numpy(),
+        '대여소_수': grouped.size().to_numpy(),
+        '이용_건수': grouped['이용_건수'].sum().to_numpy(),
+    })
+
+
+def _grid_map(stations):
+    cells = grid_summary(stations)
+    m = folium.Map(location=SEOUL_CENTER, zoom_start=11, tiles='cartodbpositron')
+    # 이용이 많을수록 크게 (이용 데이터가 없으면 대여소 수로 크기를 정함)
+    size_column = '이용_건수' if cells['이용_건수'].sum() > 0 else '대여소_수'
+    weights = cells[size_column] / cells[size_column].max()
+    for cell, weight in zip(cells.itertuples(index=False), weights):
+        folium.CircleMarker(
+            location=[cell.위도, cell.경도],
+            radius=4 + 16 * np.sqrt(weight),
+            color='#FF6B6B', fill=True, fill_opacity=0.5, weight=1,
+            tooltip=f'대여소 {cell.대여소_수}곳 · 이용 {cell.이용_건수:,}건',
+        ).add_to(m)
+    return m
+
+
+def _cluster_map(stations):
+    m = folium.Map(location=SEOUL_CENTER, zoom_start=12, tiles='cartodbpositron')
+    # FastMarkerCluster는 좌표 배열만 보내고 마커는 화면에 보이는 묶음만 브라우저에서 만든다
+    callback = """
+        function (row) {
+            var marker = L.circleMarker(new L.LatLng(row[0], row[1]),
+                {radius: 6, color: '#4A90E2', fillOpacity: 0.7});
+            marker.bindTooltip(row[2] + '<br>이용 ' + row[3].toLocaleString() + '건');
+            return marker;
+        };
+    """
+    data = stations[['위도', '경도', '대여소_ID', '이용_건수']].values.tolist()
+    FastMarkerCluster(data, callback=callback).add_to(m)
+    return m
+
+
+def load_station_map_html(view='grid'):
+    return _station_map_html(_trip_version()[0], view)
+
+
+@st.cache_resource(show_spinner='지도를 그리는 중...', max_entries=4)
+def _station_map_html(version, view):
+    # 다시 실행할 때마다 folium HTML을 새로 만들지 않도록 완성된 HTML 문자열을 보관한다
+    stations = load_station_volume()
+    m = _grid_map(stations) if view == 'grid' else _cluster_map(stations)
+    return m.get_root().render()
@@ -0,0 +1,266 @@
+import json
+import queue
+import sqlite3
+import threading
+import time
+from concurrent.futures import Future
+from datetime import datetime
+
+import pandas as pd
+import streamlit as st
+
+DB_PATH = 'submissions.db'
+
+PROPOSAL_COLUMNS = [
+    'user_id', 'submitted_at', 'time_pattern', 'usage_pattern', 'additional_data', 'data_usage',
+    'region', 'project_types', 'target_time', 'effects', 'title', 'description', 'budget',
+]
+ASSESSMENT_COLUMNS = [
+    'user_id', 'submitted_at', 'rating_1', 'rating_2', 'rating_3', 'rating_4', 'rating_5',
+    'q1_answer', 'q1_correct', 'q2_answer', 'q2_correct', 'q3_answer', 'q3_correct', 'reflection',
+]
+# 목록형 값(사업 유형, 기대 효과)은 JSON 문자열로 저장
+LIST_COLUMNS = {'project_types', 'effects'}
+
+SCHEMA = """
+CREATE TABLE IF NOT EXISTS proposals (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    submitted_at TEXT NOT NULL,
+    time_pattern TEXT,
+    usage_pattern TEXT,
+    additional_data TEXT,
+    data_usage TEXT,
+    region TEXT,
+    project_types TEXT,
+    target_time TEXT,
+    effects TEXT,
+    title TEXT,
+    description TEXT,
+    budget INTEGER
+);
+CREATE INDEX IF NOT EXISTS proposals_submitted_at ON proposals (submitted_at);
+CREATE INDEX IF NOT EXISTS proposals_user_id ON proposals (user_id);
+CREATE INDEX IF NOT EXISTS proposals_region ON proposals (region, submitted_at);
+
+CREATE TABLE IF NOT EXISTS self_assessments (
+    id INTEGER PRIMARY KEY,
+    user_id TEXT NOT NULL,
+    submitted_at TEXT NOT NULL,
+    rating_1 INTEGER, rating_2 INTEGER, rating_3 INTEGER, rating_4 INTEGER, rating_5 INTEGER,
+    q1_answer TEXT, q1_correct INTEGER,
+    q2_answer TEXT, q2_correct INTEGER,
+    q3_answer TEXT, q3_correct INTEGER,
+    reflection TEXT
+);
+CREATE INDEX IF NOT EXISTS self_assessments_submitted_at ON self_assessments (submitted_at);
+CREATE INDEX IF NOT EXISTS self_assessments_user_id ON self_assessments (user_id);
+
+-- 교사용 집계: 제출될 때마다 날짜별로 더해 두므로 제출이 쌓여도 읽는 양은 날짜 수만큼
+CREATE TABLE IF NOT EXISTS rating_rollup (
+    day TEXT NOT NULL,
+    goal INTEGER NOT NULL,
+    rating INTEGER NOT NULL,
+    count INTEGER NOT NULL,
+    PRIMARY KEY (day, goal, rating)
+) WITHOUT ROWID;
+CREATE TABLE IF NOT EXISTS quiz_rollup (
+    day TEXT NOT NULL,
+    question INTEGER NOT NULL,
+    correct INTEGER NOT NULL,
+    total INTEGER NOT NULL,
+    PRIMARY KEY (day, question)
+) WITHOUT ROWID;
+"""
+
+GOALS = 5
+QUESTIONS = 3
+
+TABLES = {'proposals': PROPOSAL_COLUMNS, 'self_assessments': ASSESSMENT_COLUMNS}
+
+
+def _now():
+    return datetime.now().isoformat(timespec='seconds')
+
+
+def _day_range(since, until):
+    where, params = [], []
+    if since is not None:
+        where.append('day >= ?')
+        params.append(str(since)[:10])
+    if until is not None:
+        where.append('day <= ?')
+        params.append(str(until)[:10])
+    return (' WHERE ' + ' AND '.join(where)) if where else '', params
+
+
+class SubmissionStore:
+    # 4차시 제안서와 5차시 자기평가를 저장하는 SQLite(WAL) 저장소.
+    # 쓰기는 전용 스레드 하나가 큐에서 모아 한 트랜잭션으로 처리하므로
+    # 같은 순간에 수십 명이 제출해도 파일 잠금을 두고 서로 기다리지 않는다.
+
+    def __init__(self, path=DB_PATH, batch_size=64, batch_wait=0.05):
+        self.path = path
+        self.batch_size = batch_size
+        self.batch_wait = batch_wait
+        self._queue = queue.Queue()
+        self._local = threading.local()
+        with self._connect() as conn:
+            conn.executescript(SCHEMA)
+            # 집계표가 생기기 전에 쌓인 제출이 있으면 한 번만 채워 넣는다
+            has_rows = conn.execute('SELECT 1 FROM self_assessments LIMIT 1').fetchone()
+            has_rollup = conn.execute('SELECT 1 FROM quiz_rollup LIMIT 1').fetchone()
+            if has_rows and not has_rollup:
+                self._rebuild_rollups(conn)
+        self._writer = threading.Thread(target=self._write_loop, name='submission-writer', daemon=True)
+        self._writer.start()
+
+    def _connect(self):
+        conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False)
+        conn.execute('PRAGMA journal_mode=WAL')
+        conn.execute('PRAGMA synchronous=NORMAL')
+        return conn
+
+    def _reader(self):
+        # 읽기는 스레드마다 연결 하나 (WAL이라 쓰기와 동시에 읽을 수 있다)
+        conn = getattr(self._local, 'conn', None)
+        if conn is None:
+            conn = self._local.conn = self._connect()
+        return conn
+
+    def _enqueue(self, table, values):
+        row = {'submitted_at': _now(), **values}
+        for column in LIST_COLUMNS & row.keys():
+            row[column] = json.dumps(list(row[column]), ensure_ascii=False)
+        future = Future()
+        self._queue.put((table, [row.get(column) for column in TABLES[table]], future))
+        return future
+
+    def _write_loop(self):
+        conn = self._connect()
+        while True:
+            batch = [self._queue.get()]
+            deadline = time.monotonic() + self.batch_wait
+            while len(batch) < self.batch_size:
+                remaining = deadline - time.monotonic()
+                if remaining <= 0:
+                    break
+                try:
+                    batch.append(self._queue.get(timeout=remaining))
+                except queue.Empty:
+                    break
+
+            try:
+                ids = []
+                with conn:
+                    for table, row, _ in batch:
+                        if table is None:
+                            ids.append(None)
+                            continue
+                        columns = TABLES[table]
+                        cursor = conn.execute(
+                            f"INSERT INTO {table} ({', '.join(columns)}) VALUES ({', '.join('?' * len(columns))})",
+                            row)
+                        ids.append(cursor.lastrowid)
+                        if table == 'self_assessments':
+                            self._roll_up(conn, dict(zip(columns, row)))
+            except Exception as error:
+                for _, _, future in batch:
+                    future.set_exception(error)
+            else:
+                for (_, _, future), row_id in zip(batch, ids):
+                    future.set_result(row_id)
+
+    def _roll_up(self, conn, row):
+        day = row['submitted_at'][:10]
+        conn.executemany(
+            'INSERT INTO rating_rollup (day, goal, rating, count) VALUES (?, ?, ?, 1) '
+            'ON CONFLICT (day, goal, rating) DO UPDATE SET count = count + 1',
+            [(day, goal, row[f'rating_{goal}']) for goal in range(1, GOALS + 1)
+             if row[f'rating_{goal}'] is not None])
+        conn.executemany(
+            'INSERT INTO quiz_rollup (day, question, correct, total) VALUES (?, ?, ?, 1) '
+            'ON CONFLICT (day, question) DO UPDATE SET correct = correct + excluded.correct, total = total + 1',
+            [(day, question, row[f'q{question}_correct'] or 0) for question in range(1, QUESTIONS + 1)
+             if row[f'q{question}_answer'] is not None])
+
+    def _rebuild_rollups(self, conn):
+        conn.execute('DELETE FROM rating_rollup')
+        conn.execute('DELETE FROM quiz_rollup')
+        for goal in range(1, GOALS + 1):
+            conn.execute(
+                f'INSERT INTO rating_rollup (day, goal, rating, count) '
+                f'SELECT substr(submitted_at, 1, 10), {goal}, rating_{goal}, COUNT(*) FROM self_assessments '
+                f'WHERE rating_{goal} IS NOT NULL GROUP BY 1, 3')
+        for question in range(1, QUESTIONS + 1):
+            conn.execute(
+                f'INSERT INTO quiz_rollup (day, question, correct, total) '
+                f'SELECT substr(submitted_at, 1, 10), {question}, SUM(COALESCE(q{question}_correct, 0)), COUNT(*) '
+                f'FROM self_assessments WHERE q{question}_answer IS NOT NULL GROUP BY 1')
+
+    def add_proposal(self, user_id, **fields):
+        # 반환값은 Future - .result()로 저장된 행 번호를 기다릴 수 있다
+        return self._enqueue('proposals', {'user_id': user_id, **fields})
+
+    def add_self_assessment(self, user_id, ratings, answers, correct, reflection):
+        values = {'user_id': user_id, 'reflection': reflection}
+        for i, rating in enumerate(ratings, start=1):
+            values[f'rating_{i}'] = int(rating)
+        for i, (answer, is_correct) in enumerate(zip(answers, correct), start=1):
+            values[f'q{i}_answer'] = answer
+            values[f'q{i}_correct'] = int(bool(is_correct))
+        return self._enqueue('self_assessments', values)
+
+    def flush(self, timeout=None):
+        # 지금까지 넣은 쓰기가 모두 끝날 때까지 기다린다
+        future = Future()
+        self._queue.put((None, None, future))
+        future.result(timeout)
+
+    def _query(self, table, since=None, until=None, **filters):
+        # submitted_at / user_id / region 색인을 타는 조건만 받는다
+        where, params = [], []
+        if since is not None:
+            where.append('submitted_at >= ?')
+            params.append(str(since))
+        if until is not None:
+            where.append('submitted_at < ?')
+            params.append(str(until))
+        for column, value in filters.items():
+            if value is not None:
+                where.append(f'{column} = ?')
+                params.append(value)
+        sql = f'SELECT * FROM {table}'
+        if where:
+            sql += ' WHERE ' + ' AND '.join(where)
+        df = pd.read_sql_query(sql + ' ORDER BY submitted_at, id', self._reader(), params=params)
+        for column in LIST_COLUMNS & set(df.columns):
+            df[column] = df[column].map(json.loads)
+        return df
+
+    def proposals(self, since=None, until=None, user_id=None, region=None):
+        return self._query('proposals', since, until, user_id=user_id, region=region)
+
+    def self_assessments(self, since=None, until=None, user_id=None):
+        return self._query('self_assessments', since, until, user_id=user_id)
+
+    # 아래는 집계표만 읽는다 (since/until은 날짜, 양 끝 포함)
+    def rating_distribution(self, since=None, until=None):
+        where, params = _day_range(since, until)
+        return pd.read_sql_query(
+            f'SELECT goal, rating, SUM(count) AS count FROM rating_rollup{where} '
+            f'GROUP BY goal, rating ORDER BY goal, rating', self._reader(), params=params)
+
+    def quiz_summary(self, since=None, until=None):
+        where, params = _day_range(since, until)
+        return pd.read_sql_query(
+            f'SELECT question, SUM(correct) AS correct, SUM(total) AS total FROM quiz_rollup{where} '
+            f'GROUP BY question ORDER BY question', self._reader(), params=params)
+
+    def submission_days(self):
+        return [day for (day,) in self._reader().execute('SELECT DISTINCT day FROM quiz_rollup ORDER BY day')]
+
+
+@st.cache_resource(show_spinner=False)
+def load_submission_store(path=DB_PATH):
+    return SubmissionStore(path)
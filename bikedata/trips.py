@@ -0,0 +1,187 @@
+import glob
+import io
+import os
+
+import pandas as pd
+import streamlit as st
+
+from bikedata import columnar, live
+from bikedata.dimension import DISTRICT_IDS, DISTRICT_NAMES, STATION_PATH, UNKNOWN_DISTRICT, district_from_name, load_station_districts
+
+# 월별 파일(bikeborrow_202401.csv 등)을 여러 개 두면 모두 이어서 읽는다
+TRIP_PATTERN = 'bikeborrow*.csv'
+TRIP_PATH = 'bikeborrow.csv'
+CHUNK_ROWS = 500_000
+
+# 페이지에서 쓰는 열만, 자료형을 정해서 읽는다 (없는 열은 건너뛰지만 기준_시간대와 시작_대여소_ID는 있어야 한다)
+# 정수 열은 빈 칸이 있어도 읽히도록 결측값을 허용하는 자료형으로 읽은 뒤 INT_COLUMNS로 줄인다
+TRIP_DTYPES = {
+    '기준_날짜': 'Int32',
+    '기준_시간대': 'Int16',
+    '시작_대여소_ID': 'category',
+    '시작_대여소명': 'category',
+    '종료_대여소_ID': 'category',
+    '종료_대여소명': 'category',
+    '전체_건수': 'Int32',
+    '전체_이용_분': 'float64',
+    '전체_이용_거리': 'float64',
+}
+INT_COLUMNS = {'기준_날짜': 'int32', '기준_시간대': 'int16', '전체_건수': 'int32'}
+# 날짜나 시간대가 빈 행은 어느 칸에도 넣을 수 없어 버린다 (건수가 빈 행은 0건)
+KEY_COLUMNS = ['기준_날짜', '기준_시간대']
+PREVIEW_ROWS = 10
+
+# 파생 열을 만드는 방식이 바뀌면 올려서 예전 디스크 캐시를 버린다
+CACHE_VERSION = 5
+
+
+def trip_files(pattern=TRIP_PATTERN):
+    return sorted(glob.glob(pattern))
+
+
+def _complete_rows(df):
+    keys = [col for col in KEY_COLUMNS if col in df]
+    if keys:
+        df = df[df[keys].notna().all(axis=1)].reset_index(drop=True)
+    for col, dtype in INT_COLUMNS.items():
+        if col in df:
+            df[col] = df[col].fillna(0).to_numpy(dtype=dtype)
+    return df
+
+
+def read_trip_csv(path=TRIP_PATH, chunksize=None):
+    reader = pd.read_csv(path, encoding='cp949', usecols=lambda c: c in TRIP_DTYPES,
+                         dtype=TRIP_DTYPES, chunksize=chunksize)
+    if chunksize is None:
+        return _complete_rows(reader)
+    return (_complete_rows(chunk) for chunk in reader)
+
+
+def derive_columns(df, vectorized=True, districts=None):
+    # 출발 구는 대여소 -> 자치구 차원표에서 (seoul.csv의 자치구_명칭/자치구_ID와 같은 값)
+    districts = load_station_districts() if districts is None else districts
+    if not vectorized:
+        # 예전 방식 (행마다 파이썬 함수 호출) - 결과 비교용으로 남겨 둔다
+        df['시간'] = df['기준_시간대'].astype(str).str.zfill(4)
+        df['시간대'] = pd.to_datetime(df['시간'], format='%H%M').dt.hour
+        by_id = districts.frame['자치구_명칭'].to_dict()
+
+        def start_district(station, name):
+            found = by_id.get(str(station), UNKNOWN_DISTRICT)
+            return district_from_name(name) if found == UNKNOWN_DISTRICT else found
+
+        df['출발_구'] = [start_district(station, name)
+                        for station, name in zip(df['시작_대여소_ID'].astype(object), df['시작_대여소명'].astype(object))]
+        df['자치구_ID'] = df['출발_구'].map(dict(zip(DISTRICT_NAMES, DISTRICT_IDS)))
+        return df
+
+    # 시간대 데이터 처리 - HHMM 정수를 100으로 나눈 몫이 시(hour)
+    base_time = df['기준_시간대'].to_numpy()
+    time_codes, time_values = pd.factorize(base_time, sort=True)
+    df['시간'] = pd.Categorical.from_codes(
+        time_codes, categories=pd.Index(time_values).astype(str).str.zfill(4))
+    df['시간대'] = (base_time // 100).astype('uint8')
+
+    # 출발지 구 - 대여소 ID 범주 코드를 차원표의 자치구 위치로 바꾸는 정수 배열 한 번 (행마다 문자열을 자르지 않는다)
+    position = districts.lookup(df['시작_대여소_ID'], df.get('시작_대여소명'))
+    df['출발_구'] = pd.Categorical.from_codes(position, categories=DISTRICT_NAMES)
+    df['자치구_ID'] = DISTRICT_IDS[position]
+    return df
+
+
+def iter_trip_chunks(paths, chunksize=CHUNK_ROWS):
+    # 파일 여러 개를 조각 단위로 읽어 파생 열까지 붙여서 내보낸다 (한 번에 한 조각만 메모리에)
+    for path in paths:
+        for chunk in read_trip_csv(path, chunksize=chunksize):
+            yield derive_columns(chunk)
+
+
+def read_trip_preview(path=TRIP_PATH, rows=PREVIEW_ROWS):
+    # 원본 맨 앞 몇 행을 모든 열 그대로 (페이지에서 쓰지 않는 열도 보여 준다) + 파생 열
+    df = pd.read_csv(path, encoding='cp949', nrows=rows, dtype={col: TRIP_DTYPES[col] for col in INT_COLUMNS})
+    return derive_columns(_complete_rows(df))
+
+
+@st.cache_data(show_spinner=False)
+def _trip_preview(path, mtime, rows):
+    return read_trip_preview(path, rows)
+
+
+def load_trip_preview(pattern=TRIP_PATTERN, rows=PREVIEW_ROWS):
+    # 첫 파일이 바뀌면 (수정 시각) 다시 읽는다
+    paths = trip_files(pattern)
+    if not paths:
+        raise FileNotFoundError(pattern)
+    return _trip_preview(paths[0], os.path.getmtime(paths[0]), rows)
+
+
+def row_chunks(df, rows=CHUNK_ROWS):
+    # 메모리 매핑된 프레임을 앞에서부터 잘라 읽기 (복사 없이 구간만 본다)
+    for start in range(0, len(df), rows):
+        yield df.iloc[start:start + rows]
+
+
+def ingest_trips(paths, stamp, chunksize=CHUNK_ROWS):
+    writer = columnar.FrameWriter('trips')
+    try:
+        for chunk in iter_trip_chunks(paths, chunksize):
+            writer.append(chunk)
+    except BaseException:
+        writer.abort()
+        raise
+    writer.commit(stamp, CACHE_VERSION)
+
+
+def trip_stamp(paths):
+    # 출발 구를 대여소 표에서 붙이므로 대여소 표가 바뀌어도 캐시를 다시 만든다
+    stamp = columnar.source_stamp(paths) if paths else None
+    if stamp is not None:
+        stamp += columnar.source_stamp([STATION_PATH]) or []
+    return stamp
+
+
+def _load_trip_frame(paths, pattern=TRIP_PATTERN):
+    stamp = trip_stamp(paths)
+    df = columnar.publish_frame('trips', stamp, CACHE_VERSION, lambda stamp: ingest_trips(paths, stamp))
+    if df is None:
+        raise FileNotFoundError(pattern)
+    return df
+
+
+def attach_trips(pattern=TRIP_PATTERN):
+    # 공유 캐시의 이용 데이터 (없으면 만들어 올린다) - 스트림릿 밖(tools/publish_data.py)에서도 쓴다
+    return _load_trip_frame(trip_files(pattern), pattern)
+
+
+def _parse_trip_tail(raw):
+    return derive_columns(read_trip_csv(io.BytesIO(raw)))
+
+
+def _append_trip_tail(df, tail, stamp):
+    # 새 행은 공유 캐시 끝에 덧붙이고 다시 매핑한다 (워커마다 프레임 전체를 메모리로 복사하지 않는다).
+    # 도장이 바뀐 캐시라 서버를 다시 띄워도 처음부터 읽지 않는다
+    stamp = stamp + (columnar.source_stamp([STATION_PATH]) or [])
+    return columnar.append_frame(tail[list(df.columns)], 'trips', len(df), stamp, CACHE_VERSION)
+
+
+# 서버 프로세스마다 한 벌만 두고 모든 세션이 같이 쓴다.
+# 원본 파일 끝에 새 행이 붙으면 그 부분만 읽어 캐시에 덧붙인 새 스냅샷으로 바꿔 끼운다.
+@st.cache_resource(show_spinner='따릉이 이용 데이터를 불러오는 중...')
+def _live_trips(pattern):
+    return live.LiveSource(pattern, lambda paths: _load_trip_frame(paths, pattern), _parse_trip_tail,
+                           _append_trip_tail)
+
+
+def load_live_trips(pattern=TRIP_PATTERN):
+    # 캐시 키는 인자를 넘긴 모양에 따라 달라지므로 항상 같은 모양으로 부른다 (한 프로세스에 한 벌)
+    return _live_trips(pattern)
+
+
+def trip_snapshot(pattern=TRIP_PATTERN):
+    # 프레임과 그 버전을 함께 - 파생 집계의 캐시 키로 버전을 쓴다
+    return load_live_trips(pattern).snapshot
+
+
+def load_trips(pattern=TRIP_PATTERN):
+    # 지금 스냅샷의 프레임 (페이지에서 수정하지 말 것)
+    return trip_snapshot(pattern).value
@@ -0,0 +1,117 @@
+import streamlit as st
+import plotly.express as px
+from datetime import date
+
+from bikedata import finish_profiling, load_submission_store, start_profiling
+
+# 페이지 설정
+st.set_page_config(layout="wide", page_title="교사용: 학급 결과 보기")
+# 성능 측정 (DATABIKE_PROFILE 환경 변수나 ?profile=1 로 켤 때만)
+start_profiling('teacher')
+# 네비게이션 버튼
+col1, col2, col3 = st.columns([1,3,1])
+with col1:
+    if st.button('⬅️ 처음으로'):
+        st.switch_page("app.py")
+
+# CSS 스타일 추가
+st.markdown("""
+    <style>
+        .title {
+            color: #FF6B6B;
+            text-align: center;
+            padding: 20px;
+            font-size: 2.8em;
+            font-weight: bold;
+            background: linear-gradient(120deg, #FFE5E5 0%, #FFF0F0 100%);
+            border-radius: 15px;
+            margin-bottom: 20px;
+        }
+        .subtitle {
+            text-align: center;
+            color: #666;
+            font-size: 1.2em;
+            margin-bottom: 30px;
+        }
+    </style>
+""", unsafe_allow_html=True)
+
+# 교사 계정만 (id.csv의 ROLE 열이 teacher인 계정 - python -m bikedata.auth --teacher 아이디 로 지정)
+if st.session_state.get('role') != 'teacher':
+    st.warning("🔒 교사 계정으로 로그인해야 볼 수 있어요. "
+               "교사 계정은 서버에서 `python -m bikedata.auth --teacher 아이디`로 지정합니다.")
+    st.stop()
+
+# 타이틀
+st.markdown('<h1 class="title">📋 교사용: 학급 결과 보기</h1>', unsafe_allow_html=True)
+st.markdown('<p class="subtitle">5차시 자기 평가와 퀴즈 결과를 학급/학교 단위로 살펴봐요.</p>', unsafe_allow_html=True)
+
+store = load_submission_store()
+days = store.submission_days()
+if not days:
+    st.info("아직 제출된 자기 평가가 없습니다.")
+    st.stop()
+
+# 기간 선택 (하루 = 한 학급 수업, 여러 날 = 학교 전체/학기)
+period = st.date_input(
+    "살펴볼 기간을 선택하세요",
+    value=(date.fromisoformat(days[0]), date.fromisoformat(days[-1])),
+    min_value=date.fromisoformat(days[0]),
+    max_value=date.fromisoformat(days[-1])
+)
+since, until = (period[0], period[-1]) if period else (None, None)
+
+# 집계표에서 바로 읽는다 (제출 수와 상관없이 빠름)
+ratings = store.rating_distribution(since, until)
+quiz = store.quiz_summary(since, until)
+
+goals = [
+    "실생활 데이터의 디지털 활용 가치 이해하기",
+    "목적에 맞는 데이터 수집과 관리",
+    "데이터의 다양한 시각화 방법 이해",
+    "데이터 기반 의미 해석",
+    "데이터를 활용한 융합적 문제 해결"
+]
+
+# 집계표는 날짜별 문항 제출 건수만 들고 있으므로 학생 수가 아니라 제출 수 (한 학생이 두 번 내면 2건)
+submissions = int(quiz['total'].max()) if not quiz.empty else 0
+st.metric("제출 수", f"{submissions:,}건")
+
+# 1. 학습 목표별 이해도 분포
+st.markdown("### 📊 학습 목표별 이해도 분포")
+if not ratings.empty:
+    ratings['학습 목표'] = ratings['goal'].map(lambda g: goals[g - 1])
+    ratings['이해도'] = ratings['rating'].astype(str)
+    fig_ratings = px.bar(ratings,
+                         x='count',
+                         y='학습 목표',
+                         color='이해도',
+                         orientation='h',
+                         category_orders={'학습 목표': goals, '이해도': ['1', '2', '3', '4', '5']},
+                         color_discrete_sequence=px.colors.sequential.RdBu,
+                         labels={'count': '제출 수'},
+                         title='학습 목표별 이해도 (1: 전혀 못함 ~ 5: 매우 잘함)')
+    fig_ratings.update_layout(barmode='stack', height=450)
+    st.plotly_chart(fig_ratings, use_container_width=True)
+
+    averages = ratings.assign(total=ratings['rating'] * ratings['count']).groupby('goal')[['total', 'count']].sum()
+    cols = st.columns(len(goals))
+    for col, (goal, row) in zip(cols, averages.iterrows()):
+        with col:
+            st.metric(f"목표 {goal} 평균", f"{row['total'] / row['count']:.2f}")
+
+# 2. 퀴즈 정답률
+st.markdown("### ✍️ 퀴즈 정답률")
+if not quiz.empty:
+    quiz['문항'] = quiz['question'].map(lambda q: f'퀴즈 {q}')
+    quiz['정답률'] = quiz['correct'] / quiz['total'] * 100
+    fig_quiz = px.bar(quiz,
+                      x='문항',
+                      y='정답률',
+                      text=quiz['정답률'].map(lambda v: f'{v:.0f}%'),
+                      range_y=[0, 100],
+                      labels={'정답률': '정답률(%)'},
+                      title='문항별 정답률')
+    st.plotly_chart(fig_quiz, use_container_width=True)
+
+finish_profiling()
@@ -3,8 +3,12 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from bikedata import cached_figure, finish_profiling, load_district_summary, start_profiling
+
 # 페이지 설정
 st.set_page_config(layout="wide", page_title="1차시: 데이터 시각화의 중요성")
+# 성능 측정 (DATABIKE_PROFILE 환경 변수나 ?profile=1 로 켤 때만)
+start_profiling('week1')
 # 네비게이션 버튼
 col1, col2, col3 = st.columns([1,3,1])
 with col1:
@@ -58,68 +62,68 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# 데이터 로드
-@st.cache_data
-def load_data():
-    df = pd.read_csv('seoul.csv', encoding='cp949')
-    return df
-
 # 타이틀
 st.markdown('<h1 class="title">🚲 1차시: 데이터 시각화의 중요성</h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">서울시 자전거 대여/반납 현황을 다양한 그래프로 알아보아요! 📊</p>', unsafe_allow_html=True)
 
-# 데이터 로드
-df = load_data()
-df = df.drop_duplicates(subset='자치구_명칭', keep='last')
-
 # 탭 생성
 tab1, tab2 = st.tabs(['📊 자치구별 현황', '🥧 비율 분석'])
 
-with tab1:
+
+# 자치구를 고르면 이 탭(선택 상자, 막대 그래프, 합계 카드)만 다시 그린다
+@st.fragment
+def district_comparison():
+    # 자치구마다 최신 값 한 줄 (자치구_명칭 색인, 비율/합계 미리 계산됨)
+    districts = load_district_summary()
+
     st.markdown('<h2 class="tab-title">📊 자치구별 대여/반납 탐험하기</h2>', unsafe_allow_html=True)
     
     st.markdown('<div class="instructions">🎯 궁금한 지역 3곳을 선택해서 비교해보세요!</div>', unsafe_allow_html=True)
 
     selected_districts = st.multiselect(
         '자치구를 3개 선택하세요',
-        df['자치구_명칭'].unique(),
+        districts.names,
         max_selections=3
     )
 
     if selected_districts:
-        filtered_df = df[df['자치구_명칭'].isin(selected_districts)]
-        
-        fig1 = go.Figure()
+        filtered_df = districts.compare(selected_districts)
         
-        fig1.add_trace(go.Bar(
-            name='대여 횟수',
-            x=filtered_df['자치구_명칭'],
-            y=filtered_df['대여_건수'],
-            marker_color='#FF9999'
-        ))
-        
-        fig1.add_trace(go.Bar(
-            name='반납 횟수',
-            x=filtered_df['자치구_명칭'],
-            y=filtered_df['반납_건수'],
-            marker_color='#66B2FF'
-        ))
-        
-        fig1.update_layout(
-            barmode='group',
-            xaxis_title='우리 동네',
-            yaxis_title='이용 횟수',
-            height=500,
-            paper_bgcolor='rgba(0,0,0,0)',
-            plot_bgcolor='rgba(0,0,0,0)',
-            font=dict(size=14)
-        )
+        def build_district_bar():
+            fig1 = go.Figure()
+            
+            fig1.add_trace(go.Bar(
+                name='대여 횟수',
+                x=filtered_df['자치구_명칭'],
+                y=filtered_df['대여_건수'],
+                marker_color='#FF9999'
+            ))
+            
+            fig1.add_trace(go.Bar(
+                name='반납 횟수',
+                x=filtered_df['자치구_명칭'],
+                y=filtered_df['반납_건수'],
+                marker_color='#66B2FF'
+            ))
+            
+            fig1.update_layout(
+                barmode='group',
+                xaxis_title='우리 동네',
+                yaxis_title='이용 횟수',
+                height=500,
+                paper_bgcolor='rgba(0,0,0,0)',
+                plot_bgcolor='rgba(0,0,0,0)',
+                font=dict(size=14)
+            )
+            return fig1
         
+        # 같은 자치구 조합이면 이미 만든 그림을 다시 쓴다 (자료가 바뀌면 버전이 달라진다)
+        fig1 = cached_figure('week1', 'district_bar', (districts.version, tuple(sorted(selected_districts))), build_district_bar)
         st.plotly_chart(fig1, use_container_width=True)
 
         # 통계 카드 
-        total_rental = filtered_df['대여_건수'].sum()
-        total_return = filtered_df['반납_건수'].sum()
+        total_rental = districts.total('대여_건수', selected_districts)
+        total_return = districts.total('반납_건수', selected_districts)
 
         col1, col2 = st.columns(2)
         with col1:
@@ -137,7 +141,12 @@ with tab1:
                 </div>
             """, unsafe_allow_html=True)
 
-with tab2:
+
+# 대여/반납을 바꾸면 원그래프만 다시 보낸다
+@st.fragment
+def district_ratio():
+    districts = load_district_summary()
+
     st.markdown('<h2 class="tab-title">🥧 자치구별 비율 살펴보기</h2>', unsafe_allow_html=True)
     
     st.markdown('<div class="instructions">🔄 대여와 반납 중 하나를 선택해서 비율을 확인해보세요!</div>', unsafe_allow_html=True)
@@ -148,23 +157,34 @@ with tab2:
         format_func=lambda x: '대여 횟수' if x == '대여_건수' else '반납 횟수'
     )
 
-    fig2 = px.pie(
-        df,
-        values=metric_choice,
-        names='자치구_명칭',
-        title=f'우리 동네별 {metric_choice.split("_")[0]} 비율',
-        color_discrete_sequence=px.colors.qualitative.Set3
-    )
+    def build_district_pie():
+        fig2 = px.pie(
+            districts.frame.reset_index(),
+            values=metric_choice,
+            names='자치구_명칭',
+            title=f'우리 동네별 {metric_choice.split("_")[0]} 비율',
+            color_discrete_sequence=px.colors.qualitative.Set3
+        )
 
-    fig2.update_layout(
-        height=700,
-        font=dict(size=12)
-    )
-    fig2.update_traces(textposition='inside', textinfo='percent+label')
+        fig2.update_layout(
+            height=700,
+            font=dict(size=12)
+        )
+        # 비율은 불러올 때 계산해 둔 값을 그대로 쓴다
+        ratio = districts.frame[metric_choice.replace('건수', '비율')]
+        fig2.update_traces(text=ratio.map(lambda v: f'{v:.1f}%'), textposition='inside', textinfo='label+text')
+        return fig2
 
+    # 대여/반납 두 가지뿐이므로 한 번씩만 만들면 된다
+    fig2 = cached_figure('week1', 'district_pie', (districts.version, metric_choice), build_district_pie)
     st.plotly_chart(fig2, use_container_width=True)
-    
-    
+
+
+with tab1:
+    district_comparison()
+
+with tab2:
+    district_ratio()
 
 # 학습 퀴즈 섹션
 st.markdown("""
@@ -187,17 +207,23 @@ example_data = pd.DataFrame({
 })
 st.dataframe(example_data)
 
-q1 = st.radio(
-    "Q. 위 표에서 가장 많이 대여된 대여소를 찾으려면 어떤 느낌인가요?",
-    [
-        "한눈에 쉽게 알 수 있다",
-        "숫자를 하나하나 비교해봐야 해서 시간이 걸린다",
-        "어려운 계산이 필요하다"
-    ]
-)
+# 답을 고르면 그 퀴즈만 다시 그린다
+@st.fragment
+def quiz1():
+    q1 = st.radio(
+        "Q. 위 표에서 가장 많이 대여된 대여소를 찾으려면 어떤 느낌인가요?",
+        [
+            "한눈에 쉽게 알 수 있다",
+            "숫자를 하나하나 비교해봐야 해서 시간이 걸린다",
+            "어려운 계산이 필요하다"
+        ]
+    )
+
+    if q1 == "숫자를 하나하나 비교해봐야 해서 시간이 걸린다":
+        st.success("정답입니다! 👏 숫자로만 된 데이터는 비교하기 어렵죠.")
+
 
-if q1 == "숫자를 하나하나 비교해봐야 해서 시간이 걸린다":
-    st.success("정답입니다! 👏 숫자로만 된 데이터는 비교하기 어렵죠.")
+quiz1()
 
 # 퀴즈 2: 시각화된 데이터 보기
 st.markdown("""
@@ -206,24 +232,33 @@ st.markdown("""
     </div>
 """, unsafe_allow_html=True)
 
-# 막대 그래프로 시각화
-fig = go.Figure(data=[
-    go.Bar(x=example_data['대여소'], y=example_data['대여횟수'])
-])
-fig.update_layout(title="대여소별 대여횟수")
+# 막대 그래프로 시각화 (내용이 고정이라 서버에서 한 번만 만든다)
+def build_example_bar():
+    fig = go.Figure(data=[
+        go.Bar(x=example_data['대여소'], y=example_data['대여횟수'])
+    ])
+    fig.update_layout(title="대여소별 대여횟수")
+    return fig
+
+fig = cached_figure('week1', 'quiz2_bar', (), build_example_bar)
 st.plotly_chart(fig)
 
-q2 = st.radio(
-    "Q. 이제 가장 많이 대여된 대여소를 찾을 수 있나요?",
-    [
-        "그래프로 보니 한눈에 알 수 있다",
-        "여전히 찾기 어렵다",
-        "잘 모르겠다"
-    ]
-)
+@st.fragment
+def quiz2():
+    q2 = st.radio(
+        "Q. 이제 가장 많이 대여된 대여소를 찾을 수 있나요?",
+        [
+            "그래프로 보니 한눈에 알 수 있다",
+            "여전히 찾기 어렵다",
+            "잘 모르겠다"
+        ]
+    )
+
+    if q2 == "그래프로 보니 한눈에 알 수 있다":
+        st.success("정답입니다! 👏 시각화하면 훨씬 쉽게 비교할 수 있죠.")
+
 
-if q2 == "그래프로 보니 한눈에 알 수 있다":
-    st.success("정답입니다! 👏 시각화하면 훨씬 쉽게 비교할 수 있죠.")
+quiz2()
 
 # 마무리 메시지
 st.markdown("""
@@ -233,4 +268,6 @@ st.markdown("""
         <p>2. 대여 횟수와 반납 횟수의 차이는 무엇을 의미할까요?</p>
         <p>3. 우리 동네는 다른 동네와 비교하면 어떤가요?</p>
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_profiling()
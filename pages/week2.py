@@ -2,9 +2,15 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
+import streamlit.components.v1 as components
+
+from bikedata import finish_profiling, load_district_summary, load_duration_histogram, load_flow_map_html, load_od_matrix, load_trip_cube, load_trip_preview, start_profiling
+from bikedata.charts import histogram_figure
 
 # 페이지 설정
 st.set_page_config(layout="wide", page_title="2차시: 데이터 분석의 중요성")
+# 성능 측정 (DATABIKE_PROFILE 환경 변수나 ?profile=1 로 켤 때만)
+start_profiling('week2')
 # 네비게이션 버튼
 col1, col2, col3 = st.columns([1,3,1])
 with col1:
@@ -42,47 +48,37 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-# 데이터 로드 함수
-@st.cache_data
-def load_data():
-    df = pd.read_csv('bikeborrow.csv', encoding='cp949')
-    # 시간대 데이터 처리
-    df['시간'] = df['기준_시간대'].astype(str).str.zfill(4)
-    df['시간대'] = pd.to_datetime(df['시간'], format='%H%M').dt.hour
-    # 출발지 구 추출 - NaN 값 처리 추가
-    df['출발_구'] = df['시작_대여소명'].fillna('').astype(str).apply(
-        lambda x: x.split('_')[0].replace('동', '').strip() if x else '알수없음'
-    )
-    return df
-
 # 타이틀
 st.markdown('<h1 class="title">🚲 2차시: 데이터로 보는 따릉이 이야기</h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">우리 동네 사람들은 언제, 어디서, 어떻게 따릉이를 이용할까요?</p>', unsafe_allow_html=True)
 
-# 데이터 로드
-df = load_data()
+# 데이터 로드 (모든 페이지가 함께 쓰는 캐시)
+cube = load_trip_cube()
+durations = load_duration_histogram()
+od_matrix = load_od_matrix()
 
 # 전체 데이터 미리보기
 st.markdown("### 📊 전체 데이터 살펴보기")
 st.markdown('<div class="data-info">먼저 전체 데이터를 살펴볼까요?</div>', unsafe_allow_html=True)
-st.dataframe(df.head(10))
+# 원본 맨 앞 10행은 모든 열 그대로 (집계에 쓰지 않는 열도 보이도록 따로 읽는다)
+st.dataframe(load_trip_preview())
 
 # 지역 선택
 st.markdown("### 🎯 지역 선택하기")
 selected_region = st.selectbox(
     "분석하고 싶은 지역을 선택하세요",
-    sorted(df['출발_구'].unique())
+    sorted(cube.observed_regions())
 )
 
-# 선택된 지역의 데이터만 필터링
-filtered_df = df[df['출발_구'] == selected_region]
+# 선택된 지역의 요약값은 미리 만든 집계표에서 바로 꺼낸다
+region_summary = cube.summary(selected_region)
 
-if not filtered_df.empty:
+if region_summary['rows'] > 0:
     st.markdown(f"## 📈 {selected_region} 따릉이 이용 분석")
     
     # 1. 시간대별 이용 현황
     st.markdown("### ⏰ 시간대별 이용 현황")
-    hourly_usage = filtered_df.groupby('시간대')['전체_건수'].sum().reset_index()
+    hourly_usage = cube.hourly(selected_region)
     
     fig_time = px.line(hourly_usage, 
                        x='시간대', 
@@ -96,18 +92,18 @@ if not filtered_df.empty:
     # 2. 이용 시간 분포
     st.markdown("### ⌛ 이용 시간 분포")
     
-    fig_duration = px.histogram(filtered_df, 
-                               x='전체_이용_분',
-                               title=f'{selected_region} 이용 시간 분포',
-                               labels={'전체_이용_분': '이용 시간(분)', 'count': '건수'},
-                               nbins=30)
+    # 구마다 미리 센 30칸 막대 높이만 보낸다 (원본 행을 거르지 않는다)
+    edges, duration_counts = durations.region(selected_region)
+    fig_duration = histogram_figure(edges, duration_counts,
+                                    title=f'{selected_region} 이용 시간 분포',
+                                    labels={'x': '이용 시간(분)', 'y': '건수'})
     
     fig_duration.update_layout(height=400)
     st.plotly_chart(fig_duration, use_container_width=True)
     
     # 3. 주요 목적지 분석
     st.markdown("### 🎯 주요 목적지 TOP 10")
-    destination_counts = filtered_df.groupby('종료_대여소명')['전체_건수'].sum().sort_values(ascending=False).head(10)
+    destination_counts = od_matrix.top_destinations(selected_region, k=10)
     
     fig_dest = px.bar(destination_counts,
                       title=f'{selected_region} 주요 목적지',
@@ -116,19 +112,37 @@ if not filtered_df.empty:
     
     fig_dest.update_layout(height=500)
     st.plotly_chart(fig_dest, use_container_width=True)
+
+    # 4. 가장 많이 오간 경로
+    st.markdown("### 🔀 가장 많이 오간 경로")
+    st.markdown('<div class="data-info">선이 굵을수록 그 경로로 이동한 사람이 많아요.</div>', unsafe_allow_html=True)
+    components.html(load_flow_map_html(selected_region), height=450)
     
     # 통계 요약
     st.markdown("### 📊 이용 통계 요약")
     col1, col2, col3 = st.columns(3)
     
     with col1:
-        st.metric("총 이용 건수", f"{filtered_df['전체_건수'].sum():,}건")
+        st.metric("총 이용 건수", f"{region_summary['count']:,}건")
     with col2:
-        avg_duration = filtered_df['전체_이용_분'].mean()
+        avg_duration = region_summary['mean_minutes']
         st.metric("평균 이용 시간", f"{avg_duration:.1f}분")
     with col3:
-        avg_distance = filtered_df['전체_이용_거리'].mean()
+        avg_distance = region_summary['mean_distance']
         st.metric("평균 이동 거리", f"{avg_distance:.0f}m")
+
+    # 출발 구는 대여소 주소에서 찾은 실제 자치구라 1차시 자치구 현황(seoul.csv)과 이름으로 바로 이어진다
+    districts = load_district_summary()
+    if selected_region in districts.frame.index:
+        st.markdown("### 🗺️ 1차시 자치구 현황과 비교하기")
+        district_row = districts.frame.loc[selected_region]
+        col1, col2, col3 = st.columns(3)
+        with col1:
+            st.metric("자치구 대여 건수", f"{int(district_row['대여_건수']):,}건")
+        with col2:
+            st.metric("자치구 반납 건수", f"{int(district_row['반납_건수']):,}건")
+        with col3:
+            st.metric("서울 전체 대여 중 비율", f"{district_row['대여_비율']:.1f}%")
     
     # 추가 인사이트
     st.markdown("""
@@ -143,4 +157,6 @@ if not filtered_df.empty:
     """, unsafe_allow_html=True)
     
 else:
-    st.warning("선택한 지역의 데이터가 없습니다.")
\ No newline at end of file
+    st.warning("선택한 지역의 데이터가 없습니다.")
+
+finish_profiling()
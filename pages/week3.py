@@ -3,8 +3,13 @@ import pandas as pd
 import plotly.express as px
 import plotly.graph_objects as go
 
+from bikedata import finish_profiling, load_duration_index, load_trips, load_trip_cube, start_profiling, trip_snapshot
+from bikedata.charts import SCATTER_MAX_POINTS, density_figure, load_scatter_density, load_scatter_sample
+
 # 페이지 설정
 st.set_page_config(layout="wide", page_title="3차시: 따릉이 이용 시간 분석")
+# 성능 측정 (DATABIKE_PROFILE 환경 변수나 ?profile=1 로 켤 때만)
+start_profiling('week3')
 # 네비게이션 버튼
 col1, col2, col3 = st.columns([1,3,1])
 with col1:
@@ -43,28 +48,22 @@ st.markdown("""
     </style>
 """, unsafe_allow_html=True)
 
-@st.cache_data
-def load_data():
-    df = pd.read_csv('bikeborrow.csv', encoding='cp949')
-    df['시간'] = df['기준_시간대'].astype(str).str.zfill(4)
-    df['시간대'] = pd.to_datetime(df['시간'], format='%H%M').dt.hour
-    df['출발_구'] = df['시작_대여소명'].fillna('').astype(str).apply(
-        lambda x: x.split('_')[0].replace('동', '').strip() if x else '알수없음'
-    )
-    return df
-
 # 타이틀
 st.markdown('<h1 class="title">🚲 3차시: 운행시간 데이터 분석 </h1>', unsafe_allow_html=True)
 st.markdown('<p class="subtitle">누가, 언제, 얼마나 오래 따릉이를 탈까요? 🤔</p>', unsafe_allow_html=True)
 
-# 데이터 로드
-df = load_data()
+# 데이터 로드 (모든 페이지가 함께 쓰는 캐시)
+# 색인이 가리키는 행 위치가 맞도록 프레임과 색인은 같은 스냅샷에서 꺼낸다
+snapshot = trip_snapshot()
+df = snapshot.value
+cube = load_trip_cube()
+duration_index = load_duration_index(snapshot)
 
 # 1. 가장 긴 이용 시간 분석
 st.markdown("### 🏆 최장 시간 이용자 분석")
 
 # Top 10 최장 시간 이용자
-top_duration = df.nlargest(10, '전체_이용_분')
+top_duration = duration_index.longest(df, 10)
 fig_top = px.bar(top_duration, 
                  x='전체_이용_분', 
                  y='시작_대여소명',
@@ -74,62 +73,94 @@ fig_top = px.bar(top_duration,
 st.plotly_chart(fig_top, use_container_width=True)
 
 # 2. 장거리 이용자 특징 분석
-st.markdown("### 🔍 장시간 이용자들의 특징")
-
-# 이용 시간 기준 설정
-time_threshold = st.slider('장시간 이용 기준 설정 (분)', 
-                          min_value=10, 
-                          max_value=int(df['전체_이용_분'].max()),
-                          value=30)
-
-long_rides = df[df['전체_이용_분'] >= time_threshold]
-
-col1, col2 = st.columns(2)
-
-with col1:
-    # 시간대별 장거리 이용 분포
-    hourly_long = long_rides.groupby('시간대')['전체_건수'].sum().reset_index()
-    fig_hourly = px.line(hourly_long, 
-                        x='시간대', 
-                        y='전체_건수',
-                        title=f'{time_threshold}분 이상 이용 - 시간대별 분포',
-                        labels={'시간대': '시간', '전체_건수': '이용 건수'})
-    st.plotly_chart(fig_hourly)
-
-with col2:
-    # 출발 지역별 장거리 이용 분포
-    region_long = long_rides.groupby('출발_구')['전체_건수'].sum().sort_values(ascending=True).tail(10)
-    fig_region = px.bar(region_long, 
-                       orientation='h',
-                       title=f'{time_threshold}분 이상 이용 - 지역별 분포',
-                       labels={'value': '이용 건수', 'index': '지역'})
-    st.plotly_chart(fig_region)
-
-# 3. 상세 통계
-st.markdown("### 📊 상세 통계")
-
-col1, col2, col3 = st.columns(3)
-with col1:
-    st.metric("평균 이용 시간", f"{df['전체_이용_분'].mean():.1f}분")
-with col2:
-    st.metric("최장 이용 시간", f"{df['전체_이용_분'].max():.0f}분")
-with col3:
-    long_ride_percent = (len(long_rides) / len(df)) * 100
-    st.metric(f"{time_threshold}분 이상 이용 비율", f"{long_ride_percent:.1f}%")
+# 기준값을 옮기면 이 부분(두 그래프와 상세 통계)만 다시 그린다
+@st.fragment
+def long_ride_section():
+    overall = load_trip_cube().summary()
+    duration_index = load_duration_index()
+
+    st.markdown("### 🔍 장시간 이용자들의 특징")
+
+    # 이용 시간 기준 설정
+    time_threshold = st.slider('장시간 이용 기준 설정 (분)', 
+                              min_value=10, 
+                              max_value=int(overall['max_minutes']),
+                              value=30)
+
+    # 기준값이 바뀌어도 전체 행을 다시 거르지 않고 미리 만든 색인에서 읽는다
+    col1, col2 = st.columns(2)
+
+    with col1:
+        # 시간대별 장거리 이용 분포
+        hourly_long = duration_index.hourly_at_least(time_threshold)
+        fig_hourly = px.line(hourly_long, 
+                            x='시간대', 
+                            y='전체_건수',
+                            title=f'{time_threshold}분 이상 이용 - 시간대별 분포',
+                            labels={'시간대': '시간', '전체_건수': '이용 건수'})
+        st.plotly_chart(fig_hourly)
+
+    with col2:
+        # 출발 지역별 장거리 이용 분포
+        region_long = duration_index.regions_at_least(time_threshold).sort_values(ascending=True).tail(10)
+        fig_region = px.bar(region_long, 
+                           orientation='h',
+                           title=f'{time_threshold}분 이상 이용 - 지역별 분포',
+                           labels={'value': '이용 건수', 'index': '지역'})
+        st.plotly_chart(fig_region)
+
+    # 3. 상세 통계
+    st.markdown("### 📊 상세 통계")
+
+    col1, col2, col3 = st.columns(3)
+    with col1:
+        st.metric("평균 이용 시간", f"{overall['mean_minutes']:.1f}분")
+    with col2:
+        st.metric("최장 이용 시간", f"{overall['max_minutes']:.0f}분")
+    with col3:
+        long_ride_percent = duration_index.share_at_least(time_threshold) * 100
+        st.metric(f"{time_threshold}분 이상 이용 비율", f"{long_ride_percent:.1f}%")
+
+
+long_ride_section()
 
 # 4. 장거리 이용 패턴 분석
 st.markdown("### 🎯 장거리 이용 패턴")
 
-# 이용 시간과 이동 거리의 관계
-fig_scatter = px.scatter(df, 
-                        x='전체_이용_분', 
-                        y='전체_이용_거리',
-                        title='이용 시간과 이동 거리의 관계',
-                        labels={'전체_이용_분': '이용 시간(분)', 
-                               '전체_이용_거리': '이동 거리(m)'},
-                        opacity=0.6)
 
-st.plotly_chart(fig_scatter, use_container_width=True)
+# 보기 방식을 바꾸면 산점도만 다시 보낸다
+@st.fragment
+def scatter_section():
+    df = load_trips()
+
+    # 이용 시간과 이동 거리의 관계
+    # 행이 너무 많으면 모든 점을 브라우저로 보내지 않고 서버에서 줄인 표본이나 밀도로 보여준다
+    scatter_view = '모든 점'
+    if len(df) > SCATTER_MAX_POINTS:
+        scatter_view = st.radio('보기 방식', ['표본 점', '밀도'], horizontal=True,
+                                help=f'데이터가 많아서 {SCATTER_MAX_POINTS:,}개 정도의 점만 골라 보여줘요. '
+                                     '드문 점(특이한 이용)은 빠짐없이 남겨요.')
+
+    if scatter_view == '밀도':
+        fig_scatter = density_figure(load_scatter_density(),
+                                     title='이용 시간과 이동 거리의 관계',
+                                     labels={'x': '이용 시간(분)', 'y': '이동 거리(m)'})
+    else:
+        scatter_df = df if scatter_view == '모든 점' else load_scatter_sample()
+        fig_scatter = px.scatter(scatter_df, 
+                                x='전체_이용_분', 
+                                y='전체_이용_거리',
+                                title='이용 시간과 이동 거리의 관계',
+                                labels={'전체_이용_분': '이용 시간(분)', 
+                                       '전체_이용_거리': '이동 거리(m)'},
+                                opacity=0.6)
+
+    st.plotly_chart(fig_scatter, use_container_width=True)
+    if scatter_view == '표본 점':
+        st.caption(f"전체 {len(df):,}건 중 {len(scatter_df):,}건을 골라 표시했어요.")
+
+
+scatter_section()
 
 # 분석 인사이트
 st.markdown("""
@@ -145,10 +176,12 @@ st.markdown("""
 
 # 시간대별 평균 이용 시간
 st.markdown("### ⏰ 시간대별 평균 이용 시간")
-hourly_avg = df.groupby('시간대')['전체_이용_분'].mean().reset_index()
+hourly_avg = cube.hourly_mean_minutes()
 fig_hourly_avg = px.line(hourly_avg, 
                         x='시간대', 
                         y='전체_이용_분',
                         title='시간대별 평균 이용 시간',
                         labels={'시간대': '시간', '전체_이용_분': '평균 이용 시간(분)'})
-st.plotly_chart(fig_hourly_avg, use_container_width=True)
\ No newline at end of file
+st.plotly_chart(fig_hourly_avg, use_container_width=True)
+
+finish_profiling()
@@ -1,11 +1,14 @@
 import streamlit as st
 import pandas as pd
 import plotly.express as px
-import folium
-from streamlit_folium import folium_static
+import streamlit.components.v1 as components
+
+from bikedata import finish_profiling, load_net_flow, load_net_flow_map_html, load_station_index, load_station_map_html, load_submission_store, start_profiling
 
 # 페이지 설정
 st.set_page_config(layout="wide", page_title="4차시: 따릉이 공공사업 제안")
+# 성능 측정 (DATABIKE_PROFILE 환경 변수나 ?profile=1 로 켤 때만)
+start_profiling('week4')
 # 네비게이션 버튼
 col1, col2, col3 = st.columns([1,3,1])
 with col1:
@@ -97,6 +100,112 @@ data_usage = st.text_area("그 데이터를 분석하여 어떻게 사용하고
                         help="예시: 연령대별 맞춤 서비스 개발, 날씨 기반 대여소 운영 계획 등")
 
 
+# 대여소 지도
+st.markdown("### 🗺️ 서울시 따릉이 대여소 지도")
+
+map_view = st.radio(
+    "지도를 어떻게 볼까요?",
+    ["구역별로 묶어 보기", "대여소 하나씩 보기"],
+    horizontal=True,
+    help="구역별: 약 1km 격자마다 대여소를 묶어 원 크기로 이용량을 보여줘요. "
+         "대여소별: 확대하면 묶음이 풀리면서 대여소가 하나씩 보여요."
+)
+components.html(
+    load_station_map_html('grid' if map_view == "구역별로 묶어 보기" else 'cluster'),
+    height=520
+)
+
+# 주변 대여소 찾기
+st.markdown("### 📍 우리 학교 주변 대여소 찾기")
+st.markdown("""
+    <div class="analysis-box">
+        <p>지도에서 학교 위치의 위도/경도를 찾아 입력해보세요. (기본값: 서울시청)</p>
+    </div>
+""", unsafe_allow_html=True)
+
+station_index = load_station_index()
+col1, col2, col3 = st.columns(3)
+with col1:
+    search_lat = st.number_input("위도", value=37.5665, format="%.6f")
+with col2:
+    search_lon = st.number_input("경도", value=126.9780, format="%.6f")
+with col3:
+    search_radius = st.slider("반경 (m)", min_value=100, max_value=3000, value=500, step=100)
+
+nearby = station_index.within(search_lat, search_lon, search_radius)
+nearest = station_index.nearest(search_lat, search_lon, k=5)
+
+col1, col2 = st.columns([1, 2])
+with col1:
+    st.metric(f"{search_radius}m 안의 대여소", f"{len(nearby)}곳")
+with col2:
+    st.markdown("**가장 가까운 대여소 5곳**")
+    st.dataframe(
+        nearest[['대여소_ID', '주소1', '주소2', '거리_m']].round({'거리_m': 0}),
+        hide_index=True,
+        use_container_width=True
+    )
+
+# 아침에 비고 저녁에 차는 대여소
+st.markdown("### 🔄 자전거가 빠져나가는 대여소, 쌓이는 대여소")
+st.markdown("""
+    <div class="analysis-box">
+        <p>대여(빠져나감)와 반납(들어옴)의 차이를 시간대별로 보면 어느 대여소에 자전거를 옮겨 놓아야 할지 알 수 있어요.</p>
+    </div>
+""", unsafe_allow_html=True)
+
+
+# 시간대를 바꾸면 이 부분(표, 재고 그래프, 지도)만 다시 그린다
+@st.fragment
+def net_flow_section():
+    try:
+        net_flow = load_net_flow()
+    except FileNotFoundError:
+        st.info("이용 데이터(bikeborrow.csv)가 없어서 대여소별 흐름을 계산할 수 없어요.")
+        return
+
+    start_hour, end_hour = st.select_slider(
+        "살펴볼 시간대",
+        options=list(range(25)),
+        value=(7, 10),
+        format_func=lambda hour: f"{hour}시"
+    )
+    if start_hour == end_hour:
+        # 한 점만 고르면 그 시각부터 한 시간
+        start_hour = min(start_hour, 23)
+        end_hour = start_hour + 1
+    hours = range(start_hour, end_hour)
+    st.caption(f"{net_flow.days}일 동안의 하루 평균 (순유입 = 반납 - 대여)")
+
+    drain = net_flow.top_imbalance(10, hours, 'drain')
+    fill = net_flow.top_imbalance(10, hours, 'fill')
+    col1, col2 = st.columns(2)
+    with col1:
+        st.markdown("**🔻 자전거가 빠져나가는 대여소**")
+        st.dataframe(drain.round(1), hide_index=True, use_container_width=True)
+    with col2:
+        st.markdown("**🔺 자전거가 쌓이는 대여소**")
+        st.dataframe(fill.round(1), hide_index=True, use_container_width=True)
+
+    # 0시 재고를 0으로 두고 하루 동안 몇 대가 줄고 느는지
+    watched = list(drain['대여소_ID'][:3]) + list(fill['대여소_ID'][:2])
+    if watched:
+        inventory = net_flow.inventory(watched).reset_index().melt(
+            id_vars='시간대', var_name='대여소', value_name='재고 변화')
+        fig_inventory = px.line(inventory,
+                                x='시간대',
+                                y='재고 변화',
+                                color='대여소',
+                                title='하루 동안의 누적 재고 변화 (0시 기준)',
+                                labels={'시간대': '시간', '재고 변화': '자전거 수 변화(대)'})
+        st.plotly_chart(fig_inventory, use_container_width=True)
+
+    st.markdown("🔴 빠져나감 · 🔵 쌓임 (원이 클수록 차이가 커요)")
+    components.html(load_net_flow_map_html(hours), height=450)
+
+
+net_flow_section()
+
 # 프로젝트 제안 섹션
 st.markdown("### 💡 공공사업 아이디어 제안")
 
@@ -140,8 +249,27 @@ expected_budget = st.number_input("예상 소요 비용 (만원)", min_value=0)
 
 # 제출 버튼
 if st.button("아이디어 제출하기"):
-    st.balloons()
-    st.success("멋진 아이디어네요! 👏")
+    saved = load_submission_store().add_proposal(
+        st.session_state.get('user_id', '익명'),
+        time_pattern=time_pattern,
+        usage_pattern=usage_pattern,
+        additional_data=additional_data,
+        data_usage=data_usage,
+        region=selected_region,
+        project_types=project_type,
+        target_time=target_time,
+        effects=effects,
+        title=project_title,
+        description=project_description,
+        budget=expected_budget,
+    )
+    try:
+        saved.result(timeout=10)
+    except Exception:
+        st.error("제출 내용을 저장하지 못했어요. 잠시 후 다시 눌러주세요.")
+    else:
+        st.balloons()
+        st.success("멋진 아이디어네요! 👏")
     
     # 제출된 아이디어 요약
     st.markdown("""
@@ -179,4 +307,6 @@ st.markdown("""
             <li>기대되는 효과를 구체적으로 설명하세요</li>
         </ul>
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_profiling()
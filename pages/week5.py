@@ -2,8 +2,12 @@ import streamlit as st
 import pandas as pd
 import plotly.express as px
 
+from bikedata import finish_profiling, load_submission_store, start_profiling
+
 # 페이지 설정
 st.set_page_config(layout="wide", page_title="5차시: 데이터 분석 정리하기")
+# 성능 측정 (DATABIKE_PROFILE 환경 변수나 ?profile=1 로 켤 때만)
+start_profiling('week5')
 # 네비게이션 버튼
 col1, col2, col3 = st.columns([1,3,1])
 with col1:
@@ -76,107 +80,130 @@ st.markdown("""
 st.markdown("### 📊 나의 학습 성취도 체크")
 
 # 학습 목표별 이해도 체크
-understanding_levels = {
-    "실생활 데이터의 디지털 활용 가치를 이해했나요?": 0,
-    "목적에 맞는 데이터를 수집하고 관리할 수 있나요?": 0,
-    "데이터를 다양한 형태로 시각화할 수 있나요?": 0,
-    "데이터를 기반으로 의미를 해석할 수 있나요?": 0,
-    "데이터를 활용해 문제를 해결할 수 있나요?": 0
-}
-
-for question in understanding_levels.keys():
-    understanding_levels[question] = st.slider(
-        question,
-        min_value=1,
-        max_value=5,
-        value=3,
-        help="1: 전혀 못함, 5: 매우 잘함"
-    )
-
-# 이해도 시각화
-understanding_df = pd.DataFrame({
-    '학습 목표': list(understanding_levels.keys()),
-    '이해도': list(understanding_levels.values())
-})
-
-fig = px.bar(understanding_df, 
-            x='이해도', 
-            y='학습 목표',
-            orientation='h',
-            title='나의 학습 목표 달성도')
-
-st.plotly_chart(fig, use_container_width=True)
+QUESTIONS = [
+    "실생활 데이터의 디지털 활용 가치를 이해했나요?",
+    "목적에 맞는 데이터를 수집하고 관리할 수 있나요?",
+    "데이터를 다양한 형태로 시각화할 수 있나요?",
+    "데이터를 기반으로 의미를 해석할 수 있나요?",
+    "데이터를 활용해 문제를 해결할 수 있나요?"
+]
+
+
+# 슬라이더를 움직이면 이 부분(슬라이더와 그래프)만 다시 그린다
+@st.fragment
+def self_assessment():
+    understanding_levels = {}
+    for i, question in enumerate(QUESTIONS):
+        understanding_levels[question] = st.slider(
+            question,
+            min_value=1,
+            max_value=5,
+            value=3,
+            help="1: 전혀 못함, 5: 매우 잘함",
+            key=f'rating_{i}'
+        )
+
+    # 이해도 시각화
+    understanding_df = pd.DataFrame({
+        '학습 목표': list(understanding_levels.keys()),
+        '이해도': list(understanding_levels.values())
+    })
+
+    fig = px.bar(understanding_df, 
+                x='이해도', 
+                y='학습 목표',
+                orientation='h',
+                title='나의 학습 목표 달성도')
+
+    st.plotly_chart(fig, use_container_width=True)
+
+
+self_assessment()
 
 # 학습 내용 확인 퀴즈
 st.markdown("### ✍️ 학습 내용 확인하기")
 
-# 퀴즈 1
-st.markdown("""
-    <div class="evaluation-box">
-        <h4>1. 데이터 분석의 가치</h4>
-    </div>
-""", unsafe_allow_html=True)
-
-q1 = st.radio(
-    "따릉이 데이터 분석을 통해 알 수 있는 가장 중요한 정보는 무엇일까요?",
-    ["자전거의 수명", "이용자들의 패턴과 필요", "자전거의 가격", "날씨 정보"]
-)
-
-if st.button('정답 확인 1'):
-    if q1 == "이용자들의 패턴과 필요":
-        st.success("정답입니다! 데이터 분석을 통해 사용자들의 필요와 패턴을 파악할 수 있어요.")
-    else:
-        st.error("다시 생각해보세요. 데이터 분석의 주요 목적은 무엇일까요?")
-
-# 퀴즈 2
-st.markdown("""
-    <div class="evaluation-box">
-        <h4>2. 데이터 시각화의 중요성</h4>
-    </div>
-""", unsafe_allow_html=True)
-
-q2 = st.radio(
-    "데이터 시각화가 중요한 이유는 무엇인가요?",
-    ["단순히 예쁘게 보이기 위해",
-     "복잡한 데이터를 이해하기 쉽게 표현하기 위해",
-     "컴퓨터 활용 능력을 보여주기 위해",
-     "최신 트렌드를 따르기 위해"]
-)
-
-if st.button('정답 확인 2'):
-    if q2 == "복잡한 데이터를 이해하기 쉽게 표현하기 위해":
-        st.success("정답입니다! 시각화는 복잡한 데이터를 쉽게 이해할 수 있게 도와줍니다.")
-    else:
-        st.error("다시 생각해보세요. 시각화의 주요 목적은 무엇일까요?")
-
-# 퀴즈 3
-st.markdown("""
-    <div class="evaluation-box">
-        <h4>3. 데이터 기반 의사결정</h4>
-    </div>
-""", unsafe_allow_html=True)
-
-q3 = st.radio(
-    "새로운 따릉이 대여소 위치를 정할 때 가장 중요한 데이터는 무엇일까요?",
-    ["자전거 색상에 대한 선호도",
-     "이용자의 연령대",
-     "주변 지역의 이용 패턴과 수요",
-     "자전거 브랜드 선호도"]
-)
-
-if st.button('정답 확인 3'):
-    if q3 == "주변 지역의 이용 패턴과 수요":
-        st.success("정답입니다! 실제 이용 패턴과 수요를 분석하는 것이 가장 중요해요.")
-    else:
-        st.error("다시 생각해보세요. 위치 선정에 가장 중요한 정보는 무엇일까요?")
-
-# 최종 소감 작성
-st.markdown("### 💭 나의 데이터 분석 여정 정리하기")
-st.text_area("이번 수업을 통해 배운 점과 느낀 점을 자유롭게 적어보세요.", height=150)
-
-if st.button("제출하기"):
-    st.balloons()
-    st.success("수고하셨습니다! 여러분은 이제 데이터 분석 전문가입니다! 🎉")
+QUIZZES = [
+    {
+        'title': '1. 데이터 분석의 가치',
+        'question': "따릉이 데이터 분석을 통해 알 수 있는 가장 중요한 정보는 무엇일까요?",
+        'options': ["자전거의 수명", "이용자들의 패턴과 필요", "자전거의 가격", "날씨 정보"],
+        'answer': "이용자들의 패턴과 필요",
+        'right': "정답입니다! 데이터 분석을 통해 사용자들의 필요와 패턴을 파악할 수 있어요.",
+        'wrong': "다시 생각해보세요. 데이터 분석의 주요 목적은 무엇일까요?",
+    },
+    {
+        'title': '2. 데이터 시각화의 중요성',
+        'question': "데이터 시각화가 중요한 이유는 무엇인가요?",
+        'options': ["단순히 예쁘게 보이기 위해",
+                    "복잡한 데이터를 이해하기 쉽게 표현하기 위해",
+                    "컴퓨터 활용 능력을 보여주기 위해",
+                    "최신 트렌드를 따르기 위해"],
+        'answer': "복잡한 데이터를 이해하기 쉽게 표현하기 위해",
+        'right': "정답입니다! 시각화는 복잡한 데이터를 쉽게 이해할 수 있게 도와줍니다.",
+        'wrong': "다시 생각해보세요. 시각화의 주요 목적은 무엇일까요?",
+    },
+    {
+        'title': '3. 데이터 기반 의사결정',
+        'question': "새로운 따릉이 대여소 위치를 정할 때 가장 중요한 데이터는 무엇일까요?",
+        'options': ["자전거 색상에 대한 선호도",
+                    "이용자의 연령대",
+                    "주변 지역의 이용 패턴과 수요",
+                    "자전거 브랜드 선호도"],
+        'answer': "주변 지역의 이용 패턴과 수요",
+        'right': "정답입니다! 실제 이용 패턴과 수요를 분석하는 것이 가장 중요해요.",
+        'wrong': "다시 생각해보세요. 위치 선정에 가장 중요한 정보는 무엇일까요?",
+    },
+]
+
+
+# 퀴즈 하나를 고르거나 정답을 확인해도 그 퀴즈만 다시 그린다
+@st.fragment
+def quiz(number, item):
+    st.markdown(f"""
+        <div class="evaluation-box">
+            <h4>{item['title']}</h4>
+        </div>
+    """, unsafe_allow_html=True)
+
+    choice = st.radio(item['question'], item['options'], key=f'quiz_{number}')
+
+    if st.button(f'정답 확인 {number}'):
+        if choice == item['answer']:
+            st.success(item['right'])
+        else:
+            st.error(item['wrong'])
+
+
+for number, item in enumerate(QUIZZES, start=1):
+    quiz(number, item)
+
+
+# 최종 소감 작성 - 슬라이더와 퀴즈 값은 각 조각의 위젯 키로 session_state에서 읽는다
+@st.fragment
+def reflection_form():
+    st.markdown("### 💭 나의 데이터 분석 여정 정리하기")
+    reflection = st.text_area("이번 수업을 통해 배운 점과 느낀 점을 자유롭게 적어보세요.", height=150)
+
+    if st.button("제출하기"):
+        answers = [st.session_state[f'quiz_{number}'] for number in range(1, len(QUIZZES) + 1)]
+        saved = load_submission_store().add_self_assessment(
+            st.session_state.get('user_id', '익명'),
+            ratings=[st.session_state[f'rating_{i}'] for i in range(len(QUESTIONS))],
+            answers=answers,
+            correct=[answer == item['answer'] for answer, item in zip(answers, QUIZZES)],
+            reflection=reflection,
+        )
+        try:
+            saved.result(timeout=10)
+        except Exception:
+            st.error("제출 내용을 저장하지 못했어요. 잠시 후 다시 눌러주세요.")
+        else:
+            st.balloons()
+            st.success("수고하셨습니다! 여러분은 이제 데이터 분석 전문가입니다! 🎉")
+
+
+reflection_form()
 
 # 학습 정리
 st.markdown("""
@@ -190,4 +217,6 @@ st.markdown("""
             <li>데이터 분석은 다양한 분야에서 활용될 수 있습니다.</li>
         </ul>
     </div>
-""", unsafe_allow_html=True)
\ No newline at end of file
+""", unsafe_allow_html=True)
+
+finish_profiling()
@@ -0,0 +1,79 @@
+# 집계 엔진 시험용 작은 가짜 자료 - 대여소 표와 이용 데이터를 파일 없이 만든다
+#
+#   python -m pytest -q
+import os
+import sys
+
+import numpy as np
+import pandas as pd
+import pytest
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bikedata.dimension import StationDistricts
+from bikedata.trips import derive_columns
+
+# (대여소_ID, 주소1, 위도, 경도) - 구가 주소에 없는 대여소, 서울 밖 대여소, 좌표가 없는 대여소도 하나씩
+STATIONS = [
+    ('ST-1', '서울특별시 종로구 세종대로 1', 37.5720, 126.9769),
+    ('ST-2', '서울특별시 종로구 율곡로 2', 37.5760, 126.9850),
+    ('ST-3', '서울 중구 을지로 3', 37.5660, 126.9910),
+    ('ST-4', '서울특별시 중구 퇴계로 4', 37.5610, 126.9940),
+    ('ST-5', '서울특별시 마포구 양화로 5', 37.5560, 126.9230),
+    ('ST-6', '서울특별시 마포구 월드컵로 6', 37.5630, 126.9080),
+    ('ST-7', '서울특별시 서교동 7', 37.5555, 126.9225),
+    ('ST-8', '경기도 고양시 덕양구 8', 37.6350, 126.8320),
+    ('ST-9', '서울특별시 강남구 테헤란로 9', 0.0, 0.0),
+]
+# 이용 데이터의 대여소 이름 ('구_장소') - ST-X는 대여소 표에 없고 이름으로만 구를 짐작한다
+NAMES = {'ST-1': '종로구_광화문', 'ST-2': '종로구_안국역', 'ST-3': '중구_을지로입구', 'ST-4': '중구_명동',
+         'ST-5': '마포구_홍대입구', 'ST-6': '마포구_망원', 'ST-7': '마포구_서교', 'ST-8': '고양_화정',
+         'ST-9': '강남구_역삼', 'ST-X': '송파구_잠실'}
+TRIP_ROWS = 4000
+
+
+@pytest.fixture(scope='session')
+def stations():
+    return pd.DataFrame(STATIONS, columns=['대여소_ID', '주소1', '위도', '경도'])
+
+
+@pytest.fixture(scope='session')
+def districts(stations):
+    return StationDistricts(stations)
+
+
+def _trips(districts, rows, seed):
+    rng = np.random.default_rng(seed)
+    ids = np.array(list(NAMES))
+    start = ids[rng.integers(0, len(ids), rows)]
+    end = ids[rng.integers(0, len(ids), rows)]
+    counts = rng.integers(1, 4, rows)
+    minutes = np.round(rng.gamma(2, 12, rows)) * counts
+    distance = np.round(rng.gamma(2, 900, rows), 1) * counts
+    # 빈 값도 섞는다 (평균은 빈 값을 빼고 내야 한다)
+    minutes[rng.random(rows) < 0.05] = np.nan
+    distance[rng.random(rows) < 0.05] = np.nan
+    df = pd.DataFrame({
+        '기준_날짜': rng.choice([20240101, 20240102, 20240103], rows).astype(np.int32),
+        '기준_시간대': (rng.integers(0, 24, rows) * 100 + rng.integers(0, 6, rows) * 10).astype(np.int16),
+        '시작_대여소_ID': pd.Categorical(start),
+        '시작_대여소명': pd.Categorical([NAMES[i] for i in start]),
+        '종료_대여소_ID': pd.Categorical(end),
+        '종료_대여소명': pd.Categorical([NAMES[i] for i in end]),
+        '전체_건수': counts.astype(np.int32),
+        '전체_이용_분': minutes,
+        '전체_이용_거리': distance,
+    })
+    return derive_columns(df, districts=districts)
+
+
+@pytest.fixture(scope='session')
+def make_trips(districts):
+    # 크기나 seed를 바꿔 새 이용 데이터를 만드는 함수 (출발 구는 위 대여소 표에서)
+    return lambda rows=TRIP_ROWS, seed=0: _trips(districts, rows, seed)
+
+
+@pytest.fixture(scope='session')
+def trips(make_trips):
+    return make_trips()
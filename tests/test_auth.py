@@ -0,0 +1,62 @@
+import os
+
+import pytest
+
+from bikedata.auth import CredentialStore, check_password, hash_id_file, hash_password, set_role
+
+
+def _write(path, text, mtime=None):
+    path.write_text(text, encoding='utf-8-sig')
+    if mtime is not None:
+        os.utime(path, ns=(mtime, mtime))
+    return str(path)
+
+
+@pytest.fixture
+def id_file(tmp_path):
+    # 시험에서는 반복 횟수를 줄여 빨리 돈다
+    return _write(tmp_path / 'id.csv', f'ID,PW\n아림,{hash_password("1234", iterations=1000)}\n재원,1357\n')
+
+
+def test_pbkdf2_hash_verifies():
+    stored = hash_password('1234', iterations=1000)
+    assert stored.startswith('pbkdf2_sha256$1000$')
+    assert check_password('1234', stored)
+    assert not check_password('4321', stored)
+    # 소금이 달라 같은 비밀번호도 해시가 다르다
+    assert hash_password('1234', iterations=1000) != stored
+
+
+@pytest.mark.parametrize('stored', ['pbkdf2_sha256$', 'pbkdf2_sha256$abc$salt$00', 'pbkdf2_sha256$1000$salt'])
+def test_malformed_hash_is_a_failed_login(stored):
+    assert not check_password('1234', stored)
+
+
+def test_store_verifies_hashed_and_plain_rows(id_file):
+    store = CredentialStore(id_file)
+    assert store.verify('아림', '1234') and not store.verify('아림', '1357')
+    # 아직 해시로 바꾸지 않은 평문 행도 로그인된다
+    assert store.verify('재원', '1357')
+    assert not store.verify('없는사람', '1234')
+    assert len(store) == 2
+
+
+def test_store_rereads_changed_file(tmp_path):
+    path = tmp_path / 'id.csv'
+    store = CredentialStore(_write(path, 'ID,PW\n아림,1234\n', mtime=1_000_000_000))
+    assert store.verify('아림', '1234')
+    # 크기가 같아도 수정 시각이 바뀌면 다시 읽는다
+    _write(path, 'ID,PW\n아림,5678\n', mtime=2_000_000_000)
+    assert store.verify('아림', '5678') and not store.verify('아림', '1234')
+
+
+def test_roles_and_hashing_keep_rows(id_file):
+    store = CredentialStore(id_file)
+    assert store.role('아림') == 'student'
+    assert set_role(['재원', '없는사람'], path=id_file) == ['없는사람']
+    assert store.role('재원') == 'teacher' and store.role('아림') == 'student'
+
+    assert hash_id_file(id_file) == 2
+    assert store.verify('재원', '1357') and store.verify('아림', '1234')
+    # 해시로 바꿔도 ROLE 열은 그대로
+    assert store.role('재원') == 'teacher'
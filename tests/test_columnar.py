@@ -0,0 +1,144 @@
+import os
+import pickle
+import subprocess
+import sys
+import threading
+
+import numpy as np
+import pandas as pd
+import pytest
+
+from bikedata import columnar
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+STAMP = [['trips.csv', 1, 1]]
+
+# 새 프로세스에서 캐시만 매핑해 열마다 메모리 매핑인지 확인하고, 프레임을 넘겨준다
+RELOAD = '''
+import pickle, sys
+import numpy as np
+from bikedata import columnar
+
+frame = columnar.load_frame('t', None)
+mapped = {col: isinstance((frame[col].cat.codes if frame[col].dtype == 'category' else frame[col]).values.base,
+                          np.memmap)
+          for col in frame}
+sys.stdout.buffer.write(pickle.dumps((frame, mapped)))
+'''
+
+
+@pytest.fixture
+def cache_dir(tmp_path, monkeypatch):
+    monkeypatch.setattr(columnar, 'CACHE_DIR', str(tmp_path))
+    return tmp_path
+
+
+def _frame(rows=300, names=5, seed=0):
+    rng = np.random.default_rng(seed)
+    station = np.array([f'ST-{i}' for i in range(names)], dtype=object)[rng.integers(0, names, rows)]
+    station[rng.random(rows) < 0.1] = None
+    minutes = rng.gamma(2, 12, rows)
+    minutes[rng.random(rows) < 0.1] = np.nan
+    return pd.DataFrame({
+        '기준_날짜': rng.choice([20240101, 20240102], rows).astype(np.int32),
+        '시작_대여소_ID': pd.Categorical(station),
+        '시작_대여소명': station,
+        '전체_이용_분': minutes,
+    })
+
+
+def _expected(df):
+    # 캐시는 문자열 열을 모두 범주형(정렬된 범주)으로 돌려준다
+    return df.assign(시작_대여소_ID=df['시작_대여소_ID'].astype(str).replace('nan', None).astype('category'),
+                     시작_대여소명=df['시작_대여소명'].astype('category'))
+
+
+def _assert_same(frame, df):
+    expected = _expected(df)
+    assert list(frame.columns) == list(expected.columns)
+    for col in expected:
+        if isinstance(expected[col].dtype, pd.CategoricalDtype):
+            assert list(frame[col].cat.categories) == list(expected[col].cat.categories)
+            assert frame[col].isna().equals(expected[col].isna())
+            assert list(frame[col].dropna().astype(str)) == list(expected[col].dropna().astype(str))
+        else:
+            assert frame[col].dtype == expected[col].dtype
+            assert np.array_equal(frame[col].to_numpy(), expected[col].to_numpy(), equal_nan=True)
+
+
+def test_writer_chunks_reload_in_another_process(cache_dir):
+    df = _frame(names=300)
+    writer = columnar.FrameWriter('t')
+    for start in range(0, len(df), 70):
+        writer.append(df.iloc[start:start + 70])
+    writer.commit(STAMP)
+
+    env = dict(os.environ, DATABIKE_CACHE_DIR=str(cache_dir), PYTHONPATH=ROOT)
+    result = subprocess.run([sys.executable, '-c', RELOAD], env=env, capture_output=True, check=True)
+    frame, mapped = pickle.loads(result.stdout)
+    _assert_same(frame, df)
+    # 숫자 열도, 문자열 열의 코드도 복사 없이 매핑한 배열 그대로
+    assert all(mapped.values()), mapped
+    # 코드는 pandas가 범주 수에 맞춰 고르는 자료형 (범주 300개면 int16)
+    assert frame['시작_대여소_ID'].cat.codes.dtype == np.int16
+
+
+def test_stale_stamp_or_version_is_ignored(cache_dir):
+    columnar.save_frame(_frame(), 't', STAMP, version=2)
+    assert columnar.load_frame('t', STAMP, version=2) is not None
+    assert columnar.load_frame('t', [['trips.csv', 2, 1]], version=2) is None
+    assert columnar.load_frame('t', STAMP, version=3) is None
+    # 원본이 없으면(도장 None) 캐시만으로
+    assert columnar.load_frame('t', None, version=2) is not None
+
+
+def test_waiting_publisher_maps_the_first_build(cache_dir):
+    df = _frame()
+    built = []
+    result = {}
+
+    def build(stamp):
+        built.append(stamp)
+        columnar.save_frame(df, 't', stamp)
+
+    with columnar.frame_lock('t'):
+        worker = threading.Thread(target=lambda: result.update(frame=columnar.publish_frame('t', STAMP, 1, build)))
+        worker.start()
+        worker.join(0.3)
+        # 잠금을 잡은 쪽이 만드는 동안 기다린다
+        assert worker.is_alive()
+        columnar.save_frame(df, 't', STAMP)
+    worker.join()
+    assert built == []
+    _assert_same(result['frame'], df)
+
+    assert columnar.publish_frame('t', [['trips.csv', 2, 1]], 1, build) is not None
+    assert built == [[['trips.csv', 2, 1]]]
+
+
+def test_append_frame_extends_mapped_cache(cache_dir):
+    df = _frame()
+    columnar.save_frame(df, 't', STAMP)
+    tail = _frame(rows=40, names=8, seed=1)
+    stamp = [['trips.csv', 2, 2]]
+
+    frame = columnar.append_frame(tail, 't', len(df), stamp)
+    whole = pd.concat([df, tail], ignore_index=True)
+    assert len(frame) == len(whole)
+    assert isinstance(frame['시작_대여소_ID'].cat.codes.values.base, np.memmap)
+    assert isinstance(frame['전체_이용_분'].values.base, np.memmap)
+    # 기존 범주 순서는 그대로 두고 새 대여소만 뒤에 붙는다
+    categories = list(frame['시작_대여소_ID'].cat.categories)
+    new = set(tail['시작_대여소_ID'].dropna().astype(str)) - set(df['시작_대여소_ID'].dropna().astype(str))
+    assert categories[:5] == [f'ST-{i}' for i in range(5)] and set(categories[5:]) == new and new
+    stations = [frame['시작_대여소_ID'], whole['시작_대여소_ID']]
+    assert list(stations[0].astype(object).fillna('-')) == list(stations[1].astype(object).fillna('-'))
+    assert np.array_equal(frame['전체_이용_분'], whole['전체_이용_분'], equal_nan=True)
+
+    # 다른 워커가 같은 행을 이미 붙였으면 그대로, 캐시 행 수가 다르면 처음부터
+    assert len(columnar.append_frame(tail, 't', len(df), stamp)) == len(whole)
+    assert columnar.append_frame(tail, 't', len(df), [['trips.csv', 3, 3]]) is None
+    # 범주가 늘어 코드 자료형이 넓어져야 하면 덧붙이지 않는다
+    wide = _frame(rows=1000, names=300, seed=2)
+    assert columnar.append_frame(wide, 't', len(whole), [['trips.csv', 3, 3]]) is None
+    assert len(columnar.load_frame('t', stamp)) == len(whole)
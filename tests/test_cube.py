@@ -0,0 +1,61 @@
+import numpy as np
+
+from bikedata.cube import DurationHistogram, DurationIndex, TripCube
+
+
+def test_trip_cube_matches_groupby(trips):
+    cube = TripCube.from_frame(trips, chunk_rows=700)
+    for region in [None, '종로구', '마포구']:
+        rows = trips if region is None else trips[trips['출발_구'] == region]
+        summary = cube.summary(region)
+        assert summary['rows'] == len(rows)
+        assert summary['count'] == rows['전체_건수'].sum()
+        # 빈 값은 빼고 평균을 낸다 (.mean()과 같다)
+        assert np.isclose(summary['mean_minutes'], rows['전체_이용_분'].mean())
+        assert np.isclose(summary['mean_distance'], rows['전체_이용_거리'].mean())
+        assert summary['max_minutes'] == rows['전체_이용_분'].max()
+
+        hourly = cube.hourly(region)
+        expected = rows.groupby('시간대')['전체_건수'].sum()
+        assert list(hourly['시간대']) == list(expected.index)
+        assert list(hourly['전체_건수']) == list(expected)
+
+        means = cube.hourly_mean_minutes(region)
+        expected = rows.groupby('시간대')['전체_이용_분'].mean()
+        assert np.allclose(means['전체_이용_분'], expected.loc[means['시간대']], equal_nan=True)
+
+
+def test_trip_cube_unknown_region_is_empty(trips):
+    cube = TripCube.from_frame(trips)
+    assert cube.summary('없는구')['rows'] == 0
+    assert set(cube.observed_regions()) == set(trips['출발_구'].astype(str).unique())
+
+
+def test_duration_index_matches_filters(trips):
+    index = DurationIndex(trips, chunk_rows=700)
+    minutes = trips['전체_이용_분']
+    for threshold in [0, 17, 30, 60, 10_000]:
+        rows = trips[minutes >= threshold]
+        assert np.isclose(index.share_at_least(threshold), len(rows) / len(trips))
+
+        hourly = index.hourly_at_least(threshold)
+        expected = rows.groupby('시간대')['전체_건수'].sum()
+        assert list(hourly['시간대']) == list(expected.index)
+        assert list(hourly['전체_건수']) == list(expected)
+
+        regions = index.regions_at_least(threshold)
+        expected = rows.groupby(rows['출발_구'].astype(str))['전체_건수'].sum()
+        assert regions.to_dict() == expected.to_dict()
+
+    longest = index.longest(trips, 10)
+    assert longest.index.equals(trips.nlargest(10, '전체_이용_분', keep='first').index)
+
+
+def test_duration_histogram_matches_numpy(trips):
+    histogram = DurationHistogram(trips, chunk_rows=700)
+    for region in ['종로구', '중구', '마포구']:
+        edges, counts = histogram.region(region)
+        minutes = trips.loc[trips['출발_구'] == region, '전체_이용_분'].dropna()
+        assert len(counts) == histogram.bins
+        assert edges[0] <= minutes.min() and minutes.max() <= edges[-1]
+        assert np.array_equal(counts, np.histogram(minutes, edges)[0])
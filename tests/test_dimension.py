@@ -0,0 +1,44 @@
+import numpy as np
+import pandas as pd
+
+from bikedata.dimension import DISTRICT_IDS, DISTRICT_NAMES, UNKNOWN, StationDistricts, district_from_name
+from bikedata.trips import derive_columns
+
+
+def test_station_districts_from_address(districts):
+    frame = districts.frame
+    assert frame.loc['ST-1', '자치구_명칭'] == '종로구' and frame.loc['ST-1', '자치구_ID'] == 11010
+    assert frame.loc['ST-3', '자치구_명칭'] == '중구'
+    # 주소에 구가 없으면 가장 가까운 대여소의 구, 서울 밖이나 좌표가 없으면 알 수 없음
+    assert frame.loc['ST-7', '자치구_명칭'] == '마포구'
+    assert frame.loc['ST-8', '자치구_명칭'] == '알수없음'
+    assert frame.loc['ST-9', '자치구_명칭'] == '강남구'
+
+
+def test_lookup_matches_per_row_mapping(districts, make_trips):
+    trips = make_trips(500, seed=2)
+    position = districts.lookup(trips['시작_대여소_ID'], trips['시작_대여소명'])
+    by_id = districts.frame['자치구_명칭']
+    expected = [by_id.get(station, '알수없음') if by_id.get(station, '알수없음') != '알수없음'
+                else district_from_name(name)
+                for station, name in zip(trips['시작_대여소_ID'].astype(str), trips['시작_대여소명'].astype(str))]
+    assert list(DISTRICT_NAMES[position]) == expected
+
+
+def test_vectorized_columns_match_legacy(districts, make_trips):
+    fast = make_trips(500, seed=3)
+    raw = fast.drop(columns=['시간', '시간대', '출발_구', '자치구_ID'])
+    legacy = derive_columns(raw, vectorized=False, districts=districts)
+    assert list(fast['출발_구'].astype(str)) == list(legacy['출발_구'])
+    assert list(fast['자치구_ID']) == list(legacy['자치구_ID'])
+    assert list(fast['시간대']) == list(legacy['시간대'])
+
+
+def test_empty_station_table_guesses_from_names():
+    empty = StationDistricts(pd.DataFrame({'대여소_ID': [], '주소1': [], '위도': [], '경도': []}))
+    ids = pd.Series(['ST-1', 'ST-X', None], dtype='category')
+    names = pd.Series(['종로구_광화문', '어딘가', None], dtype='category')
+    position = empty.lookup(ids, names)
+    assert list(DISTRICT_NAMES[position]) == ['종로구', '알수없음', '알수없음']
+    assert DISTRICT_IDS[position][1] == 0 and position[2] == UNKNOWN
+    assert np.array_equal(empty.lookup(ids), [UNKNOWN] * 3)
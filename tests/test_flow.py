@@ -0,0 +1,64 @@
+import numpy as np
+import pandas as pd
+
+from bikedata.flow import HOURS, NetFlow
+
+
+def _by_station_hour(df, station, hour):
+    table = df.groupby([df[station].astype(str), hour])['전체_건수'].sum().unstack(fill_value=0)
+    return table.reindex(columns=range(HOURS), fill_value=0)
+
+
+def _return_hours(df):
+    base = df['기준_시간대'].astype(int)
+    start_minute = base // 100 * 60 + base % 100
+    ride = (df['전체_이용_분'] / df['전체_건수'].clip(lower=1)).fillna(0)
+    return ((start_minute + ride) // 60).astype(int) % HOURS
+
+
+def test_rentals_and_returns_match_groupby(trips):
+    flow = NetFlow(trips, chunk_rows=700)
+    rentals = _by_station_hour(trips, '시작_대여소_ID', trips['기준_시간대'] // 100)
+    returns = _by_station_hour(trips, '종료_대여소_ID', _return_hours(trips))
+
+    stations = list(flow.stations)
+    assert np.array_equal(flow.rentals, rentals.reindex(stations, fill_value=0).to_numpy())
+    assert np.array_equal(flow.returns, returns.reindex(stations, fill_value=0).to_numpy())
+    assert flow.rentals.sum() == flow.returns.sum() == trips['전체_건수'].sum()
+    assert flow.days == trips['기준_날짜'].nunique()
+
+
+def test_adding_halves_equals_one_build(trips):
+    half = len(trips) // 2
+    flow = NetFlow(trips.iloc[:half])
+    assert flow.covers(trips.iloc[half:])
+    flow.add(trips.iloc[half:])
+    whole = NetFlow(trips)
+    assert np.array_equal(flow.rentals, whole.rentals)
+    assert np.array_equal(flow.returns, whole.returns)
+    assert np.array_equal(flow.dates, whole.dates)
+
+
+def test_new_station_is_not_covered(trips, make_trips):
+    flow = NetFlow(trips)
+    tail = make_trips(10, seed=1)
+    tail['시작_대여소_ID'] = pd.Categorical(['ST-NEW'] * len(tail))
+    assert not flow.covers(tail)
+
+
+def test_imbalance_and_top_stations(trips):
+    flow = NetFlow(trips)
+    hours = range(7, 10)
+    table = flow.imbalance(hours)
+    in_hours = trips[(trips['기준_시간대'] // 100).isin(hours)]
+    rentals = in_hours.groupby(in_hours['시작_대여소_ID'].astype(str))['전체_건수'].sum() / flow.days
+    assert np.allclose(table['대여_건수'], rentals.reindex(table.index, fill_value=0))
+    assert np.allclose(table['순유입'], table['반납_건수'] - table['대여_건수'])
+
+    drain = flow.top_imbalance(3, hours, 'drain')
+    expected = table['순유입'][table['순유입'] < 0].sort_values(kind='stable').head(3)
+    assert list(drain['대여소_ID']) == list(expected.index)
+
+    curves = flow.inventory(['ST-1', 'ST-없음'])
+    assert list(curves.columns) == ['ST-1']
+    assert np.allclose(curves['ST-1'].iloc[-1], flow.net[flow.stations.get_loc('ST-1')].sum())
@@ -0,0 +1,33 @@
+import numpy as np
+import pandas as pd
+
+from bikedata.geo import StationIndex, haversine_m
+
+
+def _stations(count=800, seed=0):
+    rng = np.random.default_rng(seed)
+    return pd.DataFrame({'대여소_ID': [f'ST-{i}' for i in range(count)],
+                         '위도': rng.uniform(37.45, 37.70, count),
+                         '경도': rng.uniform(126.80, 127.15, count)})
+
+
+def test_within_matches_brute_force():
+    stations = _stations()
+    index = StationIndex(stations)
+    for lat, lon, radius in [(37.5665, 126.9780, 800), (37.50, 127.10, 2500), (37.45, 126.80, 300)]:
+        distance = haversine_m(lat, lon, stations['위도'].to_numpy(), stations['경도'].to_numpy())
+        expected = stations.assign(거리_m=distance)[distance <= radius].sort_values('거리_m', kind='stable')
+        found = index.within(lat, lon, radius)
+        assert list(found['대여소_ID']) == list(expected['대여소_ID'])
+        assert np.allclose(found['거리_m'], expected['거리_m'])
+
+
+def test_nearest_matches_brute_force():
+    stations = _stations()
+    index = StationIndex(stations)
+    # 대여소가 없는 먼 곳에서도 반경을 넓혀 가며 찾는다
+    for lat, lon in [(37.5665, 126.9780), (37.80, 127.30)]:
+        distance = haversine_m(lat, lon, stations['위도'].to_numpy(), stations['경도'].to_numpy())
+        expected = stations['대여소_ID'].to_numpy()[np.argsort(distance, kind='stable')[:5]]
+        assert list(index.nearest(lat, lon, 5)['대여소_ID']) == list(expected)
+    assert len(index.nearest(37.5665, 126.9780, k=10_000)) == len(stations)
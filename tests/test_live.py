@@ -0,0 +1,122 @@
+import io
+import os
+
+import pandas as pd
+import pytest
+
+from bikedata.columnar import source_stamp
+from bikedata.live import Derived, LiveSource
+
+
+class Counting:
+    # 처음부터 읽은 횟수와 merge에 넘어온 행/도장을 기록하는 원본
+    def __init__(self, tmp_path):
+        self.pattern = str(tmp_path / 'trips*.csv')
+        self.loads = 0
+        self.merged = []
+
+    def load(self, paths):
+        self.loads += 1
+        return pd.concat([pd.read_csv(path) for path in paths], ignore_index=True)
+
+    def parse(self, raw):
+        return pd.read_csv(io.BytesIO(raw))
+
+    def merge(self, value, rows, stamp):
+        self.merged.append((len(rows), stamp))
+        return pd.concat([value, rows], ignore_index=True)
+
+    def source(self):
+        return LiveSource(self.pattern, self.load, self.parse, self.merge, interval=0)
+
+
+def _append(path, text):
+    with open(path, 'a', encoding='utf-8', newline='') as f:
+        f.write(text)
+
+
+@pytest.fixture
+def trips(tmp_path):
+    path = tmp_path / 'trips1.csv'
+    path.write_text('id,minutes\n1,10\n2,20\n', encoding='utf-8')
+    return Counting(tmp_path), str(path)
+
+
+def test_appended_rows_are_merged_without_reloading(trips):
+    raw, path = trips
+    source = raw.source()
+    assert len(source.snapshot.value) == 2 and raw.loads == 1
+    assert source.refresh() is False
+
+    # 아직 쓰는 중인 마지막 줄은 다음 차례로 미룬다
+    _append(path, '3,30\n4,40\n5,5')
+    assert source.refresh() is True
+    assert list(source.snapshot.value['id']) == [1, 2, 3, 4]
+    _append(path, '0\n')
+    assert source.refresh() is True
+    assert list(source.snapshot.value['minutes']) == [10, 20, 30, 40, 50]
+
+    assert raw.loads == 1 and [rows for rows, _ in raw.merged] == [2, 1]
+    # 끝까지 읽었으면 도장이 캐시 도장과 같다 (서버를 다시 띄워도 캐시를 그대로 쓴다)
+    assert raw.merged[-1][1] == source_stamp([path])
+    assert source.snapshot.version == 3 and source.snapshot.generation == 1
+
+
+def test_rewritten_or_new_files_reload(trips, tmp_path):
+    raw, path = trips
+    source = raw.source()
+    # 크기가 같아도 이미 읽은 부분이 바뀌었으면 처음부터
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('id,minutes\n7,70\n8,80\n')
+    os.utime(path, ns=(1, 1))
+    assert source.refresh() is True
+    assert list(source.snapshot.value['id']) == [7, 8] and raw.loads == 2
+
+    (tmp_path / 'trips2.csv').write_text('id,minutes\n9,90\n', encoding='utf-8')
+    assert source.refresh() is True
+    assert list(source.snapshot.value['id']) == [7, 8, 9] and raw.loads == 3
+    assert source.snapshot.generation == 3 and raw.merged == []
+
+
+def test_failed_merge_rereads_the_same_rows(trips):
+    raw, path = trips
+    source = raw.source()
+    source._merge = lambda value, rows, stamp: 1 / 0
+    _append(path, '3,30\n')
+    with pytest.raises(ZeroDivisionError):
+        source.refresh()
+    source._merge = raw.merge
+    assert source.refresh() is True
+    assert list(source.snapshot.value['id']) == [1, 2, 3]
+
+    # merge가 None이면 처음부터 다시 만든다
+    source._merge = lambda value, rows, stamp: None
+    _append(path, '4,40\n')
+    assert source.refresh() is True
+    assert list(source.snapshot.value['id']) == [1, 2, 3, 4] and raw.loads == 2
+
+
+def test_derived_follows_appended_rows(trips):
+    raw, path = trips
+    source = raw.source()
+    builds, updates = [], []
+
+    def build(frame):
+        builds.append(len(frame))
+        return int(frame['minutes'].sum())
+
+    def update(total, rows):
+        updates.append(len(rows))
+        return total + int(rows['minutes'].sum())
+
+    derived = Derived(source, build, update)
+    _append(path, '3,30\n4,40\n')
+    source.refresh()
+    # 구독해 두었으므로 새 스냅샷이 나오면 바로 따라잡는다
+    assert derived._state[0] == 100 and updates == [2]
+    assert derived.get() == 100 and builds == [2]
+
+    with open(path, 'w', encoding='utf-8', newline='') as f:
+        f.write('id,minutes\n1,1\n')
+    source.refresh()
+    assert derived.get() == 1 and builds == [2, 1]
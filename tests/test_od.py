@@ -0,0 +1,38 @@
+import numpy as np
+
+from bikedata.od import ODMatrix, top_k
+
+
+def test_top_k_orders_ties_by_position():
+    values = np.array([3, 9, 3, 7, 9, 1])
+    assert list(top_k(values, 3)) == [1, 4, 3]
+    assert list(top_k(values, 10)) == [1, 4, 3, 0, 2, 5]
+
+
+def test_top_destinations_match_groupby(trips):
+    od = ODMatrix(trips, chunk_rows=700)
+    for region in ['종로구', '마포구']:
+        rows = trips[trips['출발_구'] == region]
+        expected = rows.groupby(rows['종료_대여소명'].astype(str))['전체_건수'].sum()
+        top = od.top_destinations(region, k=len(expected))
+        assert top.to_dict() == expected.to_dict()
+        assert list(top) == sorted(top, reverse=True)
+
+    rows = trips[trips['시작_대여소명'] == '중구_명동']
+    expected = rows.groupby(rows['종료_대여소명'].astype(str))['전체_건수'].sum()
+    assert od.top_destinations(station='중구_명동', k=len(expected)).to_dict() == expected.to_dict()
+    assert od.top_destinations('없는구').empty
+
+
+def test_heaviest_pairs_match_groupby(trips):
+    od = ODMatrix(trips)
+    moving = trips[trips['시작_대여소명'] != trips['종료_대여소명']]
+    keys = [moving['시작_대여소명'].astype(str), moving['종료_대여소명'].astype(str)]
+    expected = moving.groupby(keys)['전체_건수'].sum()
+    pairs = od.heaviest_pairs(k=len(expected))
+    got = pairs.set_index(['시작_대여소명', '종료_대여소명'])['전체_건수']
+    assert got.to_dict() == expected.to_dict()
+
+    # 대여소 이름 -> ID는 이용 데이터에 함께 있던 값
+    names = dict(zip(trips['시작_대여소명'].astype(str), trips['시작_대여소_ID'].astype(str)))
+    assert all(names[name] == station for name, station in zip(pairs['시작_대여소명'], pairs['시작_대여소_ID']))
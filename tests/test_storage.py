@@ -0,0 +1,125 @@
+import sqlite3
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+import pandas as pd
+import pytest
+
+from bikedata import storage
+from bikedata.storage import SubmissionStore
+
+PROPOSAL = {
+    'time_pattern': '출퇴근 시간', 'usage_pattern': '짧은 이동', 'additional_data': '날씨', 'data_usage': '수요 예측',
+    'region': '마포구', 'project_types': ['대여소 신설', '자전거 도로'], 'target_time': '오전',
+    'effects': ['혼잡 완화'], 'title': '합정역 대여소', 'description': '출근길 대여소 부족', 'budget': 3000,
+}
+
+
+@pytest.fixture
+def store(tmp_path):
+    return SubmissionStore(str(tmp_path / 'submissions.db'))
+
+
+def _assess(store, user_id, ratings=(3, 4, 5, 2, 1), answers=('a', 'b', 'c'), correct=(1, 0, 1)):
+    return store.add_self_assessment(user_id, ratings, answers, correct, '재미있었다')
+
+
+def test_proposal_round_trips(store):
+    row_id = store.add_proposal('아림', **PROPOSAL).result(5)
+    df = store.proposals(user_id='아림')
+    assert list(df['id']) == [row_id]
+    # 목록형 값은 JSON으로 저장했다가 목록으로 돌려준다
+    assert df.loc[0, 'project_types'] == PROPOSAL['project_types']
+    assert df.loc[0, 'budget'] == 3000
+    assert len(store.proposals(region='마포구')) == 1
+    assert store.proposals(region='종로구').empty
+    assert store._reader().execute('PRAGMA journal_mode').fetchone()[0] == 'wal'
+
+
+def test_concurrent_submissions_are_all_written(tmp_path):
+    store = SubmissionStore(str(tmp_path / 'submissions.db'), batch_size=16)
+    with ThreadPoolExecutor(8) as pool:
+        futures = list(pool.map(lambda i: _assess(store, f'학생{i}'), range(40)))
+    ids = [future.result(5) for future in futures]
+    assert len(set(ids)) == 40
+    # flush 뒤에는 기다리지 않은 제출도 읽힌다
+    _assess(store, '재원')
+    store.flush(5)
+    assert len(store.self_assessments()) == 41
+    assert list(store.self_assessments(user_id='재원')['user_id']) == ['재원']
+
+
+def test_batch_is_one_transaction(tmp_path):
+    store = SubmissionStore(str(tmp_path / 'submissions.db'), batch_wait=1)
+    # 쓰기 스레드가 첫 제출을 받은 뒤 같은 묶음으로 모으도록 두 제출을 바로 이어 넣는다
+    good = store.add_proposal('아림', **PROPOSAL)
+    bad = store.add_proposal('재원', **{**PROPOSAL, 'budget': object()})
+    for future in (good, bad):
+        with pytest.raises(sqlite3.Error):
+            future.result(5)
+    # 묶음 하나가 통째로 되돌려지고, 쓰기 스레드는 계속 돈다
+    assert store.proposals().empty
+    assert store.add_proposal('아림', **PROPOSAL).result(5)
+    assert len(store.proposals()) == 1
+
+
+def test_other_threads_read_with_their_own_connection(store):
+    _assess(store, '아림').result(5)
+    seen = []
+    thread = threading.Thread(target=lambda: seen.append(len(store.self_assessments())))
+    thread.start()
+    thread.join(5)
+    assert seen == [1]
+
+
+def _expected_rollups(raw, since=None):
+    if since is not None:
+        raw = raw[raw['submitted_at'].str[:10] >= since]
+    ratings = pd.concat([pd.DataFrame({'goal': goal, 'rating': raw[f'rating_{goal}']}) for goal in range(1, 6)])
+    ratings = ratings.value_counts().rename('count').reset_index().sort_values(['goal', 'rating'])
+    quiz = pd.DataFrame([{'question': question, 'correct': raw.loc[raw[f'q{question}_answer'].notna(),
+                                                                   f'q{question}_correct'].sum(),
+                          'total': raw[f'q{question}_answer'].notna().sum()} for question in range(1, 4)])
+    return ratings.reset_index(drop=True), quiz
+
+
+def _rollups(store, since=None):
+    return store.rating_distribution(since=since), store.quiz_summary(since=since)
+
+
+def _assert_rollups(store, since=None):
+    ratings, quiz = _rollups(store, since)
+    expected_ratings, expected_quiz = _expected_rollups(store.self_assessments(), since)
+    assert ratings.values.tolist() == expected_ratings.values.tolist()
+    assert quiz.values.tolist() == expected_quiz.values.tolist()
+
+
+def test_rollups_match_raw_rows(store, monkeypatch):
+    times = iter([f'2024-05-0{1 + i // 4}T09:{i:02d}:00' for i in range(12)])
+    monkeypatch.setattr(storage, '_now', lambda: next(times))
+    for i in range(12):
+        ratings = [(i + goal) % 5 + 1 for goal in range(5)]
+        # 답을 비운 문항은 푼 사람 수에 넣지 않는다
+        answers = [None if i % 3 == 0 else 'a', 'b', None if i % 4 == 0 else 'c']
+        _assess(store, f'학생{i % 5}', ratings, answers, [i % 2, 1, i % 3 == 1])
+    store.flush(5)
+
+    assert store.submission_days() == ['2024-05-01', '2024-05-02', '2024-05-03']
+    _assert_rollups(store)
+    _assert_rollups(store, since='2024-05-02')
+    # 같은 학생이 두 번 내면 두 건으로 센다
+    assert store.quiz_summary()['total'].tolist()[1] == 12
+
+
+def test_missing_rollups_are_rebuilt_on_open(store):
+    for i in range(6):
+        _assess(store, f'학생{i}', [i % 5 + 1] * 5, ['a', None, 'c'], [1, 0, i % 2])
+    store.flush(5)
+    before = _rollups(store)
+
+    with sqlite3.connect(store.path) as conn:
+        conn.execute('DELETE FROM rating_rollup')
+        conn.execute('DELETE FROM quiz_rollup')
+    reopened = SubmissionStore(store.path)
+    after = _rollups(reopened)
+    assert after[0].equals(before[0]) and after[1].equals(before[1])
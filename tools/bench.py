@@ -0,0 +1,256 @@
+# 페이지 다시 그리기 시간과 데이터 불러오기 속도 측정
+#
+#   python tools/bench.py --rows 10000 100000 1000000 --out bench.json
+#
+# 크기마다 임시 폴더에 가짜 이용 데이터(make_trips.py)를 만들고 새 파이썬 프로세스에서
+# 단계별 시간(parse, derive, ingest, 집계, 그림 만들기, 직렬화)과 최대 메모리를 잰다.
+# 결과는 JSON으로 저장하므로 커밋끼리 비교할 수 있다.
+import argparse
+import contextlib
+import json
+import os
+import platform
+import resource
+import shutil
+import subprocess
+import sys
+import tempfile
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 같은 tools 폴더의 생성기
+from make_trips import write_trips
+
+DEFAULT_ROWS = [10_000, 100_000, 1_000_000, 10_000_000]
+# 페이지가 읽는 고정 파일 (임시 폴더에 링크한다)
+SHARED_FILES = ['seoul.csv', 'bikelocation.csv', 'id.csv', 'image.png']
+
+
+def _peak_rss_mb():
+    # 리눅스는 KB, macOS는 바이트 단위
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024)
+
+
+class Recorder:
+    # 단계 이름 -> 걸린 시간(초), 단계가 끝났을 때의 최대 메모리(MB)
+
+    def __init__(self):
+        self.phases = {}
+        self.peak_mb = {}
+        self._active = set()
+
+    @contextlib.contextmanager
+    def phase(self, name):
+        # 같은 단계 안에서 다시 불리면 (px 안의 go.Figure 등) 두 번 세지 않는다
+        if name in self._active:
+            yield
+            return
+        self._active.add(name)
+        start = time.perf_counter()
+        try:
+            yield
+        finally:
+            self._active.discard(name)
+            self.phases[name] = self.phases.get(name, 0.0) + time.perf_counter() - start
+            self.peak_mb[name] = _peak_rss_mb()
+
+    def wrap(self, owner, attribute, name):
+        # owner.attribute 호출에 걸린 시간을 name 단계에 더한다 (AppTest 안에서 그림/직렬화 시간 재기)
+        original = getattr(owner, attribute)
+        recorder = self
+
+        def timed(*args, **kwargs):
+            with recorder.phase(name):
+                return original(*args, **kwargs)
+
+        setattr(owner, attribute, timed)
+        return original
+
+
+def _measure_loaders(recorder):
+    from bikedata import columnar
+    from bikedata.cube import DurationHistogram, DurationIndex, TripCube
+    from bikedata.flow import NetFlow
+    from bikedata.od import ODMatrix
+    from bikedata.charts import stratified_sample, SCATTER_MAX_POINTS
+    from bikedata.trips import CACHE_VERSION, derive_columns, ingest_trips, read_trip_csv, trip_files, trip_stamp
+
+    paths = trip_files()
+    rows = 0
+    for path in paths:
+        chunks = read_trip_csv(path, chunksize=500_000)
+        while True:
+            with recorder.phase('parse'):
+                chunk = next(chunks, None)
+            if chunk is None:
+                break
+            with recorder.phase('derive'):
+                derive_columns(chunk)
+            rows += len(chunk)
+
+    stamp = trip_stamp(paths)
+    with recorder.phase('ingest'):
+        ingest_trips(paths, stamp)
+    with recorder.phase('cache_load'):
+        df = columnar.load_frame('trips', stamp, CACHE_VERSION)
+
+    with recorder.phase('aggregate_cube'):
+        TripCube.from_frame(df)
+    with recorder.phase('aggregate_duration_index'):
+        DurationIndex(df)
+    with recorder.phase('aggregate_duration_histogram'):
+        DurationHistogram(df)
+    with recorder.phase('aggregate_od_matrix'):
+        ODMatrix(df)
+    with recorder.phase('aggregate_net_flow'):
+        NetFlow(df)
+    with recorder.phase('aggregate_scatter_sample'):
+        stratified_sample(df, '전체_이용_분', '전체_이용_거리', SCATTER_MAX_POINTS)
+    return rows
+
+
+def page_interactions(at, page):
+    # 페이지마다 학생이 실제로 하는 조작 몇 가지 (조작 이름, 함수) - tools/load_test.py도 쓴다
+    if page == 'week1':
+        names = at.multiselect[0].options[:3]
+        yield 'district_multiselect', lambda: at.multiselect[0].set_value(names)
+        yield 'metric_radio', lambda: at.radio[0].set_value('반납_건수')
+    elif page == 'week2':
+        for region in at.selectbox[0].options[1:4]:
+            yield 'region_selectbox', lambda region=region: at.selectbox[0].set_value(region)
+    elif page == 'week3':
+        for minutes in (20, 60, 90):
+            yield 'threshold_slider', lambda minutes=minutes: at.slider[0].set_value(minutes)
+    elif page == 'week4':
+        yield 'map_radio', lambda: at.radio[0].set_value('대여소 하나씩 보기')
+        # 이용 데이터가 없으면 시간대 슬라이더가 없다
+        hours = [slider for slider in at.select_slider if slider.label == '살펴볼 시간대']
+        if hours:
+            yield 'hours_slider', lambda: hours[0].set_value((17, 20))
+    elif page == 'week5':
+        yield 'rating_slider', lambda: at.slider[0].set_value(5)
+        yield 'quiz_radio', lambda: at.radio[0].set_value(at.radio[0].options[1])
+
+
+def _measure_pages(recorder, pages, timeout):
+    import plotly.express as px
+    import plotly.graph_objects as go
+    import streamlit as st
+    from streamlit.delta_generator import DeltaGenerator
+    from streamlit.testing.v1 import AppTest
+
+    # 그림 만들기와 (plotly_chart 안의) 직렬화 시간을 따로 모은다
+    for name in ('line', 'bar', 'pie', 'scatter', 'histogram'):
+        recorder.wrap(px, name, 'figure_build')
+    recorder.wrap(go.Figure, '__init__', 'figure_build')
+    # st.plotly_chart는 불러올 때 이미 묶인 메서드라 따로 감싼다 (열 안에서는 클래스 쪽이 불린다)
+    recorder.wrap(DeltaGenerator, 'plotly_chart', 'serialize')
+    recorder.wrap(st, 'plotly_chart', 'serialize')
+
+    results = {}
+    for page in pages:
+        at = AppTest.from_file(os.path.join(ROOT, 'pages', f'{page}.py'), default_timeout=timeout)
+        start = time.perf_counter()
+        at.run()
+        result = {'first_run': time.perf_counter() - start, 'reruns': [],
+                  'exceptions': [str(error.value) for error in at.exception]}
+        start = time.perf_counter()
+        at.run()
+        result['rerun'] = time.perf_counter() - start
+        for action, apply in page_interactions(at, page):
+            apply()
+            start = time.perf_counter()
+            at.run()
+            result['reruns'].append({'action': action, 'seconds': time.perf_counter() - start})
+        results[page] = result
+    return results
+
+
+def run_worker(rows, pages, timeout):
+    # 새 프로세스에서 (작업 폴더 안에서) 한 크기를 잰다
+    recorder = Recorder()
+    measured = _measure_loaders(recorder)
+    page_results = _measure_pages(recorder, pages, timeout)
+    return {
+        'rows': measured,
+        'requested_rows': rows,
+        'phases': recorder.phases,
+        'peak_rss_mb': recorder.peak_mb,
+        'max_rss_mb': _peak_rss_mb(),
+        'pages': page_results,
+    }
+
+
+def _git_commit():
+    try:
+        return subprocess.run(['git', 'rev-parse', 'HEAD'], cwd=ROOT, capture_output=True, text=True,
+                              check=True).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def run_size(rows, pages, timeout, keep=False):
+    work = tempfile.mkdtemp(prefix=f'databike-bench-{rows}-')
+    try:
+        for name in SHARED_FILES:
+            os.symlink(os.path.join(ROOT, name), os.path.join(work, name))
+        start = time.perf_counter()
+        write_trips(rows, os.path.join(work, 'bikeborrow.csv'))
+        generate = time.perf_counter() - start
+
+        command = [sys.executable, os.path.abspath(__file__), '--worker', str(rows),
+                   '--pages', *pages, '--timeout', str(timeout)]
+        env = dict(os.environ, PYTHONPATH=os.pathsep.join(filter(None, [ROOT, os.environ.get('PYTHONPATH')])))
+        done = subprocess.run(command, cwd=work, env=env, capture_output=True, text=True)
+        if done.returncode != 0:
+            return {'requested_rows': rows, 'error': done.stderr[-4000:]}
+        result = json.loads(done.stdout.splitlines()[-1])
+        result['generate_seconds'] = generate
+        result['csv_bytes'] = os.path.getsize(os.path.join(work, 'bikeborrow.csv'))
+        return result
+    finally:
+        if not keep:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+def main():
+    parser = argparse.ArgumentParser(description='따릉이 페이지/데이터 계층 벤치마크')
+    parser.add_argument('--rows', type=int, nargs='+', default=DEFAULT_ROWS)
+    parser.add_argument('--pages', nargs='+', default=['week1', 'week2', 'week3', 'week4', 'week5'])
+    parser.add_argument('--timeout', type=float, default=600)
+    parser.add_argument('--out', default='bench.json')
+    parser.add_argument('--keep', action='store_true', help='임시 작업 폴더를 지우지 않는다')
+    parser.add_argument('--worker', type=int, help=argparse.SUPPRESS)
+    args = parser.parse_args()
+
+    if args.worker is not None:
+        # 마지막 줄만 결과 JSON (페이지가 찍는 다른 출력과 섞이지 않도록)
+        print(json.dumps(run_worker(args.worker, args.pages, args.timeout), ensure_ascii=False))
+        return
+
+    report = {
+        'commit': _git_commit(),
+        'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'),
+        'python': platform.python_version(),
+        'platform': platform.platform(),
+        'results': [],
+    }
+    for rows in args.rows:
+        print(f'{rows:,}행 측정 중...', file=sys.stderr)
+        result = run_size(rows, args.pages, args.timeout, args.keep)
+        report['results'].append(result)
+        if 'error' in result:
+            print(result['error'], file=sys.stderr)
+        else:
+            phases = ', '.join(f'{name} {seconds:.2f}s' for name, seconds in result['phases'].items())
+            print(f'  {phases} / 최대 메모리 {result["max_rss_mb"]:.0f}MB', file=sys.stderr)
+        # 중간에 멈춰도 그때까지의 결과는 남긴다
+        with open(args.out, 'w', encoding='utf-8') as f:
+            json.dump(report, f, ensure_ascii=False, indent=2)
+
+
+if __name__ == '__main__':
+    main()
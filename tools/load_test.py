@@ -0,0 +1,257 @@
+# 학생 여러 명이 한꺼번에 접속할 때의 부하 시험
+#
+#   python tools/load_test.py --account 아림:1234 --account 재원:1357 --sessions 1 10 35
+#   python tools/load_test.py --accounts accounts.csv --rows 1000000 --out load_test.json
+#
+# 세션(학생) 하나를 프로세스 하나의 AppTest로 돌린다. AppTest는 실행할 때마다 프로세스 전체에 하나뿐인
+# 스트림릿 런타임을 바꿔 끼우므로 한 프로세스 안에서 여러 세션을 동시에 돌릴 수 없다. 대신 세션마다
+# 같은 자료로 한 번 미리 돌려 캐시를 채워 두고 (서버가 미리 불러오기를 마친 상태), 모든 세션이 준비되면
+# 한꺼번에 출발시킨다. 원본 프레임의 열(문자열 열은 코드)은 열 단위 캐시(.databike_cache)를 함께
+# 매핑하므로 워커를 여러 개 띄운 서버처럼 한 벌만 메모리에 있다.
+#
+# 세션마다 id.csv 계정으로 로그인한 뒤 1~5차시를 차례로 옮겨 다니며 위젯을 조작하고, 다시 실행(rerun)마다
+# 걸린 시간을 잰다. 동시 세션 수를 늘려 가며 지연 시간 p50/p95/p99, 처리량, 메모리(RSS/PSS)를 보고한다.
+# PSS는 함께 매핑한 페이지를 나눠 센 값이라 세션들의 합이 실제로 쓰는 메모리에 가깝다.
+#
+# id.csv에는 비밀번호 해시만 있으므로 비밀번호는 --account 아이디:비밀번호 또는
+# --accounts (ID,PW 열의 CSV, 저장소에 올리지 말 것)로 넘긴다.
+import argparse
+import csv
+import json
+import multiprocessing
+import os
+import resource
+import shutil
+import sys
+import tempfile
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+# 같은 tools 폴더의 벤치마크/생성기
+from bench import SHARED_FILES, page_interactions
+from make_trips import write_trips
+
+DEFAULT_SESSIONS = [1, 5, 10, 20, 35]
+DEFAULT_PAGES = ['week1', 'week2', 'week3', 'week4', 'week5']
+# 메모리를 재는 간격 (초)
+MEMORY_INTERVAL = 0.2
+
+
+def _memory_mb():
+    # 지금 (RSS, PSS). 리눅스가 아니면 최대 RSS로 대신하고 PSS는 없다
+    try:
+        with open('/proc/self/smaps_rollup') as f:
+            fields = dict(line.split()[:2] for line in f if line.split()[0] in ('Rss:', 'Pss:'))
+        return int(fields['Rss:']) / 1024, int(fields['Pss:']) / 1024
+    except (OSError, KeyError, ValueError):
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak / (1024 * 1024 if sys.platform == 'darwin' else 1024), None
+
+
+class MemorySampler:
+    # 뒤에서 메모리를 주기적으로 재서 최댓값을 남긴다
+
+    def __init__(self, interval=MEMORY_INTERVAL):
+        self.interval = interval
+        self.start_rss, self.peak_pss = _memory_mb()
+        self.peak_rss = self.start_rss
+        self._stop = threading.Event()
+        self._thread = threading.Thread(target=self._run, daemon=True)
+        self._thread.start()
+
+    def _sample(self):
+        rss, pss = _memory_mb()
+        self.peak_rss = max(self.peak_rss, rss)
+        self.peak_pss = None if pss is None else max(self.peak_pss or 0, pss)
+
+    def _run(self):
+        while not self._stop.wait(self.interval):
+            self._sample()
+
+    def stop(self):
+        self._stop.set()
+        self._thread.join()
+        self._sample()
+
+
+def _errors(at):
+    return [str(error.value)[:500] for error in at.exception]
+
+
+def run_session(number, account, pages, timeout):
+    # 학생 한 명: 로그인 -> 차시마다 페이지 열기 + 조작. 다시 실행 한 번마다 기록 하나
+    from streamlit.testing.v1 import AppTest
+
+    records = []
+
+    def step(name, at):
+        start = time.perf_counter()
+        try:
+            at.run()
+            errors = _errors(at)
+        except Exception as error:  # 시간 초과 등도 세션 하나의 실패로만 센다
+            errors = [f'{type(error).__name__}: {error}'[:500]]
+        records.append({'session': number, 'step': name, 'seconds': time.perf_counter() - start,
+                        'error': errors[0] if errors else None})
+        return not errors
+
+    at = AppTest.from_file(os.path.join(ROOT, 'app.py'), default_timeout=timeout)
+    if not step('app', at):
+        return records
+    user_id, password = account
+    at.text_input[0].input(user_id)
+    at.text_input[1].input(password)
+    at.button[0].click()
+    # 로그인에 성공하면 앱이 1차시로 옮겨 간다 (st.switch_page)
+    if not step('login', at):
+        return records
+    if 'user_id' not in at.session_state or at.session_state['user_id'] != user_id:
+        records[-1]['error'] = f'로그인 실패: {user_id}'
+        return records
+
+    for page in pages:
+        at.switch_page(f'pages/{page}.py')
+        if not step(page, at):
+            continue
+        try:
+            actions = list(page_interactions(at, page))
+        except (IndexError, KeyError) as error:
+            # 페이지가 기대한 위젯을 그리지 않았다
+            records[-1]['error'] = f'위젯 없음: {error}'
+            continue
+        for action, apply in actions:
+            apply()
+            step(f'{page}:{action}', at)
+    return records
+
+
+def run_client(number, account, pages, timeout, warmup, barrier):
+    # 세션 하나 (작업 프로세스 하나): 미리 한 번 돌려 두고, 모두 준비되면 함께 출발한다
+    if warmup:
+        run_session(-1, account, pages, timeout)
+    barrier.wait()
+    sampler = MemorySampler()
+    start = time.perf_counter()
+    records = run_session(number, account, pages, timeout)
+    wall = time.perf_counter() - start
+    sampler.stop()
+    return {'records': records, 'wall_seconds': wall, 'rss_start_mb': sampler.start_rss,
+            'rss_peak_mb': sampler.peak_rss, 'pss_peak_mb': sampler.peak_pss}
+
+
+def _init_worker(work):
+    os.chdir(work)
+
+
+def summarize(concurrency, clients):
+    records = [record for client in clients for record in client['records']]
+    seconds = np.array([record['seconds'] for record in records if record['error'] is None])
+    errors = [record for record in records if record['error'] is not None]
+    wall = max(client['wall_seconds'] for client in clients)
+    pss = [client['pss_peak_mb'] for client in clients]
+    summary = {
+        'sessions': concurrency,
+        'reruns': len(records),
+        'errors': len(errors),
+        'wall_seconds': wall,
+        'throughput_per_second': len(seconds) / wall if wall else None,
+        'rss_peak_mb_per_session': max(client['rss_peak_mb'] for client in clients),
+        'rss_growth_mb_per_session': max(client['rss_peak_mb'] - client['rss_start_mb'] for client in clients),
+        'pss_total_mb': None if None in pss else sum(pss),
+        'error_samples': sorted({record['error'] for record in errors})[:5],
+    }
+    for q in (50, 95, 99):
+        summary[f'p{q}_ms'] = float(np.percentile(seconds, q) * 1000) if len(seconds) else None
+    # 페이지별 (어느 페이지가 느린지)
+    steps = {}
+    for record in records:
+        if record['error'] is None:
+            steps.setdefault(record['step'].split(':')[0], []).append(record['seconds'])
+    summary['p95_ms_by_page'] = {name: float(np.percentile(values, 95) * 1000) for name, values in steps.items()}
+    return summary
+
+
+def run_level(concurrency, accounts, pages, timeout, warmup, work):
+    # 단계마다 새 프로세스 (앞 단계의 캐시나 메모리가 섞이지 않도록)
+    with multiprocessing.Manager() as manager, \
+            ProcessPoolExecutor(concurrency, initializer=_init_worker, initargs=(work,)) as pool:
+        barrier = manager.Barrier(concurrency)
+        futures = [pool.submit(run_client, number, accounts[number % len(accounts)], pages, timeout, warmup, barrier)
+                   for number in range(concurrency)]
+        return summarize(concurrency, [future.result() for future in futures])
+
+
+def read_accounts(args):
+    accounts = []
+    for item in args.account:
+        user_id, _, password = item.partition(':')
+        accounts.append((user_id, password))
+    if args.accounts:
+        with open(args.accounts, encoding='utf-8-sig', newline='') as f:
+            accounts += [(row['ID'], row['PW']) for row in csv.DictReader(f)]
+    return accounts
+
+
+def check_accounts(accounts, work):
+    # 시험 전에 id.csv로 미리 확인한다 (틀린 비밀번호로 수십 세션을 돌리지 않도록)
+    from bikedata.auth import ID_PATH, CredentialStore
+
+    store = CredentialStore(os.path.join(work, ID_PATH))
+    wrong = [user_id for user_id, password in accounts if not store.verify(user_id, password)]
+    if wrong:
+        raise SystemExit(f'id.csv와 맞지 않는 계정: {", ".join(wrong)}')
+
+
+def main():
+    parser = argparse.ArgumentParser(description='따릉이 수업 앱 동시 접속 부하 시험')
+    parser.add_argument('--account', action='append', default=[], help='아이디:비밀번호 (여러 번 가능)')
+    parser.add_argument('--accounts', help='ID,PW 열이 있는 평문 계정 CSV')
+    parser.add_argument('--sessions', type=int, nargs='+', default=DEFAULT_SESSIONS, help='동시 세션 수 (단계별)')
+    parser.add_argument('--pages', nargs='+', default=DEFAULT_PAGES)
+    parser.add_argument('--rows', type=int, help='가짜 이용 데이터를 이만큼 만들어 임시 폴더에서 시험한다')
+    parser.add_argument('--timeout', type=float, default=600, help='다시 실행 한 번의 제한 시간 (초)')
+    parser.add_argument('--no-warmup', dest='warmup', action='store_false',
+                        help='캐시가 빈 상태에서 바로 시작한다 (서버를 막 띄운 직후)')
+    parser.add_argument('--out', default='load_test.json')
+    args = parser.parse_args()
+
+    accounts = read_accounts(args)
+    if not accounts:
+        parser.error('--account 아이디:비밀번호 또는 --accounts 파일이 필요합니다')
+
+    work = os.getcwd()
+    if args.rows:
+        work = tempfile.mkdtemp(prefix=f'databike-load-{args.rows}-')
+        for name in SHARED_FILES:
+            os.symlink(os.path.join(ROOT, name), os.path.join(work, name))
+        write_trips(args.rows, os.path.join(work, 'bikeborrow.csv'))
+    try:
+        check_accounts(accounts, work)
+        report = {'created_at': time.strftime('%Y-%m-%dT%H:%M:%S'), 'rows': args.rows, 'pages': args.pages,
+                  'accounts': len(accounts), 'levels': []}
+        for concurrency in args.sessions:
+            print(f'동시 세션 {concurrency}개...', file=sys.stderr)
+            summary = run_level(concurrency, accounts, args.pages, args.timeout, args.warmup, work)
+            report['levels'].append(summary)
+            print(f"  p50 {summary['p50_ms'] or 0:,.0f}ms / p95 {summary['p95_ms'] or 0:,.0f}ms / "
+                  f"p99 {summary['p99_ms'] or 0:,.0f}ms, {summary['throughput_per_second'] or 0:.1f}회/초, "
+                  f"세션당 최대 RSS {summary['rss_peak_mb_per_session']:,.0f}MB, "
+                  f"PSS 합 {summary['pss_total_mb'] or 0:,.0f}MB, 오류 {summary['errors']}건", file=sys.stderr)
+            for error in summary['error_samples']:
+                print(f'    {error}', file=sys.stderr)
+            # 중간에 멈춰도 그때까지의 결과는 남긴다
+            with open(args.out, 'w', encoding='utf-8') as f:
+                json.dump(report, f, ensure_ascii=False, indent=2)
+    finally:
+        if args.rows:
+            shutil.rmtree(work, ignore_errors=True)
+
+
+if __name__ == '__main__':
+    main()
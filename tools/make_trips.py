@@ -0,0 +1,186 @@
+# 부하 시험용 가짜 따릉이 이용 데이터(bikeborrow.csv) 만들기
+#
+#   python tools/make_trips.py --rows 10000000 --out bikeborrow.csv
+#   python tools/make_trips.py --rows 1000000 --days 30 --out bikeborrow_202401.csv
+#
+# 대여소 ID/이름/좌표는 bikelocation.csv에서 가져오고, 출퇴근 시간에 몰리는 시간대,
+# 가까운 대여소로 많이 가는 도착지, 이동 거리에 맞는 이용 시간을 흉내 낸다.
+# 모든 값은 NumPy로 한 번에 만들고 pyarrow로 조각씩 쓰며, 조각은 여러 프로세스가 나눠 만든다.
+import argparse
+import io
+import os
+import sys
+from concurrent.futures import ProcessPoolExecutor
+
+import numpy as np
+import pandas as pd
+import pyarrow as pa
+import pyarrow.csv as pa_csv
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+
+COLUMNS = ['기준_날짜', '집계_기준', '기준_시간대', '시작_대여소_ID', '시작_대여소명',
+           '종료_대여소_ID', '종료_대여소명', '전체_건수', '전체_이용_분', '전체_이용_거리']
+CHUNK_ROWS = 1_000_000
+# 원본과 같은 인코딩 (bikedata.trips.read_trip_csv가 이것으로 읽는다)
+ENCODING = 'cp949'
+
+# 0시~23시 대여 비율 (출근 8시, 퇴근 18시에 몰린다)
+HOUR_WEIGHTS = np.array([0.8, 0.5, 0.3, 0.2, 0.2, 0.5, 1.5, 4.0, 6.5, 3.5, 2.5, 2.8,
+                         3.2, 3.1, 3.0, 3.3, 4.0, 5.5, 7.0, 5.0, 3.8, 3.2, 2.4, 1.5])
+# 빌린 곳에 그대로 반납하는 (산책) 비율
+LOOP_SHARE = 0.06
+# 평균 속도 (m/분, 약 11km/h)와 도로가 돌아가는 정도
+SPEED_M_PER_MIN = 180
+DETOUR = 1.3
+
+
+def load_station_table(path=os.path.join(ROOT, 'bikelocation.csv')):
+    stations = pd.read_csv(path, encoding='cp949')
+    stations = stations[(stations['위도'] != 0) & (stations['경도'] != 0)].reset_index(drop=True)
+    # 이름은 '구_장소' 모양 (페이지는 '_' 앞을 출발 구로 쓴다)
+    district = stations['주소1'].str.split().str[1].fillna('기타')
+    place = stations['주소2'].fillna(stations['주소1'].str.split(n=2).str[2]).fillna(stations['대여소_ID'])
+    stations['대여소명'] = district + '_' + place.str.strip()
+    return stations
+
+
+def _spatial_order(lat, lon, bits=16):
+    # 모튼(Z) 순서 - 순서가 가까운 대여소는 지도에서도 대체로 가깝다
+    scale = (1 << bits) - 1
+    y = ((lat - lat.min()) / max(np.ptp(lat), 1e-9) * scale).astype(np.uint64)
+    x = ((lon - lon.min()) / max(np.ptp(lon), 1e-9) * scale).astype(np.uint64)
+    code = np.zeros(len(lat), dtype=np.uint64)
+    for bit in range(bits):
+        code |= ((x >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit)
+        code |= ((y >> np.uint64(bit)) & np.uint64(1)) << np.uint64(2 * bit + 1)
+    return np.argsort(code, kind='stable')
+
+
+def _haversine_m(lat1, lon1, lat2, lon2):
+    lat1, lon1, lat2, lon2 = map(np.radians, (lat1, lon1, lat2, lon2))
+    a = np.sin((lat2 - lat1) / 2) ** 2 + np.cos(lat1) * np.cos(lat2) * np.sin((lon2 - lon1) / 2) ** 2
+    return 2 * 6_371_000 * np.arcsin(np.sqrt(a))
+
+
+class TripGenerator:
+    # 대여소 인기/공간 순서는 seed로 한 번 정하고, 조각마다 (seed, 조각 번호)로 난수를 새로 잡는다.
+    # 그래서 몇 개의 프로세스로 나눠 만들어도 같은 seed면 같은 파일이 나온다.
+
+    def __init__(self, stations, seed=0, start_date='2024-01-01', days=1):
+        self.seed = seed
+        rng = np.random.default_rng(seed)
+        self.lat = stations['위도'].to_numpy(dtype=float)
+        self.lon = stations['경도'].to_numpy(dtype=float)
+        self.ids = pa.array(stations['대여소_ID'].astype(str))
+        self.names = pa.array(stations['대여소명'].astype(str))
+        # 대여소마다 인기가 다르다 (역 앞 몇 곳에 많이 몰린다)
+        popularity = rng.lognormal(0, 1, len(stations))
+        self.popularity = popularity / popularity.sum()
+        self.order = _spatial_order(self.lat, self.lon)
+        self.position = np.empty_like(self.order)
+        self.position[self.order] = np.arange(len(self.order))
+        # 날짜 순번 -> YYYYMMDD 정수
+        dates = np.datetime64(start_date, 'D') + np.arange(days)
+        self.dates = np.array([int(str(date).replace('-', '')) for date in dates], dtype=np.int32)
+
+    def chunk(self, rows, index=0):
+        rng = np.random.default_rng([self.seed, index])
+        n_stations = len(self.order)
+
+        dates = self.dates[rng.integers(0, len(self.dates), rows)]
+        hours = rng.choice(24, size=rows, p=HOUR_WEIGHTS / HOUR_WEIGHTS.sum())
+        base_time = (hours * 100 + rng.integers(0, 6, rows) * 10).astype(np.int16)
+
+        origin = rng.choice(n_stations, size=rows, p=self.popularity)
+        # 도착지는 공간 순서에서 가까운 대여소 (대부분 근처, 가끔 멀리)
+        spread = rng.lognormal(np.log(12), 1.0, rows)
+        offset = np.rint(rng.normal(0, 1, rows) * spread).astype(np.int64)
+        offset[offset == 0] = rng.choice([-1, 1], (offset == 0).sum())
+        offset[rng.random(rows) < LOOP_SHARE] = 0
+        destination = self.order[np.clip(self.position[origin] + offset, 0, n_stations - 1)]
+
+        counts = rng.geometric(0.75, rows).astype(np.int32)
+        distance = _haversine_m(self.lat[origin], self.lon[origin], self.lat[destination], self.lon[destination])
+        distance = distance * rng.uniform(1.1, DETOUR * 1.2, rows)
+        loops = origin == destination
+        distance[loops] = rng.gamma(2, 1500, loops.sum())
+        distance = np.maximum(distance, 100)
+        speed = rng.lognormal(np.log(SPEED_M_PER_MIN), 0.3, rows)
+        minutes = distance / speed + rng.gamma(1.5, 2, rows)
+        # 몇 번은 중간에 쉬거나 돌아다녀서 훨씬 오래 탄다
+        leisure = rng.random(rows) < 0.03
+        minutes[leisure] += rng.exponential(60, leisure.sum())
+
+        # 같은 칸(날짜/시간대/출발/도착)에 묶인 건수만큼 합계
+        minutes = np.maximum(np.rint(minutes), 1).astype(np.int64) * counts
+        distance = np.round(distance * counts, 2)
+
+        origin, destination = pa.array(origin), pa.array(destination)
+        return pa.table({  # 열 순서는 COLUMNS와 같다
+            '기준_날짜': dates,
+            '집계_기준': pa.array(np.full(rows, '출발시간', dtype=object)),
+            '기준_시간대': base_time,
+            '시작_대여소_ID': self.ids.take(origin),
+            '시작_대여소명': self.names.take(origin),
+            '종료_대여소_ID': self.ids.take(destination),
+            '종료_대여소명': self.names.take(destination),
+            '전체_건수': counts,
+            '전체_이용_분': minutes,
+            '전체_이용_거리': distance,
+        })
+
+
+# 작업 프로세스마다 한 번 만들어 두는 생성기
+_worker = None
+
+
+def _init_worker(stations, seed, start_date, days):
+    global _worker
+    _worker = TripGenerator(stations, seed=seed, start_date=start_date, days=days)
+
+
+def _chunk_bytes(index, rows):
+    buffer = io.BytesIO()
+    pa_csv.write_csv(_worker.chunk(rows, index), buffer,
+                     pa_csv.WriteOptions(include_header=False, quoting_style='needed'))
+    # pyarrow는 UTF-8로만 쓰므로 옮겨 담는다 (대여소 이름 외에는 모두 ASCII)
+    return buffer.getvalue().decode('utf-8').encode(ENCODING, errors='replace')
+
+
+def write_trips(rows, path, seed=0, days=1, start_date='2024-01-01',
+                chunk_rows=CHUNK_ROWS, stations=None, workers=None):
+    stations = load_station_table() if stations is None else stations
+    init = (stations, seed, start_date, days)
+    chunks = [(index, min(chunk_rows, rows - start)) for index, start in enumerate(range(0, rows, chunk_rows))]
+    workers = min(workers or os.cpu_count() or 1, max(len(chunks), 1))
+    with open(path, 'wb') as f:
+        f.write((','.join(COLUMNS) + '\n').encode(ENCODING))
+        if workers <= 1:
+            _init_worker(*init)
+            for index, size in chunks:
+                f.write(_chunk_bytes(index, size))
+        else:
+            with ProcessPoolExecutor(workers, initializer=_init_worker, initargs=init) as pool:
+                # 순서대로 받아 이어 쓴다
+                for data in pool.map(_chunk_bytes, *zip(*chunks)):
+                    f.write(data)
+    return path
+
+
+def main():
+    parser = argparse.ArgumentParser(description='가짜 따릉이 이용 데이터 만들기')
+    parser.add_argument('--rows', type=int, default=1_000_000)
+    parser.add_argument('--out', default='bikeborrow.csv')
+    parser.add_argument('--days', type=int, default=1, help='며칠에 걸쳐 나눠 만들지')
+    parser.add_argument('--start-date', default='2024-01-01')
+    parser.add_argument('--seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, help='조각을 만들 프로세스 수 (기본: CPU 수)')
+    args = parser.parse_args()
+    write_trips(args.rows, args.out, seed=args.seed, days=args.days,
+                start_date=args.start_date, workers=args.workers)
+    print(f'{args.out}: {args.rows:,}행, {os.path.getsize(args.out) / 1e6:.1f}MB', file=sys.stderr)
+
+
+if __name__ == '__main__':
+    main()
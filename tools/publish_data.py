@@ -0,0 +1,58 @@
+# 서버 프로세스(워커)를 여러 개 띄우기 전에 공유 데이터 캐시를 한 번 만들어 두기
+#
+#   python tools/publish_data.py
+#   DATABIKE_CACHE_DIR=/dev/shm/databike python tools/publish_data.py
+#
+# 이용 데이터, 대여소, 자치구 현황을 열 단위 캐시(.databike_cache)에 올린다. 워커들은 같은 폴더에서
+# (또는 같은 DATABIKE_CACHE_DIR로) 띄우면 CSV를 다시 읽지 않고 그 파일을 읽기 전용으로 매핑해 쓴다.
+# 숫자 열과 문자열 열의 코드는 매핑한 배열을 복사 없이 그대로 감싸므로 워커 수가 늘어도 한 벌만
+# 메모리에 있고, 워커마다 따로 드는 것은 문자열 열의 고유값 목록뿐이다. 미리 만들지 않아도
+# 처음 불린 워커 하나만 만들고 나머지는 기다렸다가 붙지만, 수업 전에 돌려 두면 첫 접속이 빠르다.
+import argparse
+import os
+import sys
+import time
+
+ROOT = os.path.dirname(os.path.dirname(os.path.abspath(__file__)))
+sys.path.insert(0, ROOT)
+
+from bikedata import columnar
+from bikedata.districts import DISTRICT_PATTERN, attach_districts, district_files
+from bikedata.stations import STATION_PATH, attach_stations
+from bikedata.trips import TRIP_PATTERN, attach_trips
+
+DATASETS = [
+    ('trips', lambda args: attach_trips(args.trips)),
+    ('stations', lambda args: attach_stations(args.stations)),
+    ('districts', lambda args: attach_districts(district_files(args.districts))),
+]
+
+
+def _size_mb(name):
+    folder = os.path.join(columnar.CACHE_DIR, name)
+    return sum(entry.stat().st_size for entry in os.scandir(folder)) / 1e6 if os.path.isdir(folder) else 0.0
+
+
+def main():
+    parser = argparse.ArgumentParser(description='여러 워커가 함께 쓰는 데이터 캐시 만들기')
+    parser.add_argument('--trips', default=TRIP_PATTERN)
+    parser.add_argument('--stations', default=STATION_PATH)
+    parser.add_argument('--districts', default=DISTRICT_PATTERN)
+    args = parser.parse_args()
+
+    failed = False
+    for name, attach in DATASETS:
+        start = time.perf_counter()
+        try:
+            rows = len(attach(args))
+        except FileNotFoundError as error:
+            print(f'{name}: 원본 없음 ({error})', file=sys.stderr)
+            failed = True
+            continue
+        print(f'{name}: {rows:,}행, {_size_mb(name):.1f}MB, {time.perf_counter() - start:.1f}s', file=sys.stderr)
+    print(f'캐시 위치: {os.path.abspath(columnar.CACHE_DIR)}', file=sys.stderr)
+    sys.exit(1 if failed else 0)
+
+
+if __name__ == '__main__':
+    main()